@@ -0,0 +1,79 @@
+"""
+Benchmarks AsyncGeminiClient against an in-process stub of the Gemini SDK.
+
+The stub answers every request after a fixed latency and fails a share of
+them with a retryable 503, so the run exercises the semaphore, the token
+bucket and the backoff path without any network access. With the rate limit
+out of the way, the expected wall time is about (requests / concurrency) x latency.
+
+Usage (from the project root):
+    python -m benchmarks.bench_async_gemini --requests 1000 --concurrency 50 --latency 0.2
+"""
+import argparse
+import asyncio
+import random
+import time
+
+from finder.ai_funcs import AsyncGeminiClient
+
+
+class StubServiceUnavailable(Exception):
+    code = 503
+
+
+class StubResponse:
+    def __init__(self, text: str):
+        self.text = text
+
+
+class StubModel:
+    """Mimics `genai.GenerativeModel.generate_content_async` with fixed latency."""
+
+    def __init__(self, model_name: str, latency: float, failure_rate: float, seed: int):
+        self.model_name = model_name
+        self.latency = latency
+        self.failure_rate = failure_rate
+        self.random = random.Random(seed)
+        self.calls = 0
+
+    async def generate_content_async(self, prompt: str) -> StubResponse:
+        self.calls += 1
+        await asyncio.sleep(self.latency)
+        if self.random.random() < self.failure_rate:
+            raise StubServiceUnavailable("503 Service Unavailable")
+        return StubResponse("General/Minor Care")
+
+
+async def run(requests: int, concurrency: int, latency: float, rps: float, failure_rate: float, seed: int) -> None:
+    models = []
+
+    def factory(model_name: str) -> StubModel:
+        model = StubModel(model_name, latency, failure_rate, seed)
+        models.append(model)
+        return model
+
+    client = AsyncGeminiClient(max_in_flight=concurrency, requests_per_second=rps, burst=concurrency,
+                               base_delay=latency, model_factory=factory)
+    prompts = [f"description {i}" for i in range(requests)]
+
+    start = time.perf_counter()
+    results = await client.generate_many(prompts)
+    elapsed = time.perf_counter() - start
+
+    ideal = requests / concurrency * latency
+    print(f"Requests:        {requests:,} ({sum(r is not None for r in results):,} succeeded)")
+    print(f"Model calls:     {sum(m.calls for m in models):,} (model handles created: {len(models)})")
+    print(f"Wall time:       {elapsed:.2f} s")
+    print(f"Ideal wall time: {ideal:.2f} s  ((requests / concurrency) x latency)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--requests', type=int, default=1000)
+    parser.add_argument('--concurrency', type=int, default=50)
+    parser.add_argument('--latency', type=float, default=0.2)
+    parser.add_argument('--rps', type=float, default=10_000.0, help="Token-bucket rate; high by default so it does not bind.")
+    parser.add_argument('--failure-rate', type=float, default=0.0)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+    asyncio.run(run(args.requests, args.concurrency, args.latency, args.rps, args.failure_rate, args.seed))
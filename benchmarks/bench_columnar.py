@@ -0,0 +1,134 @@
+"""
+Benchmarks loading patient data from CSV against the memory-mapped columnar copy.
+
+A synthetic patient file of --rows rows is generated and converted once. Each
+loader then runs in --workers spawned processes at the same time, which all
+keep their data loaded until every one has been measured. Reported per loader:
+mean load time, peak RSS per process and, on Linux, the total proportional set
+size (PSS) of all workers, where pages shared through the page cache are only
+counted once.
+
+'full' loads every column (`pd.read_csv` / `load_columnar`); 'handler' builds
+PatientDataHandler.simple_patient_df from each format.
+
+Usage (from the project root):
+    python -m benchmarks.bench_columnar --rows 10000000 --workers 4
+"""
+import argparse
+import multiprocessing as mp
+import os
+import resource
+import sys
+import tempfile
+import time
+
+import pandas as pd
+
+from benchmarks.generators import generate_patients
+from finder.columnar import columnar_path, convert_csv, load_columnar
+from finder.matching_engine import PatientDataHandler
+
+
+HOSPITAL_FILE = './Data/hospitalData.csv'
+
+LOADERS = {
+    'csv full': lambda csv_path, columnar_dir: pd.read_csv(csv_path),
+    'columnar full': lambda csv_path, columnar_dir: load_columnar(columnar_dir),
+    'csv handler': lambda csv_path, columnar_dir: PatientDataHandler(csv_path, HOSPITAL_FILE).simple_patient_df,
+    'columnar handler': lambda csv_path, columnar_dir: PatientDataHandler(columnar_dir, HOSPITAL_FILE).simple_patient_df,
+}
+
+
+def proportional_set_size_mb() -> float | None:
+    """Returns this process's PSS in MB from /proc, or None where it is not available."""
+    try:
+        with open('/proc/self/smaps_rollup', encoding='ascii') as f:
+            for line in f:
+                if line.startswith('Pss:'):
+                    return int(line.split()[1]) / 2**10
+    except OSError:
+        pass
+    return None
+
+
+def measure(name: str, csv_path: str, columnar_dir: str, barrier, queue) -> None:
+    start = time.perf_counter()
+    result = LOADERS[name](csv_path, columnar_dir)
+    elapsed = time.perf_counter() - start
+
+    # Measure while every worker still holds its data, so shared pages are split between them.
+    barrier.wait()
+    pss = proportional_set_size_mb()
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is reported in bytes on macOS and in kilobytes elsewhere.
+    peak_mb = peak / 2**20 if sys.platform == 'darwin' else peak / 2**10
+    barrier.wait()
+
+    queue.put((elapsed, peak_mb, pss))
+    del result
+
+
+def drop_page_cache() -> bool:
+    """Asks Linux to drop the page cache so the next load is cold. Needs root; returns False otherwise."""
+    try:
+        os.sync()
+        with open('/proc/sys/vm/drop_caches', 'w', encoding='ascii') as f:
+            f.write('3\n')
+        return True
+    except OSError:
+        return False
+
+
+def prepare(csv_path: str, rows: int) -> None:
+    print(f"Writing {rows:,} synthetic patients...")
+    generate_patients(csv_path, rows)
+
+    start = time.perf_counter()
+    convert_csv(csv_path)
+    print(f"Converted to columnar in {time.perf_counter() - start:.1f} s")
+
+
+def run(rows: int, workers: int, cold: bool) -> None:
+    ctx = mp.get_context('spawn')
+    with tempfile.TemporaryDirectory() as tmp:
+        csv_path = os.path.join(tmp, 'patients.csv')
+        columnar_dir = columnar_path(csv_path)
+        # Generating in a child keeps this process small; Linux children inherit its peak RSS.
+        proc = ctx.Process(target=prepare, args=(csv_path, rows))
+        proc.start()
+        proc.join()
+
+        csv_mb = os.path.getsize(csv_path) / 2**20
+        columnar_mb = sum(entry.stat().st_size for entry in os.scandir(columnar_dir)) / 2**20
+        print(f"On disk: CSV {csv_mb:,.0f} MB, columnar {columnar_mb:,.0f} MB\n")
+
+        print(f"{'loader':<18}{'load (s)':>10}{'peak RSS/proc (MB)':>20}{'total PSS (MB)':>16}")
+        for name in LOADERS:
+            if cold and not drop_page_cache():
+                print("(could not drop the page cache; loads are warm)")
+                cold = False
+
+            barrier = ctx.Barrier(workers)
+            queue = ctx.Queue()
+            procs = [ctx.Process(target=measure, args=(name, csv_path, columnar_dir, barrier, queue))
+                     for _ in range(workers)]
+            for proc in procs:
+                proc.start()
+            results = [queue.get() for _ in procs]
+            for proc in procs:
+                proc.join()
+
+            load = sum(r[0] for r in results) / workers
+            peak = max(r[1] for r in results)
+            pss = sum(r[2] for r in results) if all(r[2] is not None for r in results) else None
+            pss_text = f"{pss:>16,.0f}" if pss is not None else f"{'n/a':>16}"
+            print(f"{name:<18}{load:>10.2f}{peak:>20,.0f}{pss_text}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=10_000_000)
+    parser.add_argument('--workers', type=int, default=4)
+    parser.add_argument('--cold', action='store_true', help="Drop the page cache before each loader (needs root).")
+    args = parser.parse_args()
+    run(args.rows, args.workers, args.cold)
@@ -0,0 +1,61 @@
+"""
+Benchmarks keyword matching in SpecialtyAnalyzer: the original nested
+word x specialty scan against the precompiled KeywordIndex.
+
+The 171 descriptions in Data/patientData.csv are repeated up to --rows rows.
+Only the matching step is timed; the spaCy parse is identical for both paths.
+
+Usage (from the project root):
+    python -m benchmarks.bench_keyword_index --rows 1000000
+"""
+import argparse
+import csv
+import time
+
+from finder.analysis import SpecialtyAnalyzer
+from finder.keyword_index import KeywordIndex
+
+
+def legacy_match(description: str, specialty_map: dict[str, list[str]]) -> str | None:
+    """The pre-index lookup: first word found in set iteration order wins."""
+    all_words = set(description.lower().strip().split())
+    for word in all_words:
+        for specialty, keywords in specialty_map.items():
+            if word in keywords:
+                return specialty
+    return None
+
+
+def load_descriptions(patient_file: str, rows: int) -> list[str]:
+    with open(patient_file, newline='', encoding='utf-8') as f:
+        base = [row['Injury/Sickness'] for row in csv.DictReader(f)]
+    repeats, remainder = divmod(rows, len(base))
+    return base * repeats + base[:remainder]
+
+
+def run(rows: int, patient_file: str) -> None:
+    descriptions = load_descriptions(patient_file, rows)
+    specialty_map = SpecialtyAnalyzer.SPACY_SPECIALTY_MAP
+    index = SpecialtyAnalyzer.KEYWORD_INDEX
+
+    start = time.perf_counter()
+    legacy_hits = sum(legacy_match(d, specialty_map) is not None for d in descriptions)
+    legacy_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    index_hits = sum(index.best_match(KeywordIndex.tokenize(d)) is not None for d in descriptions)
+    index_time = time.perf_counter() - start
+
+    print(f"Descriptions: {len(descriptions):,}")
+    print(f"{'path':<14}{'total (s)':>12}{'per desc (us)':>16}{'matched':>12}")
+    for name, elapsed, hits in (('legacy scan', legacy_time, legacy_hits),
+                                ('keyword index', index_time, index_hits)):
+        print(f"{name:<14}{elapsed:>12.3f}{elapsed / len(descriptions) * 1e6:>16.2f}{hits:>12,}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=1_000_000)
+    parser.add_argument('--patients', default='./Data/patientData.csv')
+    args = parser.parse_args()
+    run(args.rows, args.patients)
@@ -0,0 +1,96 @@
+"""
+Benchmarks PatientDataHandler loading against the original object-dtype path.
+
+A synthetic patient file of --rows rows is written once, then each loading path
+runs in a fresh spawned process so its peak resident memory is measured alone.
+
+Usage (from the project root):
+    python -m benchmarks.bench_patient_loading --rows 10000000
+"""
+import argparse
+import multiprocessing as mp
+import os
+import resource
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+from finder.matching_engine import PatientDataHandler
+
+
+HOSPITAL_FILE = './Data/hospitalData.csv'
+
+
+def write_synthetic_patients(path: str, rows: int, seed: int = 0) -> None:
+    """Writes `rows` patients whose values are drawn from Data/patientData.csv."""
+    base = pd.read_csv('./Data/patientData.csv')
+    rng = np.random.default_rng(seed)
+    chunk = 1_000_000
+    for start in range(0, rows, chunk):
+        size = min(chunk, rows - start)
+        sample = base.iloc[rng.integers(0, len(base), size)].reset_index(drop=True)
+        sample['PatientID'] = [f"PID{i}" for i in range(start, start + size)]
+        sample.to_csv(path, mode='w' if start == 0 else 'a', header=start == 0, index=False)
+
+
+def legacy_load(patient_file: str) -> pd.DataFrame:
+    """The original loading path: every column as object, one apply per row, three copies."""
+    severity_map = PatientDataHandler.SEVERITY_MAP
+
+    def standardize(raw):
+        if not isinstance(raw, str):
+            return 'Unknown'
+        return severity_map.get(raw.lower(), 'Unknown')
+
+    patient_df = pd.read_csv(patient_file)
+    hospital_df = pd.read_csv(HOSPITAL_FILE)
+    temp_df = patient_df.copy()
+    temp_df['Severity'] = temp_df['Severity'].apply(standardize)
+    simple_patient_df = temp_df[['PatientID', 'AffectedBodyPart', 'Injury/Sickness', 'Severity']]
+    return patient_df, hospital_df, temp_df, simple_patient_df
+
+
+def handler_load(patient_file: str) -> PatientDataHandler:
+    return PatientDataHandler(patient_file, HOSPITAL_FILE)
+
+
+def measure(name: str, patient_file: str, queue) -> None:
+    loader = legacy_load if name == 'legacy' else handler_load
+    start = time.perf_counter()
+    result = loader(patient_file)
+    elapsed = time.perf_counter() - start
+
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is reported in bytes on macOS and in kilobytes elsewhere.
+    peak_mb = peak / 2**20 if sys.platform == 'darwin' else peak / 2**10
+    queue.put((name, elapsed, peak_mb))
+    del result
+
+
+def run(rows: int, patient_file: str | None) -> None:
+    with tempfile.TemporaryDirectory() as tmp:
+        if patient_file is None:
+            patient_file = os.path.join(tmp, 'patients.csv')
+            print(f"Writing {rows:,} synthetic patients...")
+            write_synthetic_patients(patient_file, rows)
+
+        ctx = mp.get_context('spawn')
+        queue = ctx.Queue()
+        print(f"{'path':<10}{'load (s)':>12}{'peak RSS (MB)':>16}")
+        for name in ('legacy', 'handler'):
+            proc = ctx.Process(target=measure, args=(name, patient_file, queue))
+            proc.start()
+            result = queue.get()
+            proc.join()
+            print(f"{result[0]:<10}{result[1]:>12.2f}{result[2]:>16.1f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=10_000_000)
+    parser.add_argument('--patients', default=None, help="Use an existing patient file instead of generating one.")
+    args = parser.parse_args()
+    run(args.rows, args.patients)
@@ -0,0 +1,118 @@
+"""
+Calibrates the semantic tier of SpecialtyAnalyzer on held-out descriptions.
+
+Descriptions come from `generators.generate_labeled_descriptions`, whose
+conditions are not in Data/patientData.csv. The conditions are split in two
+halves --splits times. Each time the threshold is chosen on the calibration
+half, as the lowest one whose accepted answers reach --target-precision, and
+every threshold is scored on the test half. The lowest threshold whose test
+halves reach --target-precision on average is recommended. Only descriptions
+the keyword tier misses reach the semantic tier; the spaCy tier is skipped, so
+'escalated' is an upper bound. Gemini is never called.
+
+Usage (from the project root):
+    python -m benchmarks.bench_semantic_tier --rows 20000 --splits 100 --target-precision 0.95
+"""
+import argparse
+
+import numpy as np
+
+from benchmarks.generators import HELD_OUT_CONDITIONS, generate_labeled_descriptions
+from finder.analysis import SpecialtyAnalyzer
+from finder.keyword_index import KeywordIndex
+
+
+# The table is printed on a coarse grid; thresholds are chosen on a fine one.
+TABLE_THRESHOLDS = np.round(np.arange(0.30, 0.81, 0.05), 2)
+THRESHOLDS = np.round(np.arange(0.30, 0.81, 0.01), 2)
+
+
+def split_conditions(seed: int) -> tuple[set[str], set[str]]:
+    """
+    Splits the conditions of every specialty in two halves: calibration and test.
+    """
+    rng = np.random.default_rng(seed)
+    calibration, test = set(), set()
+    for conditions in HELD_OUT_CONDITIONS.values():
+        order = rng.permutation(len(conditions))
+        half = len(conditions) // 2
+        calibration.update(conditions[i] for i in order[:half])
+        test.update(conditions[i] for i in order[half:])
+    return calibration, test
+
+
+def evaluate(top: np.ndarray, runner_up: np.ndarray, correct: np.ndarray, threshold: float,
+             margin: float) -> tuple[float, float]:
+    """
+    Returns the share of descriptions the tier accepts and the accuracy of those it accepts.
+    """
+    accepted = (top >= threshold) & (top - runner_up >= margin)
+    coverage = accepted.mean() if len(accepted) else 0.0
+    precision = correct[accepted].mean() if accepted.any() else 1.0
+    return coverage, precision
+
+
+def run(rows: int, seed: int, splits: int, target_precision: float, margin: float) -> None:
+    analyzer = SpecialtyAnalyzer(ai_client=None)
+    keyword_index = analyzer.rules.keyword_index
+    data = generate_labeled_descriptions(rows, seed)
+
+    keyword = np.array([keyword_index.best_match(KeywordIndex.tokenize(text))
+                        for text in data['Injury/Sickness']], dtype=object)
+    keyword_hit = keyword != None  # noqa: E711 - element-wise comparison
+    missed = data[~keyword_hit]
+
+    index = analyzer.semantic_index
+    scores = index.scores(missed['Injury/Sickness'].tolist())
+    best = scores.argmax(axis=1)
+    ordered = np.sort(scores, axis=1)
+    top, runner_up = ordered[:, -1], ordered[:, -2]
+    correct = np.array(index.specialties, dtype=object)[best] == missed['Specialty'].to_numpy()
+
+    print(f"Descriptions: {rows:,} ({len(HELD_OUT_CONDITIONS)} specialties, "
+          f"{sum(map(len, HELD_OUT_CONDITIONS.values()))} held-out conditions)")
+    print(f"Keyword tier: {keyword_hit.mean():.1%} resolved, "
+          f"{(keyword[keyword_hit] == data['Specialty'].to_numpy()[keyword_hit]).mean():.1%} correct")
+    print(f"Semantic tier on the {len(missed):,} keyword misses, margin {margin}:")
+    print(f"{'threshold':>10}{'resolved':>10}{'accuracy':>10}")
+    for threshold in TABLE_THRESHOLDS:
+        coverage, precision = evaluate(top, runner_up, correct, threshold, margin)
+        print(f"{threshold:>10.2f}{coverage:>10.1%}{precision:>10.1%}")
+
+    # Each split scores every threshold on the half of the conditions it did not choose from.
+    held_out = np.zeros((splits, len(THRESHOLDS), 2))
+    chosen = []
+    for split in range(splits):
+        calibration, _ = split_conditions(seed + split)
+        fit = missed['Condition'].isin(calibration).to_numpy()
+        chosen.append(next((t for t in THRESHOLDS
+                            if evaluate(top[fit], runner_up[fit], correct[fit], t, margin)[1] >= target_precision),
+                           THRESHOLDS[-1]))
+        held_out[split] = [evaluate(top[~fit], runner_up[~fit], correct[~fit], t, margin) for t in THRESHOLDS]
+    print(f"Thresholds chosen on {splits} calibration halves range from {min(chosen):.2f} to {max(chosen):.2f}, "
+          f"median {np.median(chosen):.2f}")
+
+    coverage, precision = held_out.mean(axis=0).T
+    meets = np.flatnonzero(precision >= target_precision)
+    best = meets[0] if len(meets) else len(THRESHOLDS) - 1
+    recommended = float(THRESHOLDS[best])
+    print(f"The lowest threshold averaging {target_precision:.0%} accuracy on the test halves is {recommended:.2f}: "
+          f"it resolves {coverage[best]:.1%} of their keyword misses at {precision[best]:.1%} accuracy")
+
+    configured = SpecialtyAnalyzer.SEMANTIC_THRESHOLD
+    for label, threshold in (('recommended', recommended), ('configured', configured)):
+        coverage, precision = evaluate(top, runner_up, correct, threshold, margin)
+        escalated = len(missed) * (1 - coverage)
+        print(f"{label} threshold {threshold:.2f}: {coverage:.1%} of keyword misses resolved at {precision:.1%} "
+              f"accuracy; escalations drop from {len(missed):,} to {escalated:,.0f} of {rows:,} descriptions")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=20_000)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--splits', type=int, default=100)
+    parser.add_argument('--target-precision', type=float, default=0.95)
+    parser.add_argument('--margin', type=float, default=SpecialtyAnalyzer.SEMANTIC_MARGIN)
+    args = parser.parse_args()
+    run(args.rows, args.seed, args.splits, args.target_precision, args.margin)
@@ -0,0 +1,80 @@
+"""
+Profiles the cold start of run_client with `python -X importtime`.
+
+Importing run_client and calling setup() must not import spaCy or the Gemini
+SDK; those are loaded on first use. The script exits with status 1 if either
+shows up, or if the cumulative import time exceeds --max-import-ms.
+
+Usage (from the project root):
+    python -m benchmarks.bench_startup --max-import-ms 2000
+"""
+import argparse
+import subprocess
+import sys
+
+
+# Modules that should only be imported once a query actually needs them.
+DEFERRED_MODULES = ('spacy', 'google.generativeai', 'dotenv')
+
+STARTUP_SNIPPET = """
+import time
+start = time.perf_counter()
+import run_client
+run_client.setup()
+print(f"SETUP_SECONDS={time.perf_counter() - start}")
+"""
+
+
+def profile_startup() -> tuple[dict[str, int], float]:
+    """
+    Runs the startup snippet in a fresh interpreter.
+
+    Returns:
+        tuple[dict[str, int], float]: Cumulative import time in microseconds for
+            imported module, and the wall time of import + setup() in seconds.
+    """
+    proc = subprocess.run([sys.executable, '-X', 'importtime', '-c', STARTUP_SNIPPET],
+                          capture_output=True, text=True, check=True)
+
+    cumulative = {}
+    for line in proc.stderr.splitlines():
+        if not line.startswith('import time:'):
+            continue
+        fields = line[len('import time:'):].split('|')
+        if len(fields) != 3 or not fields[1].strip().isdigit():
+            continue
+        cumulative[fields[2].strip()] = int(fields[1])
+
+    setup_seconds = next(float(line.split('=', 1)[1]) for line in proc.stdout.splitlines()
+                         if line.startswith('SETUP_SECONDS='))
+    return cumulative, setup_seconds
+
+
+def run(max_import_ms: float, top: int) -> int:
+    cumulative, setup_seconds = profile_startup()
+
+    slowest = sorted(cumulative.items(), key=lambda item: -item[1])[:top]
+    print(f"{'module':<40}{'cumulative (ms)':>18}")
+    for name, micros in slowest:
+        print(f"{name:<40}{micros / 1000:>18.1f}")
+
+    total_ms = cumulative.get('run_client', 0) / 1000
+    print(f"\nimport run_client: {total_ms:.1f} ms; import + setup(): {setup_seconds * 1000:.1f} ms")
+
+    failed = False
+    loaded = [name for name in DEFERRED_MODULES if name in cumulative]
+    if loaded:
+        print(f"FAIL: imported at startup: {', '.join(loaded)}")
+        failed = True
+    if total_ms > max_import_ms:
+        print(f"FAIL: import time {total_ms:.1f} ms exceeds {max_import_ms:.1f} ms")
+        failed = True
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--max-import-ms', type=float, default=2000.0)
+    parser.add_argument('--top', type=int, default=10)
+    args = parser.parse_args()
+    sys.exit(run(args.max_import_ms, args.top))
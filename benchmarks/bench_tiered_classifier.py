@@ -0,0 +1,56 @@
+"""
+Benchmarks SpecialtyAnalyzer's tiered local classifier against always parsing.
+
+'always-parse' runs every description through the spaCy pipeline before
+matching, as the analyzer used to. 'tiered' is `classify_local`, which only
+parses descriptions the tokenizer-only keyword pass could not resolve. No
+cache is configured and Gemini is never called. Requires en_core_web_sm.
+
+Usage (from the project root):
+    python -m benchmarks.bench_tiered_classifier --repeat 20
+"""
+import argparse
+import csv
+import time
+
+from finder.analysis import SpecialtyAnalyzer
+from finder.keyword_index import KeywordIndex
+
+
+def always_parse(analyzer: SpecialtyAnalyzer, descriptions: list[str]) -> list[str | None]:
+    docs = analyzer.nlp.pipe(descriptions, disable=analyzer.unused_pipes)
+    results = []
+    for doc in docs:
+        heads = [token for chunk in doc.noun_chunks for token in KeywordIndex.tokenize(chunk.root.text)]
+        results.append(analyzer.KEYWORD_INDEX.best_match(KeywordIndex.tokenize(doc.text), heads))
+    return results
+
+
+def run(repeat: int, patient_file: str) -> None:
+    with open(patient_file, newline='', encoding='utf-8') as f:
+        descriptions = [row['Injury/Sickness'] for row in csv.DictReader(f)] * repeat
+
+    analyzer = SpecialtyAnalyzer(ai_client=None)
+    analyzer.nlp  # Load the model up front so neither path pays for it.
+
+    start = time.perf_counter()
+    always_parse(analyzer, descriptions)
+    parse_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    analyzer.classify_local(descriptions)
+    tiered_time = time.perf_counter() - start
+
+    print(f"Descriptions: {len(descriptions):,}")
+    print(f"{'path':<14}{'desc/s':>14}")
+    print(f"{'always-parse':<14}{len(descriptions) / parse_time:>14,.0f}")
+    print(f"{'tiered':<14}{len(descriptions) / tiered_time:>14,.0f}")
+    print("Tier hit rates:", {tier: f"{rate:.1%}" for tier, rate in analyzer.tier_hit_rates().items()})
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--repeat', type=int, default=20, help="How many times to repeat the 171 descriptions.")
+    parser.add_argument('--patients', default='./Data/patientData.csv')
+    args = parser.parse_args()
+    run(args.repeat, args.patients)
@@ -0,0 +1,101 @@
+"""
+Measures time-to-first-recommendation for critical patients queued behind a low-acuity backlog.
+
+A synthetic file of --rows patients is generated. Its 'Low' and 'Chronic' rows
+form the backlog. A batch of 'High' rows arrives --delay seconds after
+processing starts, and the time until its first recommendation is reported for:
+
+- fifo: chunks are classified in arrival order, as `stream_results` does;
+- triage: TriageScheduler, which takes the critical batch next.
+
+Gemini is replaced by a stub that takes --stub-latency seconds per call.
+
+Usage (from the project root):
+    python -m benchmarks.bench_triage --rows 200000 --critical 100
+"""
+import argparse
+import contextlib
+import io
+import os
+import tempfile
+import threading
+import time
+
+from benchmarks.generators import generate_patients
+from benchmarks.run_all import StubGeminiClient
+from finder.analysis import SpecialtyAnalyzer
+from finder.hospital_finder import HospitalFinder
+from finder.matching_engine import PatientDataHandler
+from finder.triage import TriageScheduler
+
+
+HOSPITAL_FILE = './Data/hospitalData.csv'
+
+
+def fifo(backlog, critical, delay: float, latency: float, chunksize: int) -> float:
+    analyzer = SpecialtyAnalyzer(StubGeminiClient(latency))
+    hospital_finder = HospitalFinder(HOSPITAL_FILE)
+    start = time.perf_counter()
+    arrived = None
+
+    for offset in range(0, len(backlog), chunksize):
+        chunk = backlog.iloc[offset:offset + chunksize]
+        for specialty in analyzer.get_specialties(chunk['Injury/Sickness']):
+            if 'Error' not in specialty:
+                hospital_finder.get_hospital_by_specialty(specialty)
+        if arrived is None and time.perf_counter() - start >= delay:
+            arrived = time.perf_counter()
+
+    arrived = arrived or time.perf_counter()
+    specialty = analyzer.get_specialties(critical['Injury/Sickness'].head(1))[0]
+    hospital_finder.get_emergency_hospitals(specialty)
+    return time.perf_counter() - arrived
+
+
+def triage(backlog, critical, delay: float, latency: float, chunksize: int) -> float:
+    scheduler = TriageScheduler(SpecialtyAnalyzer(StubGeminiClient(latency)), HospitalFinder(HOSPITAL_FILE))
+    for offset in range(0, len(backlog), chunksize):
+        scheduler.submit(backlog.iloc[offset:offset + chunksize])
+
+    served = {}
+
+    def consume():
+        for results in scheduler.run(wait=True):
+            if 'critical' not in served and (results['Severity'] == 'High').any():
+                served['critical'] = time.perf_counter()
+
+    consumer = threading.Thread(target=consume)
+    consumer.start()
+    time.sleep(delay)
+    arrived = time.perf_counter()
+    scheduler.submit(critical)
+    scheduler.close()
+    consumer.join()
+    return served['critical'] - arrived
+
+
+def run(rows: int, critical_rows: int, delay: float, latency: float, chunksize: int) -> None:
+    with tempfile.TemporaryDirectory() as tmp:
+        patient_file = generate_patients(os.path.join(tmp, 'patients.csv'), rows, unknown_fraction=0.01)
+        patients = PatientDataHandler(patient_file, HOSPITAL_FILE).simple_patient_df
+
+    backlog = patients[patients['Severity'].isin(['Low', 'Chronic'])]
+    critical = patients[patients['Severity'] == 'High'].head(critical_rows)
+    print(f"Backlog of {len(backlog):,} low-acuity patients, {len(critical)} critical arriving after {delay} s.")
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        results = {name: runner(backlog, critical, delay, latency, chunksize)
+                   for name, runner in (('fifo', fifo), ('triage', triage))}
+    for name, seconds in results.items():
+        print(f"{name:<8}time to first critical recommendation: {seconds * 1e3:,.1f} ms")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=200_000)
+    parser.add_argument('--critical', type=int, default=100)
+    parser.add_argument('--delay', type=float, default=0.5, help="Seconds after the start the critical batch arrives.")
+    parser.add_argument('--stub-latency', type=float, default=0.05, help="Seconds each stub Gemini call takes.")
+    parser.add_argument('--chunksize', type=int, default=10_000)
+    args = parser.parse_args()
+    run(args.rows, args.critical, args.delay, args.stub_latency, args.chunksize)
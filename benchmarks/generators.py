@@ -0,0 +1,247 @@
+"""
+Seedable generators of synthetic patient files and hospital networks.
+
+The same seed and size always produce byte-identical files, so benchmark
+results from different commits are measured on the same data.
+
+Usage (from the project root):
+    python -m benchmarks.generators --patients 1000000 --hospitals 2000 --out /tmp/finder-bench
+"""
+import argparse
+import os
+
+import numpy as np
+import pandas as pd
+
+from finder.analysis import SpecialtyAnalyzer
+
+
+BASE_PATIENT_FILE = './Data/patientData.csv'
+
+# Spellings seen in intake files besides the ones in BASE_PATIENT_FILE; 'n/a' maps to 'Unknown' on purpose.
+SEVERITY_VARIANTS = ('Critical', 'Severe', 'Serious', 'Life-threatening', 'Moderate', 'Low', 'Mild', 'Minor',
+                     'Chronic/Stable', 'CRITICAL', 'severe', 'Severe ', 'life threatening', 'n/a')
+
+# The bounding box synthetic hospitals and patient locations are drawn from.
+GTA_LATITUDE = (43.58, 43.86)
+GTA_LONGITUDE = (-79.64, -79.12)
+
+
+# Labeled conditions for measuring the local classifier, none of which appear in
+# BASE_PATIENT_FILE, so tables tuned on that file are not scored on their own examples.
+HELD_OUT_CONDITIONS = {
+    'Cardiology': ('Supraventricular tachycardia', 'Mitral valve prolapse with palpitations', 'Hypertensive crisis',
+                   'Myocarditis after a viral illness', 'Bradycardia with fainting spells', 'Atrial flutter',
+                   'Long QT syndrome', 'Wolff-Parkinson-White syndrome', 'Irregular heartbeat',
+                   'Endocarditis of the mitral valve'),
+    'Neurology': ('Bell palsy with facial droop', 'Peripheral neuropathy', 'Narcolepsy with cataplexy',
+                  'Restless legs syndrome', 'Concussion with confusion', 'Migraine with visual aura',
+                  'Facial numbness and slurred speech', 'Normal pressure hydrocephalus',
+                  'Sudden weakness on one side of the body', 'Guillain-Barre syndrome'),
+    'Oncology': ('Pancreatic adenocarcinoma', 'Neuroblastoma', 'Osteosarcoma of the femur', 'Mesothelioma',
+                 'Gastric adenocarcinoma', 'Renal cell carcinoma', 'Myelodysplastic syndrome',
+                 'Chronic myeloid leukemia', 'Malignant tumor of the bladder', 'Metastatic melanoma'),
+    'Orthopedics': ('Torn anterior cruciate ligament', 'Rotator cuff tear', 'Achilles tendon rupture',
+                    'Meniscus tear', 'Tennis elbow', 'Spondylolisthesis', 'Broken wrist after a fall',
+                    'Hallux valgus deformity', 'Carpal tunnel release', 'Clavicle fracture'),
+    'Gastroenterology': ('Gastroesophageal reflux disease', 'Peptic ulcer with bleeding', 'Celiac disease',
+                         "Barrett's esophagus", 'Diverticulitis', 'Achalasia', 'Gastroparesis',
+                         'Chronic diarrhea and abdominal cramps', 'Jaundice with dark urine',
+                         'Primary sclerosing cholangitis'),
+    'Pulmonology': ('Bronchiectasis', 'Pleural effusion', 'Spontaneous pneumothorax', 'Obstructive sleep apnea',
+                    'Chronic bronchitis', 'Emphysema', 'Shortness of breath on exertion',
+                    'Interstitial lung disease', 'Coughing up blood', 'Pneumoconiosis in a miner'),
+    'Nephrology/Urology': ('Nephrolithiasis', 'Urinary incontinence', 'Hematuria', 'Nephrotic syndrome',
+                           'Hydronephrosis', 'Erectile dysfunction', 'Urethral stricture', 'Pyelonephritis',
+                           'Varicocele', 'Enlarged prostate with urinary retention'),
+    'Psychiatry': ('Post-traumatic stress disorder', 'Bipolar mania', 'Suicidal ideation',
+                   'Attention deficit hyperactivity disorder', 'Alcohol withdrawal', 'Insomnia with low mood',
+                   'Hallucinations and paranoia', 'Binge eating disorder', 'Catatonia', 'Obsessive compulsive disorder'),
+    'Rheumatology/Immunology': ("Sjogren's syndrome", 'Polymyalgia rheumatica', 'Giant cell arteritis',
+                                'Anaphylaxis to peanuts', 'Dermatomyositis', "Behcet's disease",
+                                'Common variable immunodeficiency', 'Severe hay fever', 'Antiphospholipid syndrome',
+                                'Mixed connective tissue disease'),
+    'Endocrinology': ('Hypothyroidism', 'Hyperthyroidism', 'Diabetic ketoacidosis', 'Pheochromocytoma',
+                      'Acromegaly', 'Hyperparathyroidism', 'Prolactinoma', 'Recurrent hypoglycemia', 'Goiter',
+                      'Adrenal insufficiency'),
+    'Pediatrics': ('Croup in a toddler', 'Bronchiolitis in an infant', 'Hand, foot and mouth disease',
+                   'Slow weight gain in an infant', 'Colic in a newborn', 'Newborn jaundice', 'Chickenpox in a child',
+                   'Developmental delay in a toddler', 'Ear infection in a toddler', 'Diaper rash in an infant'),
+    'Trauma/Critical Care': ('Multiple injuries from a car crash', 'Gunshot wound to the abdomen',
+                             'Stab wound to the chest', 'Polytrauma after a fall from height', 'Crush injury',
+                             'Multi-organ failure', 'Near drowning', 'Pedestrian struck by a vehicle',
+                             'Severe burns over most of the body', 'Massive blood loss after an accident'),
+    'General Surgery': ('Acute appendicitis', 'Inguinal hernia', 'Gallstones with cholecystitis',
+                        'Perianal abscess', 'Pilonidal cyst', 'Umbilical hernia', 'Incarcerated hernia',
+                        'Lipoma removal', 'Skin abscess requiring drainage', 'Perforated appendix'),
+    'Vascular Surgery': ('Deep vein thrombosis', 'Varicose veins', 'Claudication when walking',
+                         'Acute limb ischemia', 'Thoracic outlet syndrome', 'Venous leg ulcer',
+                         'Arteriovenous fistula for dialysis', 'Blood clot in the leg',
+                         'Peripheral arterial disease', 'Popliteal aneurysm'),
+    'Plastic Surgery': ('Cleft lip and palate', 'Scald injury to the hand', 'Breast reconstruction after mastectomy',
+                        'Degloving injury of the hand', 'Facial scar revision', 'Pressure ulcer needing a flap',
+                        'Frostbite of the fingers', 'Keloid scar removal', 'Chemical burn to the face',
+                        'Reconstruction after facial injury'),
+    'Infectious Disease': ('Tuberculosis', 'Malaria after travel', 'Lyme disease', 'MRSA bacteremia', 'Syphilis',
+                           'Infectious mononucleosis', 'Measles', 'Typhoid fever', 'Dengue fever',
+                           'Rabies exposure'),
+    'Geriatrics': ('Frailty with recurrent falls', 'Age-related functional decline',
+                   'Polypharmacy in an elderly patient', 'Elderly patient unable to live independently',
+                   'Recurrent falls in an older adult', 'Sarcopenia', 'Frail elderly with weight loss',
+                   'Loss of independence in old age', 'Elderly patient on many medications',
+                   'Mobility decline in an older adult'),
+    "Women's Health/Gynecology": ('Heavy menstrual bleeding', 'Preeclampsia', 'Miscarriage',
+                                  'Pelvic inflammatory disease', 'Menopausal hot flashes', 'Cervical dysplasia',
+                                  'Hyperemesis gravidarum', 'Infertility', 'Dysmenorrhea', 'Ovarian cyst'),
+    'Ophthalmology': ('Cataract with blurred vision', 'Conjunctivitis', 'Corneal abrasion', 'Diabetic retinopathy',
+                      'Chalazion', 'Floaters and flashes of light', 'Sudden loss of vision', 'Keratoconus',
+                      'Stye on the eyelid', 'Retinal detachment'),
+    'Dermatology': ('Psoriasis plaques', 'Vitiligo', 'Alopecia', 'Seborrheic keratosis', 'Warts on the hands',
+                    'Hidradenitis suppurativa', 'Itchy scaly rash', 'Pemphigus vulgaris', 'Molluscum contagiosum',
+                    'Changing mole'),
+    'Pain Management': ('Chronic low back pain', 'Failed back surgery syndrome', 'Myofascial pain syndrome',
+                        'Chronic pain after a crush injury', 'Chronic neck pain', 'Persistent pain after surgery',
+                        'Chronic pelvic pain', 'Nerve pain in the legs', 'Chronic widespread pain',
+                        'Pain relief for chronic arthritis'),
+    'Rehabilitation': ('Mobility training after amputation', 'Reconditioning after a prolonged hospital stay',
+                       'Prosthetic fitting and training', 'Physiotherapy for weakness after illness',
+                       'Speech therapy after brain injury', 'Occupational therapy for daily living',
+                       'Gait training after stroke', 'Recovery of function after spinal injury',
+                       'Physical therapy after joint replacement', 'Cardiac rehabilitation program'),
+    'General/Minor Care': ('Sore throat', 'Seasonal flu symptoms', 'Mild fever and body aches',
+                           'Minor bruise on the arm', 'Earwax blockage', 'Insect bite', 'Splinter in a finger',
+                           'Prescription refill', 'Routine physical exam', 'Runny nose and sneezing'),
+    'Genetics': ('Down syndrome', 'Marfan syndrome', 'Fragile X syndrome', 'Turner syndrome',
+                 'Hereditary hemochromatosis', 'Neurofibromatosis type 1', 'Phenylketonuria', 'Tay-Sachs disease',
+                 'Ehlers-Danlos syndrome', 'Genetic counseling for a family gene mutation'),
+}
+
+# Ways intake staff phrase a condition; '{}' is the condition.
+INTAKE_TEMPLATES = ('{}', 'Suspected {}', '{}, first episode', 'Known {}, worsening', 'Referred for {}',
+                    '{} - follow up')
+
+
+def generate_patients(path: str, rows: int, seed: int = 0, unknown_fraction: float = 0.0,
+                      chunk_rows: int = 1_000_000) -> str:
+    """
+    Writes a patient file shaped like Data/patientData.csv.
+
+    Names, body parts and descriptions are drawn from the bundled file, so the
+    keyword hit rate matches real intake data. Rows are written in chunks, which
+    keeps memory flat up to 10^7 rows and beyond.
+
+    Args:
+        path (str): Where to write the CSV.
+        rows (int): The number of patients.
+        seed (int): Seeds every random choice.
+        unknown_fraction (float): Share of descriptions replaced by text no keyword matches,
+            to exercise the escalation path.
+        chunk_rows (int): The number of rows generated and written at a time.
+
+    Returns:
+        str: `path`.
+    """
+    base = pd.read_csv(BASE_PATIENT_FILE)
+    names = base['Name'].to_numpy()
+    body_parts = base['AffectedBodyPart'].to_numpy()
+    descriptions = base['Injury/Sickness'].to_numpy()
+    severities = np.array(sorted(set(base['Severity'].dropna())) + list(SEVERITY_VARIANTS), dtype=object)
+
+    rng = np.random.default_rng(seed)
+    for start in range(0, rows, chunk_rows):
+        size = min(chunk_rows, rows - start)
+        chunk_descriptions = descriptions[rng.integers(0, len(descriptions), size)]
+        if unknown_fraction > 0:
+            unknown = rng.random(size) < unknown_fraction
+            codes = rng.integers(0, 1_000_000, int(unknown.sum()))
+            chunk_descriptions = chunk_descriptions.copy()
+            chunk_descriptions[unknown] = [f"Unspecified presentation {code}" for code in codes]
+
+        chunk = pd.DataFrame({
+            'PatientID': [f"PID{i}" for i in range(start, start + size)],
+            'Name': names[rng.integers(0, len(names), size)],
+            'Age': rng.integers(0, 100, size),
+            'Severity': severities[rng.integers(0, len(severities), size)],
+            'AffectedBodyPart': body_parts[rng.integers(0, len(body_parts), size)],
+            'Injury/Sickness': chunk_descriptions,
+        })
+        chunk.to_csv(path, mode='w' if start == 0 else 'a', header=start == 0, index=False)
+
+    return path
+
+
+def generate_labeled_descriptions(rows: int, seed: int = 0) -> pd.DataFrame:
+    """
+    Draws labeled descriptions from HELD_OUT_CONDITIONS, phrased with INTAKE_TEMPLATES.
+
+    Args:
+        rows (int): The number of descriptions.
+        seed (int): Seeds every random choice.
+
+    Returns:
+        pd.DataFrame: 'Condition', 'Injury/Sickness' and the expected 'Specialty' of each row.
+    """
+    labeled = [(specialty, condition) for specialty, conditions in HELD_OUT_CONDITIONS.items()
+               for condition in conditions]
+    rng = np.random.default_rng(seed)
+    picks = rng.integers(0, len(labeled), rows)
+    templates = rng.integers(0, len(INTAKE_TEMPLATES), rows)
+    return pd.DataFrame({
+        'Condition': [labeled[i][1] for i in picks],
+        'Injury/Sickness': [INTAKE_TEMPLATES[t].format(labeled[i][1]) for i, t in zip(picks, templates)],
+        'Specialty': [labeled[i][0] for i in picks],
+    })
+
+
+def generate_hospital_network(path: str, hospitals: int, seed: int = 0, min_specialties: int = 1,
+                              max_specialties: int = 8) -> dict[str, list[str]]:
+    """
+    Writes a hospital file shaped like Data/hospitalData.csv and returns its specialty map.
+
+    Args:
+        path (str): Where to write the CSV.
+        hospitals (int): The number of hospitals.
+        seed (int): Seeds every random choice.
+        min_specialties (int): The fewest specialties a hospital offers.
+        max_specialties (int): The most specialties a hospital offers.
+
+    Returns:
+        dict[str, list[str]]: Hospital -> specialties, ready for `HospitalFinder(path, specialty_map)`.
+    """
+    specialties = SpecialtyAnalyzer.VALID_SPECIALTIES_LIST
+    rng = np.random.default_rng(seed)
+
+    specialty_map = {}
+    for i in range(hospitals):
+        count = int(rng.integers(min_specialties, min(max_specialties, len(specialties)) + 1))
+        chosen = rng.choice(len(specialties), count, replace=False)
+        specialty_map[f"Hospital {i:05d}"] = [specialties[j] for j in sorted(chosen)]
+
+    pd.DataFrame({
+        'name': list(specialty_map),
+        'emergency care': np.where(rng.random(hospitals) < 0.5, 'y', 'n'),
+        'specialized': [', '.join(s.lower() for s in offered) for offered in specialty_map.values()],
+        'busy': rng.integers(1, 11, hospitals),
+        # Spread over the Greater Toronto Area.
+        'lat': np.round(rng.uniform(*GTA_LATITUDE, hospitals), 4),
+        'lon': np.round(rng.uniform(*GTA_LONGITUDE, hospitals), 4),
+    }).to_csv(path, index=False)
+
+    return specialty_map
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--patients', type=int, default=100_000)
+    parser.add_argument('--hospitals', type=int, default=1_000)
+    parser.add_argument('--unknown-fraction', type=float, default=0.0)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--out', default='.')
+    args = parser.parse_args()
+
+    os.makedirs(args.out, exist_ok=True)
+    patient_file = generate_patients(os.path.join(args.out, 'patients.csv'), args.patients, args.seed,
+                                     args.unknown_fraction)
+    hospital_file = os.path.join(args.out, 'hospitals.csv')
+    generate_hospital_network(hospital_file, args.hospitals, args.seed)
+    print(f"Wrote {args.patients:,} patients to '{patient_file}' and {args.hospitals:,} hospitals to '{hospital_file}'.")
@@ -0,0 +1,96 @@
+"""
+Load-tests a running FinderService and reports throughput and latency percentiles.
+
+Start the service first, e.g.:
+    uvicorn finder.service:create_app --factory --port 8000
+
+then run (from the project root):
+    python -m benchmarks.load_test_service --url http://127.0.0.1:8000/recommend --concurrency 64 --duration 30
+
+Each virtual client keeps one HTTP/1.1 keep-alive connection open and sends
+requests back to back, with descriptions drawn from Data/patientData.csv.
+Only the standard library is used.
+"""
+import argparse
+import asyncio
+import csv
+import json
+import random
+import time
+from urllib.parse import urlsplit
+
+
+async def read_response(reader: asyncio.StreamReader) -> int:
+    status_line = await reader.readline()
+    if not status_line:
+        raise ConnectionError("Connection closed by server.")
+    status = int(status_line.split()[1])
+    length = 0
+    while True:
+        line = await reader.readline()
+        if line in (b'\r\n', b'\n', b''):
+            break
+        name, _, value = line.decode('latin-1').partition(':')
+        if name.strip().lower() == 'content-length':
+            length = int(value)
+    await reader.readexactly(length)
+    return status
+
+
+async def client(host: str, port: int, path: str, descriptions: list[str], deadline: float,
+                 latencies: list[float], statuses: dict[int, int], seed: int) -> None:
+    rng = random.Random(seed)
+    reader, writer = await asyncio.open_connection(host, port)
+    try:
+        while time.perf_counter() < deadline:
+            body = json.dumps({'description': rng.choice(descriptions)}).encode('utf-8')
+            request = (f"POST {path} HTTP/1.1\r\nHost: {host}\r\nContent-Type: application/json\r\n"
+                       f"Content-Length: {len(body)}\r\n\r\n").encode('latin-1') + body
+            start = time.perf_counter()
+            writer.write(request)
+            await writer.drain()
+            status = await read_response(reader)
+            latencies.append(time.perf_counter() - start)
+            statuses[status] = statuses.get(status, 0) + 1
+    finally:
+        writer.close()
+
+
+def percentile(sorted_values: list[float], fraction: float) -> float:
+    if not sorted_values:
+        return float('nan')
+    index = min(len(sorted_values) - 1, int(round(fraction * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+async def run(url: str, concurrency: int, duration: float, patient_file: str, seed: int) -> None:
+    with open(patient_file, newline='', encoding='utf-8') as f:
+        descriptions = [row['Injury/Sickness'] for row in csv.DictReader(f)]
+
+    parts = urlsplit(url)
+    host, port, path = parts.hostname, parts.port or 80, parts.path or '/'
+
+    latencies, statuses = [], {}
+    start = time.perf_counter()
+    deadline = start + duration
+    await asyncio.gather(*(client(host, port, path, descriptions, deadline, latencies, statuses, seed + i)
+                           for i in range(concurrency)))
+    elapsed = time.perf_counter() - start
+
+    latencies.sort()
+    print(f"Requests:   {len(latencies):,} in {elapsed:.1f} s ({len(latencies) / elapsed:,.1f} req/s)")
+    print(f"Statuses:   {dict(sorted(statuses.items()))}")
+    for label, fraction in (('p50', 0.50), ('p95', 0.95), ('p99', 0.99)):
+        print(f"{label}:        {percentile(latencies, fraction) * 1000:.1f} ms")
+    print(f"max:        {latencies[-1] * 1000 if latencies else float('nan'):.1f} ms")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--url', default='http://127.0.0.1:8000/recommend')
+    parser.add_argument('--concurrency', type=int, default=64)
+    parser.add_argument('--duration', type=float, default=30.0)
+    parser.add_argument('--patients', default='./Data/patientData.csv')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+    asyncio.run(run(args.url, args.concurrency, args.duration, args.patients, args.seed))
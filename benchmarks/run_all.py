@@ -0,0 +1,289 @@
+"""
+Runs the benchmark suite on seeded synthetic data and writes the results as JSON.
+
+Micro-benchmarks cover keyword matching, the spaCy parse (skipped when
+en_core_web_sm is not installed), the semantic index, get_hospital_by_specialty,
+nearest-hospital queries, PatientDataHandler's severity standardization and
+get_patient_data_basic, both on a handler that has to partition the table
+('cold') and served from the views of earlier queries ('cached'). An
+end-to-end run of run_client.get_results_csv and a run of the same rows through
+ParallelClassifier use a stub GeminiClient, so no network calls are made.
+
+Pass a previous results file with --compare to print the change per benchmark.
+
+Usage (from the project root):
+    python -m benchmarks.run_all --patients 1000000 --hospitals 2000 --output bench.json
+    python -m benchmarks.run_all --compare bench.json --output bench-new.json
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import re
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+import run_client
+from benchmarks.generators import GTA_LATITUDE, GTA_LONGITUDE, generate_hospital_network, generate_patients
+from finder.analysis import SpecialtyAnalyzer
+from finder.hospital_finder import HospitalFinder
+from finder.keyword_index import KeywordIndex
+from finder.matching_engine import PatientDataHandler
+from finder.parallel import ParallelClassifier
+
+
+class StubGeminiClient:
+    """
+    Stands in for GeminiClient: answers every prompt with a valid specialty after `latency` seconds.
+    """
+
+    BATCH_ENTRY = re.compile(r'^\s*\{"index": (\d+),', re.MULTILINE)
+
+    def __init__(self, latency: float = 0.0, specialty: str = 'General/Minor Care'):
+        self.latency = latency
+        self.specialty = specialty
+        self.calls = 0
+
+    def generate_text(self, prompt: str, model_name: str = "gemini-2.5-flash") -> str:
+        self.calls += 1
+        if self.latency:
+            time.sleep(self.latency)
+        indexes = self.BATCH_ENTRY.findall(prompt)
+        if indexes:
+            return json.dumps([{'index': int(i), 'specialty': self.specialty} for i in indexes])
+        return self.specialty
+
+
+def measure(fn, repeat: int, setup=None, items: int = 1) -> dict:
+    """
+    Times `fn` `repeat` times. `setup` runs untimed before each call and its result is passed to `fn`.
+
+    Returns:
+        dict: best and mean seconds per call, and best microseconds per item.
+    """
+    timings = []
+    for _ in range(repeat):
+        arg = setup() if setup else None
+        start = time.perf_counter()
+        fn(arg) if setup else fn()
+        timings.append(time.perf_counter() - start)
+    best = min(timings)
+    return {'repeat': repeat, 'best_s': best, 'mean_s': sum(timings) / len(timings),
+            'items': items, 'best_us_per_item': best / items * 1e6}
+
+
+def bench_keyword_match(descriptions: list[str], repeat: int) -> dict:
+    index = SpecialtyAnalyzer.KEYWORD_INDEX
+    return measure(lambda: [index.best_match(KeywordIndex.tokenize(d)) for d in descriptions],
+                   repeat, items=len(descriptions))
+
+
+def bench_spacy_parse(descriptions: list[str], repeat: int) -> dict:
+    analyzer = SpecialtyAnalyzer(ai_client=None)
+    analyzer.nlp  # Loading the model is not part of the measurement.
+    # Parsing is slow, so one batch of up to 10,000 descriptions is enough for a stable figure.
+    sample = descriptions[:10_000]
+    return measure(lambda: list(analyzer.nlp.pipe(sample, disable=analyzer.unused_pipes)),
+                   repeat, items=len(sample))
+
+
+def bench_semantic_match(descriptions: list[str], repeat: int) -> dict:
+    index = SpecialtyAnalyzer(ai_client=None).semantic_index
+    sample = descriptions[:10_000]
+    return measure(lambda: index.best_matches(sample), repeat, items=len(sample))
+
+
+def bench_hospital_lookup(hospital_finder: HospitalFinder, repeat: int, lookups: int = 100_000) -> dict:
+    specialties = SpecialtyAnalyzer.VALID_SPECIALTIES_LIST
+    queries = [specialties[i % len(specialties)] for i in range(lookups)]
+    lookup = hospital_finder.get_hospital_by_specialty
+    return measure(lambda: [lookup(s) for s in queries], repeat, items=lookups)
+
+
+def bench_nearest_hospitals(hospital_finder: HospitalFinder, repeat: int, patients: int = 100_000,
+                            seed: int = 0) -> dict:
+    specialties = SpecialtyAnalyzer.VALID_SPECIALTIES_LIST
+    rng = np.random.default_rng(seed)
+    queries = [specialties[i % len(specialties)] for i in range(patients)]
+    lats = rng.uniform(*GTA_LATITUDE, patients)
+    lons = rng.uniform(*GTA_LONGITUDE, patients)
+    # Building the per-specialty spatial indexes is not part of the measurement.
+    hospital_finder.nearest_by_specialty(specialties, lats[:len(specialties)], lons[:len(specialties)])
+    return measure(lambda: hospital_finder.nearest_by_specialty(queries, lats, lons, k=3), repeat, items=patients)
+
+
+def bench_standardize(patient_file: str, repeat: int) -> dict:
+    raw_df = pd.read_csv(patient_file, usecols=list(PatientDataHandler.PATIENT_DTYPES),
+                         dtype=PatientDataHandler.PATIENT_DTYPES)
+    # standardize_patients edits its argument in place, so every run gets a fresh copy.
+    return measure(PatientDataHandler.standardize_patients, repeat, setup=raw_df.copy, items=len(raw_df))
+
+
+def bench_patient_data_basic(data_handler: PatientDataHandler, repeat: int) -> dict:
+    simple_df = data_handler.simple_patient_df  # Parsing the file is not part of the measurement.
+    rows = len(simple_df)
+
+    def cold_handler() -> PatientDataHandler:
+        # A new handler over the parsed table has no partitions or views yet, so every timed query builds them.
+        return PatientDataHandler(data_handler.patient_file, data_handler.hospital_file, patients=simple_df)
+
+    results = {'cold': {}, 'cached': {}}
+    for option in ('all', 'low', 'medium', 'high', 'chronic'):
+        results['cold'][option] = measure(lambda handler: handler.get_patient_data_basic(option), repeat,
+                                          setup=cold_handler, items=rows)
+        # Repeat queries return the view built by the first one.
+        data_handler.get_patient_data_basic(option)
+        results['cached'][option] = measure(lambda: data_handler.get_patient_data_basic(option), repeat, items=rows)
+    return results
+
+
+def bench_end_to_end(patient_file: str, hospital_file: str, specialty_map: dict, limit: int,
+                     latency: float) -> dict:
+    ai_client = StubGeminiClient(latency)
+    run_client.ai_client = ai_client
+    run_client.analyzer = SpecialtyAnalyzer(ai_client)
+    run_client.hospital_finder = HospitalFinder(hospital_file, specialty_map)
+    run_client.data_handler = PatientDataHandler(patient_file, hospital_file)
+
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        run_client.get_results_csv(limit=limit)
+    elapsed = time.perf_counter() - start
+
+    return {'rows': limit, 'seconds': elapsed, 'rows_per_s': limit / elapsed, 'gemini_calls': ai_client.calls,
+            'tier_hit_rates': run_client.analyzer.tier_hit_rates()}
+
+
+def bench_parallel(patient_file: str, limit: int, latency: float, workers: int | None,
+                   chunksize: int = 10_000) -> dict:
+    ai_client = StubGeminiClient(latency)
+    descriptions = pd.read_csv(patient_file, usecols=['Injury/Sickness'], nrows=limit)['Injury/Sickness'].tolist()
+
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()), ParallelClassifier(SpecialtyAnalyzer(ai_client), workers) as classifier:
+        classifier.get_specialties(descriptions, chunksize)
+    elapsed = time.perf_counter() - start
+
+    return {'rows': limit, 'workers': classifier.workers, 'seconds': elapsed, 'rows_per_s': limit / elapsed,
+            'gemini_calls': ai_client.calls}
+
+
+def git_commit() -> str | None:
+    try:
+        return subprocess.run(['git', 'rev-parse', 'HEAD'], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def flatten(results: dict, prefix: str = '') -> dict[str, float]:
+    """Maps 'benchmark.option' names to their headline seconds for comparison."""
+    flat = {}
+    for name, value in results.items():
+        if not isinstance(value, dict):
+            continue
+        if 'best_s' in value:
+            flat[prefix + name] = value['best_s']
+        elif 'seconds' in value:
+            flat[prefix + name] = value['seconds']
+        else:
+            flat.update(flatten(value, f"{prefix}{name}."))
+    return flat
+
+
+def compare(previous_file: str, results: dict) -> None:
+    with open(previous_file, encoding='utf-8') as f:
+        previous = flatten(json.load(f)['results'])
+    current = flatten(results)
+
+    print(f"\n{'benchmark':<32}{'before (s)':>14}{'after (s)':>14}{'change':>10}")
+    for name, seconds in current.items():
+        before = previous.get(name)
+        if before:
+            print(f"{name:<32}{before:>14.6f}{seconds:>14.6f}{(seconds / before - 1):>+10.1%}")
+        else:
+            print(f"{name:<32}{'-':>14}{seconds:>14.6f}{'new':>10}")
+
+
+def run(args) -> dict:
+    workdir = args.data_dir or tempfile.mkdtemp(prefix='finder-bench-')
+    os.makedirs(workdir, exist_ok=True)
+    patient_file = os.path.join(workdir, f"patients-{args.patients}-{args.seed}.csv")
+    hospital_file = os.path.join(workdir, f"hospitals-{args.hospitals}-{args.seed}.csv")
+
+    print(f"Generating data in '{workdir}'...")
+    if not os.path.exists(patient_file):
+        generate_patients(patient_file, args.patients, args.seed, args.unknown_fraction)
+    specialty_map = generate_hospital_network(hospital_file, args.hospitals, args.seed)
+
+    data_handler = PatientDataHandler(patient_file, hospital_file)
+    hospital_finder = HospitalFinder(hospital_file, specialty_map)
+    descriptions = data_handler.simple_patient_df['Injury/Sickness'].fillna('').tolist()
+
+    results = {}
+    print("keyword_match..."); results['keyword_match'] = bench_keyword_match(descriptions, args.repeat)
+    print("spacy_parse...")
+    try:
+        results['spacy_parse'] = bench_spacy_parse(descriptions, args.repeat)
+    except (ImportError, OSError) as e:
+        results['spacy_parse'] = {'skipped': str(e)}
+    print("semantic_match..."); results['semantic_match'] = bench_semantic_match(descriptions, args.repeat)
+    print("hospital_lookup..."); results['hospital_lookup'] = bench_hospital_lookup(hospital_finder, args.repeat)
+    print("nearest_hospitals..."); results['nearest_hospitals'] = bench_nearest_hospitals(hospital_finder, args.repeat)
+    print("standardize_df..."); results['standardize_df'] = bench_standardize(patient_file, args.repeat)
+    print("patient_data_basic..."); results['patient_data_basic'] = bench_patient_data_basic(data_handler, args.repeat)
+    print("end_to_end...")
+    try:
+        results['end_to_end'] = bench_end_to_end(patient_file, hospital_file, specialty_map,
+                                                 min(args.e2e_rows, args.patients), args.stub_latency)
+    except (ImportError, OSError) as e:
+        results['end_to_end'] = {'skipped': str(e)}
+
+    print("parallel...")
+    try:
+        results['parallel'] = bench_parallel(patient_file, min(args.e2e_rows, args.patients), args.stub_latency,
+                                             args.workers)
+    except (ImportError, OSError) as e:
+        results['parallel'] = {'skipped': str(e)}
+
+    return {
+        'commit': git_commit(),
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+        'python': sys.version.split()[0],
+        'pandas': pd.__version__,
+        'platform': platform.platform(),
+        'params': {'patients': args.patients, 'hospitals': args.hospitals, 'seed': args.seed,
+                   'unknown_fraction': args.unknown_fraction, 'repeat': args.repeat,
+                   'e2e_rows': args.e2e_rows, 'stub_latency': args.stub_latency, 'workers': args.workers},
+        'results': results,
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--patients', type=int, default=100_000)
+    parser.add_argument('--hospitals', type=int, default=1_000)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--unknown-fraction', type=float, default=0.01)
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--e2e-rows', type=int, default=10_000, help="Patients classified by the end-to-end run.")
+    parser.add_argument('--stub-latency', type=float, default=0.0, help="Seconds each stub Gemini call takes.")
+    parser.add_argument('--workers', type=int, default=None, help="Processes for the parallel run; defaults to the CPU count.")
+    parser.add_argument('--data-dir', default=None, help="Reuse generated files here instead of a temp dir.")
+    parser.add_argument('--output', default='benchmark-results.json')
+    parser.add_argument('--compare', default=None, help="A previous results file to compare against.")
+    args = parser.parse_args()
+
+    report = run(args)
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2)
+    print(f"Wrote results to '{args.output}'.")
+
+    if args.compare:
+        compare(args.compare, report['results'])
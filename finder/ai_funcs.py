@@ -1,26 +1,70 @@
+import asyncio
 import os
-import google.generativeai as genai
-from dotenv import load_dotenv
+import random
+
+from finder.metrics import METRICS
+from finder.rate_limit import TokenBucket
+
+
+# HTTP status codes worth retrying: rate limiting and transient server errors.
+RETRYABLE_STATUS_CODES = {429, 500, 502, 503, 504}
+
+
+def configure_gemini():
+    """
+    Loads GEMINI_KEY from the .env file and configures the Gemini SDK with it.
+    
+    The SDK and python-dotenv are imported here rather than at module load, so
+    programs that never call Gemini don't pay for importing them.
+    
+    Returns:
+        module: The configured `google.generativeai` module.
+    """
+    try:
+        import google.generativeai as genai
+        from dotenv import load_dotenv
+        
+        load_dotenv('.env')
+        api_key = os.getenv("GEMINI_KEY")
+        if not api_key:
+            raise ValueError("GEMINI_KEY not found. Please create a .env file and add your key.")
+        genai.configure(api_key=api_key)
+        print("Gemini API configured successfully.")
+        return genai
+    except Exception as e:
+        print(f"Error configuring Gemini API: {e}")
+        raise
+
+
+def is_retryable(error: Exception) -> bool:
+    """
+    Returns True if a failed request is worth retrying.
+
+    Google API errors carry their HTTP status in `code`; timeouts and dropped
+    connections are always retried.
+    """
+    if isinstance(error, (asyncio.TimeoutError, TimeoutError, ConnectionError)):
+        return True
+    return getattr(error, 'code', None) in RETRYABLE_STATUS_CODES
 
 
 class GeminiClient:
     """
     A client for interacting with the Gemini AI API to generate text based on prompts.
     """
-    
-    def __init__(self):
-        try:
-            load_dotenv('.env')
-            api_key = os.getenv("GEMINI_KEY")
-            if not api_key:
-                raise ValueError("GEMINI_KEY not found. Please create a .env file and add your key.")
-            genai.configure(api_key=api_key)
-            print("Gemini API configured successfully.")
-        except Exception as e:
-            print(f"Error configuring Gemini API: {e}")
-            raise
-            
-        
+
+    def __init__(self, requests_per_second: float = 2.0):
+        """
+        Initializes the client. The Gemini SDK is imported and configured on the first request.
+
+        Args:
+            requests_per_second (float): The sustained request rate allowed by the client's token bucket.
+        """
+        self.rate_limiter = TokenBucket(requests_per_second)
+        self.__genai = None
+        self.__models = {}
+
+
     def generate_text(self, prompt: str, model_name: str = "gemini-2.5-flash") -> str | None:
         """
         Generates text using the specified Gemini model.
@@ -33,11 +77,112 @@ class GeminiClient:
             str | None: The generated text, or None if an error occurred.
         """
         try:
-            model = genai.GenerativeModel(model_name)
-            response = model.generate_content(prompt)
+            model = self.__models.get(model_name)
+            if model is None:
+                if self.__genai is None:
+                    self.__genai = configure_gemini()
+                model = self.__models[model_name] = self.__genai.GenerativeModel(model_name)
+
+            with METRICS.span('gemini_call', model=model_name):
+                METRICS.observe('rate_limit_wait', self.rate_limiter.acquire())
+                response = model.generate_content(prompt)
 
             return response.text
         except Exception as e:
+            METRICS.increment('errors', source='gemini_client')
             print(f"An error occurred while generating text: {e}")
             return None
-        
\ No newline at end of file
+
+
+class AsyncGeminiClient:
+    """
+    An asyncio client for the Gemini AI API built for high-volume escalations.
+
+    Model handles are created once per model name and reused. Requests are
+    limited by a max-in-flight semaphore and a token-bucket rate limiter, and
+    retryable failures are retried with exponential backoff and full jitter.
+    """
+
+    def __init__(self, max_in_flight: int = 8, requests_per_second: float = 5.0, burst: float | None = None,
+                 max_retries: int = 4, base_delay: float = 0.5, max_delay: float = 20.0, model_factory=None):
+        """
+        Initializes the client.
+
+        Args:
+            max_in_flight (int): The maximum number of requests awaiting a response at once.
+            requests_per_second (float): The sustained request rate.
+            burst (float | None): The largest burst of requests allowed; defaults to one second's worth.
+            max_retries (int): How many times a retryable failure is retried.
+            base_delay (float): The backoff ceiling, in seconds, for the first retry. It doubles per attempt.
+            max_delay (float): The largest backoff ceiling, in seconds.
+            model_factory (Callable[[str], Any] | None): Builds a model handle from a model name.
+                The handle must provide `async generate_content_async(prompt)`. Defaults to
+                `genai.GenerativeModel`, configured on first use; pass a stub to run offline.
+        """
+        self.model_factory = model_factory
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.rate_limiter = TokenBucket(requests_per_second, burst)
+        self.__semaphore = asyncio.Semaphore(max_in_flight)
+        self.__models = {}
+
+    def get_model(self, model_name: str):
+        """
+        Returns the cached model handle for a model name, creating it on first use.
+        """
+        model = self.__models.get(model_name)
+        if model is None:
+            if self.model_factory is None:
+                self.model_factory = configure_gemini().GenerativeModel
+            model = self.__models[model_name] = self.model_factory(model_name)
+        return model
+
+    async def generate_text(self, prompt: str, model_name: str = "gemini-2.5-flash") -> str | None:
+        """
+        Generates text using the specified Gemini model.
+
+        Args:
+            prompt (str): The text prompt to send to the model.
+            model_name (str): The name of the model to use.
+
+        Returns:
+            str | None: The generated text, or None if the request failed for good.
+        """
+        # The span includes semaphore, rate-limit and backoff waits; rate_limit_wait isolates the limiter's share.
+        with METRICS.span('gemini_call', model=model_name):
+            async with self.__semaphore:
+                for attempt in range(self.max_retries + 1):
+                    METRICS.observe('rate_limit_wait', await self.rate_limiter.acquire_async())
+                    try:
+                        # Inside the try, so a missing key or SDK fails the request like the sync client does.
+                        model = self.get_model(model_name)
+                        response = await model.generate_content_async(prompt)
+                        return response.text
+                    except Exception as e:
+                        if attempt < self.max_retries and is_retryable(e):
+                            METRICS.increment('gemini_retries')
+                            await asyncio.sleep(self.backoff_delay(attempt))
+                            continue
+                        METRICS.increment('errors', source='gemini_client')
+                        print(f"An error occurred while generating text: {e}")
+                        return None
+
+    async def generate_many(self, prompts: list[str], model_name: str = "gemini-2.5-flash") -> list[str | None]:
+        """
+        Generates text for many prompts concurrently.
+
+        Args:
+            prompts (list[str]): The prompts to send.
+            model_name (str): The name of the model to use.
+
+        Returns:
+            list[str | None]: The generated texts, in the same order as the prompts.
+        """
+        return await asyncio.gather(*(self.generate_text(prompt, model_name) for prompt in prompts))
+
+    def backoff_delay(self, attempt: int) -> float:
+        """
+        Returns a random delay in [0, min(max_delay, base_delay * 2 ** attempt)].
+        """
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
@@ -1,5 +1,43 @@
-import spacy
-import time     
+import asyncio
+import hashlib
+import json
+from typing import Iterable, NamedTuple
+
+from finder.classification_cache import ClassificationCache
+from finder.keyword_index import KeywordIndex
+from finder.metrics import METRICS
+from finder.normalization import LabelNormalizer
+from finder.semantic_index import SemanticIndex
+
+
+class SpecialtyScore(NamedTuple):
+    """
+    One ranked specialty for a description.
+    
+    `score` is the specialty's share of the evidence found for the description,
+    so the scores of one result add up to 1. `source` names the tier that
+    produced the ranking: 'keyword', 'cache', 'spacy', 'semantic' or 'gemini'.
+    """
+    specialty: str
+    score: float
+    source: str
+
+
+class SpecialtyRules(NamedTuple):
+    """
+    One version of the classification tables, with the indexes built from them.
+    
+    An analyzer holds its rules as a single snapshot and replaces the whole
+    snapshot in one assignment, so a classification that has already started
+    keeps the tables it started with while a reload is in progress.
+    """
+    version: str
+    specialties: tuple[str, ...]
+    keywords: dict[str, list[str]]
+    descriptions: dict[str, str]
+    synonyms: dict[str, str]
+    keyword_index: KeywordIndex
+    normalizer: LabelNormalizer
 
 
 class SpecialtyAnalyzer:
@@ -11,6 +49,10 @@ class SpecialtyAnalyzer:
     keyword map. If this local method fails to produce a confident result,
     it escalates the task to a more powerful Generative AI model (Gemini)
     for advanced analysis.
+    
+    The tables below are the built-in defaults. `run_client` and the service load
+    Data/specialties.json over them at startup (`ReferenceWatcher.load`), so edit
+    that file, or re-export it with `reference_data.export_reference_data`.
     """
     
     VALID_SPECIALTIES_LIST = [
@@ -115,6 +157,63 @@ class SpecialtyAnalyzer:
         'Genetics': ['genetic', 'von hippel-lindau', 'huntington'],
         'General/Minor Care': ['headache', 'cold', 'constipation', 'gout', 'strain', 'laceration']
     }
+
+    # Built once at class load; maps tokens and phrases straight to specialties.
+    KEYWORD_INDEX = KeywordIndex(SPACY_SPECIALTY_MAP)
+    
+    # Plain-language scope of each specialty. Together with SPACY_SPECIALTY_MAP it forms
+    # the vocabulary of the offline semantic tier, which catches near misses of the keywords.
+    # Kept to generic organ systems and disease classes, not conditions from any one intake file;
+    # `python -m benchmarks.bench_semantic_tier` measures them on held-out descriptions.
+    SPECIALTY_DESCRIPTIONS = {
+        'Cardiology': "heart and circulation: heart rhythm problems, palpitations, heart muscle disease, "
+                      "heart valve disease, coronary disease, cardiac chest pain, high blood pressure, "
+                      "congenital heart defects",
+        'Neurology': "brain, spinal cord and nerves: stroke, seizures, movement disorders, memory and "
+                     "cognitive disorders, nerve damage, numbness, weakness, dizziness, neurodegenerative disease",
+        'Oncology': "cancer and tumors: malignant tumors of any organ, blood cancers, metastatic disease, "
+                    "chemotherapy, radiation therapy",
+        'Orthopedics': "bones, joints, tendons and ligaments: broken bones, joint injuries, tendon and "
+                       "ligament tears, spine disorders, bone deformities, musculoskeletal injuries",
+        'Gastroenterology': "digestive system: esophagus, stomach, intestines, colon, liver and pancreas "
+                            "disorders, abdominal pain, digestive bleeding, reflux, swallowing problems",
+        'Pulmonology': "lungs and airways: breathing difficulty, shortness of breath, chronic cough, airway "
+                       "disease, lung disease, lung infections, low oxygen, sleep-related breathing disorders",
+        'Nephrology/Urology': "kidneys and urinary tract: kidney disease, kidney failure, dialysis, kidney stones, "
+                              "bladder and urinary problems, prostate disorders, male reproductive organs",
+        'Psychiatry': "mental health: mood disorders, depression, anxiety, psychosis, personality disorders, "
+                      "eating disorders, substance use, addiction, suicidal thoughts, behavioral problems",
+        'Rheumatology/Immunology': "autoimmune and inflammatory disease: inflammatory joint disease, connective "
+                                   "tissue disease, vasculitis, allergies, severe allergic reactions, immune deficiency",
+        'Endocrinology': "hormones and metabolism: blood sugar disorders, thyroid disease, adrenal glands, "
+                         "pituitary gland, hormone imbalance, metabolic disorders",
+        'Pediatrics': "infants, children and adolescents: newborn problems, childhood illness, growth and "
+                      "development, congenital conditions in children",
+        'Trauma/Critical Care': "life-threatening emergencies: severe injuries from accidents or violence, "
+                                "multiple injuries, shock, organ failure, intensive care, life support",
+        'General Surgery': "common operations: abdominal surgery, appendix, hernia, gallbladder, "
+                           "abscess drainage, soft tissue surgery",
+        'Vascular Surgery': "blood vessels outside the heart: arterial blockages, aortic and limb aneurysms, "
+                            "blood clots in the veins, varicose veins, poor limb circulation",
+        'Plastic Surgery': "reconstruction and wound repair: burns, skin grafts, complex wounds, scar revision, "
+                           "facial and hand reconstruction",
+        'Infectious Disease': "infections: bacterial, viral, fungal and parasitic infections, fever after travel, "
+                              "sexually transmitted infections, tropical disease, resistant organisms",
+        'Geriatrics': "older adults: frailty, falls, multiple medications, loss of independence, age-related decline",
+        'Women\'s Health/Gynecology': "female reproductive system: pregnancy, childbirth, menstrual problems, "
+                                      "uterus, ovaries, cervix, fertility, menopause",
+        'Ophthalmology': "eyes and vision: vision loss, blurred vision, eye pain, eye infections and "
+                         "inflammation, eye injuries, eyelid problems",
+        'Dermatology': "skin, hair and nails: rashes, itching, skin growths, moles, hair loss, nail disorders, "
+                       "blistering skin disease",
+        'Pain Management': "long-term pain: chronic pain syndromes, nerve pain, back and neck pain, pain relief",
+        'Rehabilitation': "recovery of function: physical therapy, occupational therapy, speech therapy, "
+                          "mobility training, recovery after injury, surgery or stroke",
+        'General/Minor Care': "low-acuity problems: colds, flu, sore throat, minor cuts and bruises, minor sprains, "
+                              "mild fever, routine check-ups, prescription refills",
+        'Genetics': "inherited conditions: chromosomal disorders, gene mutations, hereditary syndromes, "
+                    "genetic testing and counseling",
+    }
     
     GEMINI_JSON_PROMPT = """
         You are an expert medical data processor. Your task is to classify the
@@ -132,64 +231,734 @@ class SpecialtyAnalyzer:
         '{injury_description}'
         """
     
+    GEMINI_BATCH_PROMPT = """
+        You are an expert medical data processor. Your task is to classify each of
+        the following patient injury descriptions into one of the approved medical specialties.
+
+        **Instructions:**
+        1. Analyze every entry in 'Patient Injury Descriptions'.
+        2. For each entry, choose the SINGLE best-fitting specialty from the 'Approved Specialties' list.
+        3. Your response MUST be ONLY a JSON array with one object per entry, in the form
+           {{"index": <the entry's index>, "specialty": "<the chosen specialty>"}}, and nothing else.
+
+        **Approved Specialties:**
+        {valid_specs}
+
+        **Patient Injury Descriptions:**
+        {injury_descriptions}
+        """
+    
+    VALID_SPECIALTIES_SET = frozenset(VALID_SPECIALTIES_LIST)
+    
+    # Other names Gemini and callers use for the approved specialties.
+    SPECIALTY_SYNONYMS = {
+        'Cardiac': 'Cardiology', 'Cardiovascular': 'Cardiology',
+        'Neurosurgery': 'Neurology', 'Neuro': 'Neurology',
+        'Cancer': 'Oncology', 'Hematology/Oncology': 'Oncology',
+        'Hematology': 'Oncology', 'Haematology': 'Oncology',
+        'Orthopaedics': 'Orthopedics', 'Orthopedic Surgery': 'Orthopedics',
+        'GI': 'Gastroenterology', 'Hepatology': 'Gastroenterology',
+        'Respirology': 'Pulmonology', 'Respiratory': 'Pulmonology',
+        'Nephrology': 'Nephrology/Urology', 'Urology': 'Nephrology/Urology',
+        'Mental Health': 'Psychiatry',
+        'Rheumatology': 'Rheumatology/Immunology', 'Immunology': 'Rheumatology/Immunology',
+        'Allergy': 'Rheumatology/Immunology', 'Allergy and Immunology': 'Rheumatology/Immunology',
+        'Paediatrics': 'Pediatrics', 'Neonatology': 'Pediatrics',
+        'Trauma': 'Trauma/Critical Care', 'Critical Care': 'Trauma/Critical Care',
+        'Emergency Medicine': 'Trauma/Critical Care',
+        'Infectious Diseases': 'Infectious Disease',
+        'Gynecology': 'Women\'s Health/Gynecology', 'Obstetrics': 'Women\'s Health/Gynecology',
+        'OB/GYN': 'Women\'s Health/Gynecology',
+        'Physical Medicine and Rehabilitation': 'Rehabilitation',
+        'General Care': 'General/Minor Care', 'Minor Care': 'General/Minor Care',
+        'Primary Care': 'General/Minor Care',
+        'Medical Genetics': 'Genetics',
+    }
+    
+    SPECIALTY_NORMALIZER = LabelNormalizer(VALID_SPECIALTIES_LIST, SPECIALTY_SYNONYMS)
+    
+    # The tables of SpecialtyRules a reload compares.
+    RULE_TABLES = ('specialties', 'keywords', 'descriptions', 'synonyms')
+    
+    # Components needed to produce doc.noun_chunks; everything else is disabled when parsing.
+    NOUN_CHUNK_PIPES = ('tok2vec', 'tagger', 'attribute_ruler', 'parser')
+    
+    # The semantic tier accepts a specialty whose similarity reaches the threshold
+    # and beats the runner-up by the margin. Calibrated with `benchmarks.bench_semantic_tier`
+    # for 95% accuracy on held-out conditions, where it resolves about 13% of keyword misses.
+    SEMANTIC_THRESHOLD = 0.46
+    SEMANTIC_MARGIN = 0.05
+    
 
-    def __init__(self, ai_client):
-        self.nlp = spacy.load("en_core_web_sm")
+    def __init__(self, ai_client, cache: ClassificationCache | None = None,
+                 semantic_threshold: float | None = SEMANTIC_THRESHOLD, rules: SpecialtyRules | None = None):
+        """
+        Initializes the analyzer. The spaCy model and the semantic index are built on first use, not here.
+        
+        Args:
+            ai_client (GeminiClient): The client used to escalate unresolved descriptions.
+            cache (ClassificationCache | None): Optional cache of previous classifications, bound
+                with `use_cache`. When the rules come from files loaded later, e.g. by
+                `ReferenceWatcher.load`, call `use_cache` after loading them instead.
+            semantic_threshold (float | None): The lowest similarity the semantic tier accepts;
+                higher is stricter. None disables the tier.
+            rules (SpecialtyRules | None): The classification tables, e.g. from
+                `reference_data.load_specialty_rules`. Defaults to the built-in tables of this class.
+        """
         self.ai_client = ai_client
+        self.semantic_threshold = semantic_threshold
+        self.rules = rules if rules is not None else self.default_rules()
+        self.__nlp = None
+        # The semantic index and the rules it was built from.
+        self.__semantic = (None, None)
+        self.unused_pipes = []
+        
+        # How many descriptions each tier resolved; 'escalated' counts those sent on to Gemini.
+        self.tier_hits = {'cache': 0, 'keyword': 0, 'parse': 0, 'semantic': 0, 'escalated': 0}
+        
+        self.cache = None
+        if cache is not None:
+            self.use_cache(cache)
+        
+        
+    @property
+    def nlp(self):
+        """
+        The spaCy pipeline, imported and loaded the first time it is needed.
+        """
+        if self.__nlp is None:
+            import spacy
+            
+            nlp = spacy.load("en_core_web_sm")
+            self.unused_pipes = [name for name in nlp.pipe_names if name not in self.NOUN_CHUNK_PIPES]
+            self.__nlp = nlp
+        return self.__nlp
+        
+        
+    @property
+    def semantic_index(self) -> SemanticIndex:
+        """
+        The offline similarity index over the keywords and descriptions of the current rules, built the first time it is needed.
+        """
+        return self.__get_semantic_index(self.rules)
+        
+        
+    def use_cache(self, cache: ClassificationCache) -> None:
+        """
+        Binds a cache to the current rules and serves classifications from it.
+        
+        Binding to rules other than those the cache was last bound to empties it,
+        so attach the cache once the rules that will be used are in place.
+        
+        Args:
+            cache (ClassificationCache): The cache of previous classifications.
+        """
+        cache.bind(self.rules_fingerprint())
+        self.cache = cache
+        
+        
+    @classmethod
+    def default_rules(cls) -> SpecialtyRules:
+        """
+        Returns the built-in tables of this class as rules, reusing the indexes built at class load.
+        """
+        return SpecialtyRules('builtin', tuple(cls.VALID_SPECIALTIES_LIST), cls.SPACY_SPECIALTY_MAP,
+                              cls.SPECIALTY_DESCRIPTIONS, cls.SPECIALTY_SYNONYMS, cls.KEYWORD_INDEX,
+                              cls.SPECIALTY_NORMALIZER)
+        
+        
+    @staticmethod
+    def build_rules(specialties: Iterable[str], keywords: dict[str, list[str]],
+                    descriptions: dict[str, str] | None = None, synonyms: dict[str, str] | None = None,
+                    version: str = 'builtin', previous: SpecialtyRules | None = None) -> SpecialtyRules:
+        """
+        Builds rules from plain tables, rebuilding only the indexes whose inputs changed.
+        
+        Args:
+            specialties (Iterable[str]): The approved specialties.
+            keywords (dict[str, list[str]]): The keyword map, in priority order.
+            descriptions (dict[str, str] | None): Plain-language scope of each specialty.
+            synonyms (dict[str, str] | None): Other names for the approved specialties.
+            version (str): A label for this version of the tables.
+            previous (SpecialtyRules | None): The rules being replaced; their KeywordIndex and
+                LabelNormalizer are reused when the tables they were built from are unchanged.
+            
+        Returns:
+            SpecialtyRules: The new rules.
+            
+        Raises:
+            ValueError: If the keyword map or the synonyms name a specialty that is not approved.
+        """
+        specialties = tuple(specialties)
+        keywords = {specialty: list(words) for specialty, words in keywords.items()}
+        descriptions = dict(descriptions or {})
+        synonyms = dict(synonyms or {})
+        
+        unknown = set(keywords) - set(specialties)
+        if unknown:
+            raise ValueError(f"Keywords map to unknown specialties: {sorted(unknown)}.")
+        
+        # Keyword order decides ties, so the comparison is order-sensitive.
+        if previous is not None and list(previous.keywords.items()) == list(keywords.items()):
+            keyword_index = previous.keyword_index
+        else:
+            keyword_index = KeywordIndex(keywords)
+        if previous is not None and previous.specialties == specialties and previous.synonyms == synonyms:
+            normalizer = previous.normalizer
+        else:
+            normalizer = LabelNormalizer(specialties, synonyms)
+        
+        return SpecialtyRules(version, specialties, keywords, descriptions, synonyms, keyword_index, normalizer)
+        
+        
+    def reload_rules(self, rules: SpecialtyRules) -> list[str]:
+        """
+        Replaces the classification tables while classifications keep running.
+        
+        The new rules are swapped in with one assignment, so nothing waits on a lock.
+        The semantic index is carried over unless the specialties, keywords or
+        descriptions changed. Cached answers are dropped selectively: keyword changes
+        drop what the local tiers produced, description changes drop the semantic
+        tier's answers, and a removed specialty drops every answer naming it.
+        Gemini answers for the remaining specialties are kept.
+        
+        Args:
+            rules (SpecialtyRules): The new rules, e.g. built with `build_rules(..., previous=analyzer.rules)`.
+            
+        Returns:
+            list[str]: The tables that changed: 'specialties', 'keywords', 'descriptions' and/or 'synonyms'.
+        """
+        previous = self.rules
+        changed = [table for table in self.RULE_TABLES if self.__table(previous, table) != self.__table(rules, table)]
+        
+        _, semantic_index = self.__semantic
+        if semantic_index is not None and not {'specialties', 'keywords', 'descriptions'} & set(changed):
+            self.__semantic = (rules, semantic_index)
+        self.rules = rules
+        
+        if self.cache is not None and changed:
+            tiers = set()
+            if 'keywords' in changed:
+                tiers |= {'keyword', 'spacy', 'semantic'}
+            if 'specialties' in changed or 'descriptions' in changed:
+                tiers.add('semantic')
+            removed = set(previous.specialties) - set(rules.specialties)
+            dropped = self.cache.invalidate(self.rules_fingerprint(), tiers, removed)
+            print(f"Dropped {dropped} cached classifications affected by the new rules.")
+        
+        print(f"Loaded specialty rules version {rules.version}; changed: {', '.join(changed) or 'nothing'}.")
+        return changed
+        
+        
+    def rules_fingerprint(self) -> str:
+        """
+        Returns a digest of everything that decides a classification: the valid
+        specialties and their synonyms, the keyword map, the specialty
+        descriptions and semantic threshold, and the Gemini prompt templates.
+        
+        The tables are hashed in order, since keyword and synonym order decide ties.
+        """
+        fingerprint = [self.__table(self.rules, table) for table in self.RULE_TABLES]
+        fingerprint += [self.semantic_threshold, self.SEMANTIC_MARGIN, self.GEMINI_JSON_PROMPT, self.GEMINI_BATCH_PROMPT]
+        return hashlib.sha256(json.dumps(fingerprint).encode('utf-8')).hexdigest()
+        
+        
+    def tier_hit_rates(self) -> dict[str, float]:
+        """
+        Returns the share of classified descriptions resolved by each tier.
+        """
+        total = sum(self.tier_hits.values())
+        return {tier: (hits / total if total else 0.0) for tier, hits in self.tier_hits.items()}
         
         
     def get_specialty(self, description: str) -> str | None:
         """
         Determines the medical specialty for a given injury description using spaCy or Gemini.
         
+        The local tiers run cheapest first: the cache, then a tokenizer-only pass
+        against the keyword index, then the full spaCy parse, then the semantic index.
+        Gemini is only asked when all of them come up empty.
+        
         Args:
             description (str): The description of the patient's injury.
             
         Returns:
             str: The identified medical specialty or 'General/Minor Care' if no match is found.
         """
-        specialty = self.__get_specialty_spacy(description)
+        specialty = self.classify_local([description])[0]
         
         if specialty:
             return specialty
-        else:        
+        specialty = self.__escalate(description)
+        self.__cache_flush()
+        return specialty
+        
+        
+    def classify(self, description: str, top_k: int = 3) -> list[SpecialtyScore]:
+        """
+        Ranks the specialties a description involves, e.g. both Orthopedics and
+        Oncology for a fracture caused by bone cancer.
+        
+        The tiers run cheapest first, as in `get_specialty`, but every specialty a
+        tier finds is kept with its score instead of only the winner. The keyword
+        index scores all specialties in one pass over the tokens, so it runs before
+        the cache, which only stores a single specialty. Gemini answers with one
+        specialty, which gets a score of 1.
+        
+        Args:
+            description (str): The description of the patient's injury.
+            top_k (int): The most specialties to return.
+            
+        Returns:
+            list[SpecialtyScore]: Up to `top_k` specialties, best first, with scores
+                normalized to add up to 1.
+        """
+        text = description if isinstance(description, str) else ''
+        ranked, source, tier = self.__rank_local(text)
+        if not ranked:
+            ranked, source, tier = [(self.__escalate(text), 1.0)], 'gemini', 'escalated'
+        return self.__finish_ranking(ranked, source, tier, top_k)
+        
+        
+    async def classify_async(self, description: str, async_client, top_k: int = 3) -> list[SpecialtyScore]:
+        """
+        Like `classify`, but escalates through an async Gemini client, e.g. from a request handler.
+        
+        Args:
+            description (str): The description of the patient's injury.
+            async_client (AsyncGeminiClient): The client that rate-limits and retries the escalation.
+            top_k (int): The most specialties to return.
+            
+        Returns:
+            list[SpecialtyScore]: As for `classify`.
+        """
+        text = description if isinstance(description, str) else ''
+        # The local tiers are CPU-bound, so they run in a worker thread to keep the event loop responsive.
+        ranked, source, tier = await asyncio.to_thread(self.__rank_local, text)
+        if not ranked:
             print("spaCy did not find a match, trying Gemini...")
-            time.sleep(0.5)  # Adding a delay to avoid hitting API rate limits
-            specialty = self.__get_specialty_gemini(description)
-            if specialty:
-                return specialty
-            else:
-                print("Gemini did not find a match, returning 'General/Minor Care'")
-                return "General/Minor Care"
+            response = await async_client.generate_text(self.__build_prompt(text), model_name="gemini-2.5-flash")
+            ranked, source, tier = [(self.__accept_gemini(text, response), 1.0)], 'gemini', 'escalated'
+        return self.__finish_ranking(ranked, source, tier, top_k)
         
         
-    def __get_specialty_spacy(self, description: str) -> str | None:
+    def get_specialties(self, descriptions: Iterable[str], batch_size: int = 256, n_process: int = 1,
+                        escalation_batch_size: int = 20) -> list[str]:
         """
-        Uses spaCy to analyze the injury description and return the most relevant medical specialty.
+        Determines the medical specialty for many injury descriptions at once.
+        
+        Descriptions are streamed through spaCy's `nlp.pipe` with the components
+        that noun chunks don't need disabled. Cached descriptions skip parsing, and
+        only the distinct descriptions that the keyword map cannot resolve are
+        escalated to Gemini, packed `escalation_batch_size` to a prompt.
         
         Args:
-            injury_description (str): The description of the patient's injury.
+            descriptions (Iterable[str]): The descriptions of the patients' injuries.
+            batch_size (int): The number of descriptions spaCy buffers per batch.
+            n_process (int): The number of processes spaCy parses with; -1 uses every core.
+            escalation_batch_size (int): The number of descriptions per Gemini request;
+                1 sends every description on its own.
             
         Returns:
-            str: The identified medical specialty or 'General/Minor Care' if no match is found.
+            list[str]: The identified specialties, in the same order as the input.
+        """
+        texts = [description if isinstance(description, str) else '' for description in descriptions]
+        specialties = self.classify_local(texts, batch_size, n_process)
+        
+        unresolved = list(dict.fromkeys(texts[i] for i, specialty in enumerate(specialties) if specialty is None))
+        if unresolved:
+            answers = self.escalate_many(unresolved, escalation_batch_size)
+            specialties = [specialty if specialty is not None else answers[text]
+                           for text, specialty in zip(texts, specialties)]
+        
+        return specialties
+        
+        
+    def escalate_many(self, descriptions: list[str], escalation_batch_size: int = 20) -> dict[str, str]:
+        """
+        Asks Gemini for the specialties of descriptions the local tiers could not resolve.
+        
+        Args:
+            descriptions (list[str]): Distinct unresolved descriptions.
+            escalation_batch_size (int): The number of descriptions per Gemini request;
+                1 sends every description on its own.
+            
+        Returns:
+            dict[str, str]: The specialty for every description, with the same
+                fallbacks as `get_specialty`.
+        """
+        answers = {}
+        if escalation_batch_size > 1:
+            print(f"spaCy did not find a match for {len(descriptions)} description(s), trying Gemini in batches...")
+            for chunk in self.__chunk(descriptions, escalation_batch_size):
+                response = self.ai_client.generate_text(self.__build_batch_prompt(chunk), model_name="gemini-2.5-flash")
+                answers.update(self.__accept_gemini_batch(chunk, response))
+        
+        # Anything a batch did not answer with a valid specialty is retried on its own.
+        for description in descriptions:
+            if description not in answers:
+                answers[description] = self.__escalate(description)
+        
+        self.__cache_flush()
+        return answers
+        
+        
+    async def get_specialties_async(self, descriptions: Iterable[str], async_client, batch_size: int = 256,
+                                    n_process: int = 1, escalation_batch_size: int = 20) -> list[str]:
+        """
+        Like `get_specialties`, but sends the Gemini escalations concurrently.
+        
+        Args:
+            descriptions (Iterable[str]): The descriptions of the patients' injuries.
+            async_client (AsyncGeminiClient): The client that rate-limits and retries the escalations.
+            batch_size (int): The number of descriptions spaCy buffers per batch.
+            n_process (int): The number of processes spaCy parses with; -1 uses every core.
+            escalation_batch_size (int): The number of descriptions per Gemini request;
+                1 sends every description on its own.
+            
+        Returns:
+            list[str]: The identified specialties, in the same order as the input.
+        """
+        texts = [description if isinstance(description, str) else '' for description in descriptions]
+        # The local tiers are CPU-bound, so they run in a worker thread to keep the event loop responsive.
+        specialties = await asyncio.to_thread(self.classify_local, texts, batch_size, n_process)
+        
+        unresolved = list(dict.fromkeys(texts[i] for i, specialty in enumerate(specialties) if specialty is None))
+        if unresolved:
+            answers = await self.escalate_many_async(unresolved, async_client, escalation_batch_size)
+            specialties = [specialty if specialty is not None else answers[text]
+                           for text, specialty in zip(texts, specialties)]
+        
+        return specialties
+        
+        
+    async def escalate_many_async(self, descriptions: list[str], async_client,
+                                  escalation_batch_size: int = 20) -> dict[str, str]:
+        """
+        Like `escalate_many`, but sends the Gemini requests concurrently through an async client.
+        
+        Args:
+            descriptions (list[str]): Distinct unresolved descriptions.
+            async_client (AsyncGeminiClient): The client that rate-limits and retries the escalations.
+            escalation_batch_size (int): The number of descriptions per Gemini request;
+                1 sends every description on its own.
+            
+        Returns:
+            dict[str, str]: The specialty for every description.
         """
-        doc = self.nlp(description)
-        imp_words = []
+        print(f"spaCy did not find a match for {len(descriptions)} description(s), trying Gemini...")
+        answers = {}
+        if escalation_batch_size > 1:
+            chunks = list(self.__chunk(descriptions, escalation_batch_size))
+            prompts = [self.__build_batch_prompt(chunk) for chunk in chunks]
+            responses = await async_client.generate_many(prompts, model_name="gemini-2.5-flash")
+            for chunk, response in zip(chunks, responses):
+                answers.update(self.__accept_gemini_batch(chunk, response))
         
-        for chunk in doc.noun_chunks:
-            text = (chunk.root).text
-            final_text = text.lower().strip()
-            imp_words.append(final_text)
+        # Anything a batch did not answer with a valid specialty is retried on its own.
+        retries = [description for description in descriptions if description not in answers]
+        prompts = [self.__build_prompt(description) for description in retries]
+        responses = await async_client.generate_many(prompts, model_name="gemini-2.5-flash")
+        answers.update((description, self.__accept_gemini(description, response))
+                       for description, response in zip(retries, responses))
+        self.__cache_flush()
+        return answers
         
-        full_text = description.lower().strip()
-        all_words = set(imp_words + full_text.split())
         
-        for word in all_words:
-            for specialty, keywords in self.SPACY_SPECIALTY_MAP.items():
-                if word in keywords:
-                    return specialty
+    def classify_local(self, texts: list[str], batch_size: int = 256, n_process: int = 1) -> list[str | None]:
+        """
+        Resolves descriptions without any network call, cheapest tier first.
+        
+        1. A tokenizer-only pass against the keyword index. Most descriptions stop here,
+           spaCy is never loaded for them, and nothing is cached, since a
+           lookup would cost more than the match.
+        2. The cache, if one is configured, for the keyword misses.
+        3. The full spaCy parse via `nlp.pipe`, whose noun-chunk roots can surface
+           keywords the plain tokenizer splits differently.
+        4. The offline semantic index, which scores everything still unresolved
+           in one matrix multiply and accepts confident near matches.
+        
+        Answers from tiers 3 and 4, and from Gemini, are cached.
+        
+        Args:
+            texts (list[str]): The descriptions of the patients' injuries.
+            batch_size (int): The number of descriptions spaCy buffers per batch.
+            n_process (int): The number of processes spaCy parses with; -1 uses every core.
+        
+        Returns:
+            list[str | None]: The specialties, with None where the description needs escalation.
+        """
+        # Every tier uses the rules current at the start, even if a reload swaps them meanwhile.
+        rules = self.rules
+        specialties = [None] * len(texts)
+        hits = dict.fromkeys(self.tier_hits, 0)
+        
+        pending = []
+        with METRICS.span('keyword_match'):
+            for i, text in enumerate(texts):
+                specialty = rules.keyword_index.best_match(KeywordIndex.tokenize(text))
+                if specialty:
+                    hits['keyword'] += 1
+                    specialties[i] = specialty
+                else:
+                    pending.append(i)
+        
+        if pending and self.cache is not None:
+            with METRICS.span('cache_lookup'):
+                unmatched = []
+                for i in pending:
+                    specialties[i] = self.__cache_get(texts[i])
+                    if specialties[i] is not None:
+                        hits['cache'] += 1
+                    else:
+                        unmatched.append(i)
+            pending = unmatched
+        
+        if pending:
+            # nlp.pipe is lazy, so the span has to cover the loop that consumes it.
+            with METRICS.span('spacy_parse'):
+                docs = self.nlp.pipe((texts[i] for i in pending), batch_size=batch_size,
+                                     n_process=n_process, disable=self.unused_pipes)
                 
-        return None
+                unmatched = []
+                for i, doc in zip(pending, docs):
+                    specialty = self.__match_doc(doc, rules.keyword_index)
+                    if specialty:
+                        hits['parse'] += 1
+                        self.__cache_put(texts[i], specialty, 'spacy')
+                        specialties[i] = specialty
+                    else:
+                        unmatched.append(i)
+            pending = unmatched
+        
+        if pending and self.semantic_threshold is not None:
+            with METRICS.span('semantic_match'):
+                matches = self.__get_semantic_index(rules).best_matches([texts[i] for i in pending])
+            
+            unmatched = []
+            for i, specialty in zip(pending, matches):
+                if specialty:
+                    hits['semantic'] += 1
+                    self.__cache_put(texts[i], specialty, 'semantic')
+                    specialties[i] = specialty
+                else:
+                    unmatched.append(i)
+            pending = unmatched
+        
+        hits['escalated'] = len(pending)
+        for tier, count in hits.items():
+            self.tier_hits[tier] += count
+            if count:
+                METRICS.increment('classifications', count, tier=tier)
+        
+        self.__cache_flush()
+        return specialties
+        
+        
+    def __rank_local(self, text: str) -> tuple[list[tuple[str, float]], str | None, str | None]:
+        """
+        Runs the local tiers of `classify`, returning the ranking with its source
+        and tier, or an empty ranking if the description needs Gemini.
+        """
+        rules = self.rules
+        
+        with METRICS.span('keyword_match'):
+            ranked = rules.keyword_index.score(KeywordIndex.tokenize(text))
+        if ranked:
+            return ranked, 'keyword', 'keyword'
+        
+        with METRICS.span('cache_lookup'):
+            cached = self.__cache_get(text)
+        if cached:
+            return [(cached, 1.0)], 'cache', 'cache'
+        
+        with METRICS.span('spacy_parse'):
+            doc = next(iter(self.nlp.pipe([text], disable=self.unused_pipes)))
+            ranked = self.__score_doc(doc, rules.keyword_index)
+        if ranked:
+            self.__cache_put(text, ranked[0][0], 'spacy')
+            return ranked, 'spacy', 'parse'
+        
+        if self.semantic_threshold is not None:
+            with METRICS.span('semantic_match'):
+                ranked = self.__get_semantic_index(rules).rank(text)
+            if ranked:
+                self.__cache_put(text, ranked[0][0], 'semantic')
+                return ranked, 'semantic', 'semantic'
+        
+        return [], None, None
+        
+        
+    def __finish_ranking(self, ranked: list[tuple[str, float]], source: str, tier: str,
+                         top_k: int) -> list[SpecialtyScore]:
+        self.__cache_flush()
+        self.tier_hits[tier] += 1
+        METRICS.increment('classifications', tier=tier)
+        
+        top = ranked[:max(top_k, 1)]
+        total = sum(score for _, score in top)
+        return [SpecialtyScore(specialty, score / total, source) for specialty, score in top]
+        
+        
+    def __escalate(self, description: str) -> str:
+        """
+        Falls back to Gemini for a description the keyword map could not resolve.
+        
+        Requests are paced by the AI client's rate limiter rather than a fixed delay.
+        
+        Args:
+            description (str): The description of the patient's injury.
+            
+        Returns:
+            str: Gemini's specialty, or 'General/Minor Care' if Gemini found no approved one.
+        """
+        print("spaCy did not find a match, trying Gemini...")
+        specialty = self.__get_specialty_gemini(description)
+        return self.__accept_gemini(description, specialty)
+        
+        
+    def __accept_gemini(self, description: str, specialty: str | None) -> str:
+        """
+        Resolves a Gemini answer to an approved specialty through the rules' normalizer
+        and caches it. Answers that resolve to none fall back to 'General/Minor Care'.
+        """
+        if not specialty:
+            specialty = "Gemini-API-Error"
+        specialty = specialty.strip()
+        if 'Error' in specialty:
+            METRICS.increment('errors', source='gemini')
+            return specialty
+        
+        label = self.rules.normalizer.normalize(specialty)
+        if label:
+            self.__cache_put(description, label, 'gemini')
+            return label
+        else:
+            METRICS.increment('errors', source='gemini_label')
+            print(f"Gemini did not return an approved specialty ({specialty!r}), returning 'General/Minor Care'")
+            return "General/Minor Care"
+        
+        
+    def __accept_gemini_batch(self, descriptions: list[str], response: str | None) -> dict[str, str]:
+        """
+        Parses the indexed JSON array returned for a batch prompt.
+        
+        Only entries whose specialty the rules' normalizer resolves to an
+        approved specialty are accepted and cached; the caller retries the
+        rest individually.
+        
+        Args:
+            descriptions (list[str]): The descriptions the batch prompt was built from.
+            response (str | None): Gemini's raw response.
+            
+        Returns:
+            dict[str, str]: The accepted specialty for each description Gemini answered validly.
+        """
+        if not response:
+            METRICS.increment('gemini_batch_misses', len(descriptions))
+            return {}
+        
+        start, end = response.find('['), response.rfind(']')
+        try:
+            items = json.loads(response[start:end + 1]) if start != -1 and end > start else []
+        except json.JSONDecodeError:
+            items = []
+        
+        answers = {}
+        for item in items:
+            if not isinstance(item, dict):
+                continue
+            index, specialty = item.get('index'), item.get('specialty')
+            if isinstance(index, int) and 0 <= index < len(descriptions):
+                specialty = self.rules.normalizer.normalize(specialty)
+                if specialty:
+                    answers[descriptions[index]] = specialty
+        
+        for description, specialty in answers.items():
+            self.__cache_put(description, specialty, 'gemini')
+        METRICS.increment('gemini_batch_misses', len(descriptions) - len(answers))
+        
+        return answers
+        
+        
+    @staticmethod
+    def __chunk(items: list[str], size: int):
+        for start in range(0, len(items), size):
+            yield items[start:start + size]
+        
+        
+    def __get_semantic_index(self, rules: SpecialtyRules) -> SemanticIndex:
+        built_for, semantic_index = self.__semantic
+        if semantic_index is None or built_for is not rules:
+            specialty_texts = {
+                specialty: list(rules.keywords.get(specialty, [])) + [rules.descriptions.get(specialty, specialty)]
+                for specialty in rules.specialties
+            }
+            threshold = self.SEMANTIC_THRESHOLD if self.semantic_threshold is None else self.semantic_threshold
+            semantic_index = SemanticIndex(specialty_texts, threshold=threshold, margin=self.SEMANTIC_MARGIN)
+            # Only the current rules' index is kept; one built for rules already replaced is just used once.
+            if rules is self.rules:
+                self.__semantic = (rules, semantic_index)
+        return semantic_index
+    
+    
+    @staticmethod
+    def __table(rules: SpecialtyRules, table: str) -> list:
+        # Order-sensitive, since keyword order decides ties and specialty order is shown to Gemini.
+        value = getattr(rules, table)
+        return list(value.items()) if isinstance(value, dict) else list(value)
+        
+        
+    def __cache_get(self, description: str) -> str | None:
+        if self.cache is None:
+            return None
+        entry = self.cache.get(description)
+        return entry[0] if entry else None
+        
+        
+    def __cache_put(self, description: str, specialty: str, tier: str) -> None:
+        if self.cache is not None:
+            self.cache.put(description, specialty, tier)
+    
+    
+    def __cache_flush(self) -> None:
+        if self.cache is not None:
+            self.cache.flush()
+        
+        
+    def __match_doc(self, doc, keyword_index: KeywordIndex) -> str | None:
+        """
+        Matches a parsed description against a keyword index.
+        
+        Args:
+            doc (spacy.tokens.Doc): The parsed description.
+            keyword_index (KeywordIndex): The keyword index of the rules in use.
+            
+        Returns:
+            str | None: The highest scoring medical specialty, or None if no keyword matched.
+        """
+        ranked = self.__score_doc(doc, keyword_index)
+        return ranked[0][0] if ranked else None
+    
+    
+    def __score_doc(self, doc, keyword_index: KeywordIndex) -> list[tuple[str, float]]:
+        """
+        Scores a parsed description against a keyword index, boosting the roots of its noun chunks.
+        """
+        heads = [token for chunk in doc.noun_chunks for token in KeywordIndex.tokenize(chunk.root.text)]
+        tokens = KeywordIndex.tokenize(doc.text)
+        
+        return keyword_index.score(tokens, heads)
+
+    
+    def __build_prompt(self, description: str) -> str:
+        return self.GEMINI_JSON_PROMPT.format(injury_description=description, valid_specs = str(list(self.rules.specialties)))
+
+    
+    def __build_batch_prompt(self, descriptions: list[str]) -> str:
+        entries = '\n'.join(json.dumps({'index': i, 'description': description}, ensure_ascii=False)
+                             for i, description in enumerate(descriptions))
+        return self.GEMINI_BATCH_PROMPT.format(injury_descriptions=entries, valid_specs=str(list(self.rules.specialties)))
 
     
     def __get_specialty_gemini(self, description: str) -> str | None:
@@ -202,7 +971,7 @@ class SpecialtyAnalyzer:
         Returns:
             str: The identified medical specialty or 'General/Minor Care' if no match is found.
         """
-        prompt = self.GEMINI_JSON_PROMPT.format(injury_description=description, valid_specs = self.VALID_SPECIALTIES_STR)
+        prompt = self.__build_prompt(description)
         
         response = self.ai_client.generate_text(prompt, model_name="gemini-2.5-flash")
         
@@ -0,0 +1,133 @@
+import asyncio
+from typing import Any, Awaitable, Callable
+
+
+class QueueFullError(Exception):
+    """
+    Raised by MicroBatcher.submit when the queue is at capacity.
+    """
+
+
+class MicroBatcher:
+    """
+    Coalesces concurrent single-item requests into batches for one batch function.
+
+    Items wait in a bounded queue. A single worker drains up to `max_batch_size`
+    items, waiting at most `max_wait` seconds after the first one for more to
+    arrive, and hands them to `process_batch` in one call. Up to `max_in_flight`
+    batches are processed concurrently, so a batch waiting on slow I/O (e.g. a
+    Gemini escalation) does not hold up the batches behind it. When the queue is
+    full, `submit` fails fast with QueueFullError so callers can shed load.
+    """
+
+    def __init__(self, process_batch: Callable[[list[Any]], Awaitable[list[Any]]], max_batch_size: int = 64,
+                 max_wait: float = 0.01, max_queue: int = 1024, max_in_flight: int = 4):
+        """
+        Args:
+            process_batch (Callable[[list], Awaitable[list]]): Processes a batch and returns
+                one result per item, in order.
+            max_batch_size (int): The largest batch passed to `process_batch`.
+            max_wait (float): Seconds to wait for a batch to fill after its first item.
+            max_queue (int): The number of items allowed to wait before `submit` rejects more.
+            max_in_flight (int): The most batches processed at once. Further items wait in the queue.
+        """
+        self.process_batch = process_batch
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait
+        self.max_queue = max_queue
+        self.max_in_flight = max_in_flight
+        self.stats = {'batches': 0, 'items': 0, 'rejected': 0}
+
+        self.__queue = None
+        self.__worker = None
+        self.__slots = None
+        self.__in_flight = set()
+
+    async def start(self) -> None:
+        """
+        Starts the worker on the running event loop.
+        """
+        if self.__worker is None:
+            self.__queue = asyncio.Queue(self.max_queue)
+            self.__slots = asyncio.Semaphore(self.max_in_flight)
+            self.__worker = asyncio.create_task(self.__run())
+
+    async def stop(self) -> None:
+        """
+        Stops the worker. Items still queued or being processed fail with CancelledError.
+        """
+        if self.__worker is not None:
+            self.__worker.cancel()
+            for task in self.__in_flight:
+                task.cancel()
+            await asyncio.gather(self.__worker, *self.__in_flight, return_exceptions=True)
+            self.__worker = None
+            self.__in_flight.clear()
+            while not self.__queue.empty():
+                _, future = self.__queue.get_nowait()
+                future.cancel()
+
+    async def submit(self, item: Any) -> Any:
+        """
+        Queues one item and waits for its result.
+
+        Raises:
+            QueueFullError: If the queue is at capacity.
+        """
+        if self.__worker is None:
+            await self.start()
+
+        future = asyncio.get_running_loop().create_future()
+        try:
+            self.__queue.put_nowait((item, future))
+        except asyncio.QueueFull:
+            self.stats['rejected'] += 1
+            raise QueueFullError(f"More than {self.max_queue} requests are waiting.")
+        return await future
+
+    async def __run(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            # A free slot is taken before collecting, so items keep queuing (and backpressure applies) while all are busy.
+            await self.__slots.acquire()
+            batch = [await self.__queue.get()]
+            deadline = loop.time() + self.max_wait
+            while len(batch) < self.max_batch_size:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self.__queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+
+            # Requests whose callers gave up are dropped before doing any work.
+            batch = [(item, future) for item, future in batch if not future.done()]
+            if not batch:
+                self.__slots.release()
+                continue
+
+            self.stats['batches'] += 1
+            self.stats['items'] += len(batch)
+            task = asyncio.create_task(self.__process(batch))
+            self.__in_flight.add(task)
+            task.add_done_callback(self.__in_flight.discard)
+
+    async def __process(self, batch: list[tuple[Any, asyncio.Future]]) -> None:
+        try:
+            results = await self.process_batch([item for item, _ in batch])
+        except asyncio.CancelledError:
+            for _, future in batch:
+                future.cancel()
+            raise
+        except Exception as e:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        finally:
+            self.__slots.release()
+
+        for (_, future), result in zip(batch, results):
+            if not future.done():
+                future.set_result(result)
@@ -0,0 +1,248 @@
+import hashlib
+import sqlite3
+import threading
+from collections import OrderedDict
+from typing import Iterable
+
+
+class ClassificationCache:
+    """
+    A two-tier cache of specialty classifications keyed on a normalized description hash.
+
+    The first tier is an in-memory LRU of bounded size. The optional second tier
+    is a SQLite database that survives process restarts. Every entry records the
+    tier ('keyword', 'spacy', 'semantic' or 'gemini') that produced it. The cache is bound to a
+    fingerprint of the classification rules; binding a different fingerprint
+    drops every stored entry so stale answers are never served.
+
+    Disk writes are buffered and written with one transaction per `flush`, or
+    once `flush_size` are pending, instead of one commit per entry. Buffered
+    entries are served like stored ones; `close` flushes what is left.
+    """
+
+    def __init__(self, db_path: str | None = None, max_entries: int = 10_000, flush_size: int = 1000):
+        """
+        Initializes the cache.
+
+        Args:
+            db_path (str | None): Path of the SQLite file for the on-disk tier, or None
+                to keep the cache in memory only.
+            max_entries (int): The maximum number of entries held in the memory tier.
+            flush_size (int): The most disk writes buffered before they are written.
+        """
+        if max_entries < 1:
+            raise ValueError("max_entries must be at least 1.")
+
+        self.max_entries = max_entries
+        self.flush_size = flush_size
+        self.fingerprint = None
+        self.stats = {'memory_hits': 0, 'disk_hits': 0, 'misses': 0, 'evictions': 0}
+
+        self.__memory = OrderedDict()
+        # Entries waiting to be written to disk, by key.
+        self.__pending = {}
+        self.__lock = threading.Lock()
+        self.__conn = None
+
+        if db_path:
+            self.__conn = sqlite3.connect(db_path, check_same_thread=False)
+            self.__conn.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)")
+            self.__conn.execute(
+                "CREATE TABLE IF NOT EXISTS entries (key TEXT PRIMARY KEY, specialty TEXT NOT NULL, tier TEXT NOT NULL)"
+            )
+            self.__conn.commit()
+
+    @staticmethod
+    def make_key(description: str) -> str:
+        """
+        Hashes a description after lowercasing it and collapsing whitespace.
+
+        Args:
+            description (str): The description of the patient's injury.
+
+        Returns:
+            str: The hex digest used as the cache key.
+        """
+        normalized = ' '.join(description.lower().split())
+        return hashlib.sha256(normalized.encode('utf-8')).hexdigest()
+
+    def bind(self, fingerprint: str) -> None:
+        """
+        Ties the cache to a version of the classification rules.
+
+        If the cache, or its database, was last bound to a different fingerprint,
+        every entry is dropped.
+
+        Args:
+            fingerprint (str): A digest of the rules that produced the cached answers.
+        """
+        with self.__lock:
+            stored = self.fingerprint
+            if self.__conn is not None:
+                row = self.__conn.execute("SELECT value FROM meta WHERE key = 'fingerprint'").fetchone()
+                stored = row[0] if row else None
+
+            if stored != fingerprint:
+                self.__memory.clear()
+                self.__pending.clear()
+                if self.__conn is not None:
+                    self.__conn.execute("DELETE FROM entries")
+                    self.__conn.execute(
+                        "INSERT OR REPLACE INTO meta (key, value) VALUES ('fingerprint', ?)", (fingerprint,)
+                    )
+                    self.__conn.commit()
+
+            self.fingerprint = fingerprint
+
+    def get(self, description: str) -> tuple[str, str] | None:
+        """
+        Looks up a description, checking memory before disk.
+
+        Args:
+            description (str): The description of the patient's injury.
+
+        Returns:
+            tuple[str, str] | None: The cached (specialty, tier), or None on a miss.
+        """
+        key = self.make_key(description)
+
+        with self.__lock:
+            entry = self.__memory.get(key)
+            if entry is not None:
+                self.__memory.move_to_end(key)
+                self.stats['memory_hits'] += 1
+                return entry
+
+            entry = self.__pending.get(key)
+            if entry is not None:
+                self.__remember(key, entry)
+                self.stats['memory_hits'] += 1
+                return entry
+
+            if self.__conn is not None:
+                row = self.__conn.execute("SELECT specialty, tier FROM entries WHERE key = ?", (key,)).fetchone()
+                if row is not None:
+                    entry = (row[0], row[1])
+                    self.__remember(key, entry)
+                    self.stats['disk_hits'] += 1
+                    return entry
+
+            self.stats['misses'] += 1
+            return None
+
+    def put(self, description: str, specialty: str, tier: str) -> None:
+        """
+        Stores a classification in memory and buffers its disk write.
+
+        Args:
+            description (str): The description of the patient's injury.
+            specialty (str): The specialty it was classified as.
+            tier (str): The tier that produced the answer, e.g. 'keyword', 'spacy', 'semantic' or 'gemini'.
+        """
+        key = self.make_key(description)
+        entry = (specialty, tier)
+
+        with self.__lock:
+            self.__remember(key, entry)
+            if self.__conn is not None:
+                self.__pending[key] = entry
+                if len(self.__pending) >= self.flush_size:
+                    self.__write_pending()
+
+    def flush(self) -> None:
+        """
+        Writes the buffered entries to disk in one transaction, e.g. at the end of a batch.
+        """
+        with self.__lock:
+            self.__write_pending()
+
+    def invalidate(self, fingerprint: str, tiers: Iterable[str] = (), specialties: Iterable[str] = ()) -> int:
+        """
+        Moves the cache to a new version of the rules, dropping only the entries it affects.
+
+        Use this instead of `bind` when it is known which answers a rule change can
+        alter, so e.g. expensive Gemini answers survive a keyword edit.
+
+        Args:
+            fingerprint (str): The digest of the new rules.
+            tiers (Iterable[str]): Drop every entry produced by these tiers.
+            specialties (Iterable[str]): Drop every entry answering one of these specialties.
+
+        Returns:
+            int: The number of entries dropped from the memory tier.
+        """
+        tiers, specialties = set(tiers), set(specialties)
+
+        with self.__lock:
+            stale = [key for key, (specialty, tier) in self.__memory.items()
+                     if tier in tiers or specialty in specialties]
+            for key in stale:
+                del self.__memory[key]
+            for key in [key for key, (specialty, tier) in self.__pending.items()
+                        if tier in tiers or specialty in specialties]:
+                del self.__pending[key]
+
+            if self.__conn is not None:
+                if tiers:
+                    self.__conn.execute(f"DELETE FROM entries WHERE tier IN ({', '.join('?' * len(tiers))})",
+                                        tuple(tiers))
+                if specialties:
+                    self.__conn.execute(
+                        f"DELETE FROM entries WHERE specialty IN ({', '.join('?' * len(specialties))})",
+                        tuple(specialties)
+                    )
+                self.__conn.execute(
+                    "INSERT OR REPLACE INTO meta (key, value) VALUES ('fingerprint', ?)", (fingerprint,)
+                )
+                self.__conn.commit()
+
+            self.fingerprint = fingerprint
+            return len(stale)
+
+    def clear(self) -> None:
+        """
+        Drops every entry from both tiers. The statistics are kept.
+        """
+        with self.__lock:
+            self.__memory.clear()
+            self.__pending.clear()
+            if self.__conn is not None:
+                self.__conn.execute("DELETE FROM entries")
+                self.__conn.commit()
+
+    def close(self) -> None:
+        """
+        Writes the buffered entries and closes the on-disk tier. The memory tier stays usable.
+        """
+        with self.__lock:
+            if self.__conn is not None:
+                self.__write_pending()
+                self.__conn.close()
+                self.__conn = None
+
+    def __len__(self) -> int:
+        return len(self.__memory)
+
+    def __write_pending(self) -> None:
+        """
+        Writes the buffered entries with one executemany and one commit. Callers must hold the lock.
+        """
+        if not self.__pending or self.__conn is None:
+            return
+        self.__conn.executemany(
+            "INSERT OR REPLACE INTO entries (key, specialty, tier) VALUES (?, ?, ?)",
+            [(key, specialty, tier) for key, (specialty, tier) in self.__pending.items()]
+        )
+        self.__conn.commit()
+        self.__pending.clear()
+
+    def __remember(self, key: str, entry: tuple[str, str]) -> None:
+        """
+        Inserts into the memory tier, evicting the least recently used entries when full.
+        Callers must hold the lock.
+        """
+        self.__memory[key] = entry
+        self.__memory.move_to_end(key)
+        while len(self.__memory) > self.max_entries:
+            self.__memory.popitem(last=False)
+            self.stats['evictions'] += 1
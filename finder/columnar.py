@@ -0,0 +1,289 @@
+import json
+import os
+import shutil
+
+import numpy as np
+import pandas as pd
+
+
+FORMAT_VERSION = 1
+
+# A text column is dictionary-encoded when its first chunk has at most this share of distinct values.
+DICTIONARY_RATIO = 0.5
+
+# The number of values converted at a time when an integer column is rewritten as floats.
+WIDEN_BLOCK_ROWS = 1_000_000
+
+
+def columnar_path(csv_path: str) -> str:
+    """
+    Returns where the columnar copy of a CSV file lives: a '.cols' directory next to it.
+    """
+    return csv_path + '.cols'
+
+
+def is_columnar(path: str) -> bool:
+    """
+    Returns True if `path` is a directory written by `convert_csv`.
+    """
+    return os.path.isfile(os.path.join(path, 'meta.json'))
+
+
+def find_columnar(path: str) -> str | None:
+    """
+    Resolves the columnar data to use for `path`, if any.
+
+    Args:
+        path (str): A columnar directory, or a CSV file that may have a columnar copy.
+
+    Returns:
+        str | None: The columnar directory, or None if there is none or the CSV
+            has changed since it was converted.
+    """
+    if is_columnar(path):
+        return path
+
+    directory = columnar_path(path)
+    if not is_columnar(directory):
+        return None
+    with open(os.path.join(directory, 'meta.json'), encoding='utf-8') as f:
+        source = json.load(f).get('source')
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return None
+    if source != {'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns}:
+        return None
+    return directory
+
+
+def convert_csv(csv_path: str, out_dir: str | None = None, chunksize: int = 1_000_000) -> str:
+    """
+    Converts a CSV file into a directory of raw column files that can be memory-mapped.
+
+    Numeric columns are stored as flat NumPy arrays. Text columns with few
+    distinct values (body parts, severities, descriptions) are dictionary-encoded
+    as integer codes plus a list of values; the rest (e.g. PatientID) are stored
+    as one UTF-8 blob with offsets. The file is read in chunks, so conversion
+    needs little memory regardless of its size. The directory is written to a
+    temporary name and renamed into place, so readers never see half a copy.
+
+    Encodings are chosen from the first chunk and widened when a later chunk
+    does not fit: an integer column meeting blanks or fractions is rewritten
+    as floats in place, and a numeric column meeting text is converted again
+    from the start as text, since its numbers no longer hold the original text.
+
+    Args:
+        csv_path (str): The CSV file to convert.
+        out_dir (str | None): Where to write the columns. Defaults to `columnar_path(csv_path)`.
+        chunksize (int): The number of rows read at a time.
+
+    Returns:
+        str: The directory written.
+    """
+    stat = os.stat(csv_path)
+    out_dir = out_dir or columnar_path(csv_path)
+    tmp_dir = out_dir + '.tmp'
+
+    text_columns = set()
+    while True:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        os.makedirs(tmp_dir)
+        rows, columns, rejected = _write_columns(csv_path, tmp_dir, chunksize, text_columns)
+        metas = [writer.close() for writer in columns.values()]
+        if not rejected:
+            break
+        print(f"Columns {sorted(rejected)} of '{csv_path}' hold text after their first chunk; converting again.")
+        text_columns |= rejected
+
+    meta = {
+        'version': FORMAT_VERSION,
+        'rows': rows,
+        'source': {'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns},
+        'columns': metas,
+    }
+    with open(os.path.join(tmp_dir, 'meta.json'), 'w', encoding='utf-8') as f:
+        json.dump(meta, f, ensure_ascii=False)
+
+    shutil.rmtree(out_dir, ignore_errors=True)
+    os.replace(tmp_dir, out_dir)
+    return out_dir
+
+
+def _write_columns(csv_path: str, directory: str, chunksize: int,
+                   text_columns: set[str]) -> tuple[int, dict, set[str]]:
+    """
+    Writes the columns of a CSV file, stopping at the first chunk in which a
+    numeric column holds text. Returns the rows written, the column writers and
+    the names of the columns that have to be written as text.
+    """
+    columns = {}
+    rows = 0
+    with pd.read_csv(csv_path, chunksize=chunksize, dtype=object) as reader:
+        for chunk in reader:
+            for position, name in enumerate(chunk.columns):
+                if name not in columns:
+                    columns[name] = _ColumnWriter(directory, position, chunk[name], text=name in text_columns)
+            rejected = {name for name, writer in columns.items() if not writer.fits(chunk[name])}
+            if rejected:
+                return rows, columns, rejected
+            for name, writer in columns.items():
+                writer.write(chunk[name])
+            rows += len(chunk)
+    return rows, columns, set()
+
+
+def load_columnar(path: str, columns: list[str] | None = None, dtype: dict | None = None) -> pd.DataFrame:
+    """
+    Loads a directory written by `convert_csv`, memory-mapping its column files.
+
+    Numeric columns and the codes of dictionary-encoded columns stay backed by
+    the page cache, so processes that load the same directory share those pages
+    instead of each holding a parsed copy. Dictionary-encoded columns load as
+    categoricals; blob columns are decoded into strings.
+
+    Args:
+        path (str): The columnar directory.
+        columns (list[str] | None): The columns to load, in order; None loads all of them.
+        dtype (dict | None): Dtypes to cast columns to, as accepted by `pd.read_csv`.
+
+    Returns:
+        pd.DataFrame: The table, with the same values `pd.read_csv` would produce.
+    """
+    with open(os.path.join(path, 'meta.json'), encoding='utf-8') as f:
+        meta = json.load(f)
+    if meta.get('version') != FORMAT_VERSION:
+        raise ValueError(f"Unsupported columnar format version {meta.get('version')} in '{path}'.")
+
+    by_name = {column['name']: column for column in meta['columns']}
+    names = columns if columns is not None else list(by_name)
+    missing = [name for name in names if name not in by_name]
+    if missing:
+        raise ValueError(f"Columns {missing} not found in '{path}'.")
+
+    rows = meta['rows']
+    data = {name: _read_column(path, by_name[name], rows) for name in names}
+    df = pd.DataFrame(data, copy=False)
+
+    for name, wanted in (dtype or {}).items():
+        # Dictionary-encoded columns already are categorical; casting them again would copy the codes.
+        if name in df and not (wanted == 'category' and isinstance(df[name].dtype, pd.CategoricalDtype)):
+            df[name] = df[name].astype(wanted)
+    return df
+
+
+def _memmap(path: str, dtype: str, rows: int) -> np.ndarray:
+    if rows == 0:
+        return np.empty(0, dtype=dtype)
+    return np.memmap(path, dtype=dtype, mode='r', shape=(rows,))
+
+
+def _read_column(path: str, column: dict, rows: int):
+    prefix = os.path.join(path, column['file'])
+    kind = column['kind']
+
+    if kind == 'numeric':
+        return _memmap(prefix + '.bin', column['dtype'], rows)
+
+    if kind == 'dictionary':
+        codes = _memmap(prefix + '.codes', column['dtype'], rows)
+        return pd.Categorical.from_codes(codes, categories=column['categories'])
+
+    offsets = _memmap(prefix + '.offsets', 'int64', rows + 1)
+    with open(prefix + '.blob', 'rb') as f:
+        text = f.read().decode('utf-8')
+    valid = _memmap(prefix + '.valid', 'bool', rows)
+    values = [text[start:end] for start, end in zip(offsets[:-1].tolist(), offsets[1:].tolist())]
+    array = pd.array(values, dtype='string')
+    array[~np.asarray(valid)] = pd.NA
+    return array
+
+
+class _ColumnWriter:
+    """
+    Appends one column's chunks to its files, choosing the encoding from the first chunk.
+
+    An int64 column is widened to float64 when a chunk holds blanks or
+    fractions. A numeric column cannot hold text; `fits` reports such a chunk
+    so the caller can start again with `text=True`.
+    """
+
+    def __init__(self, directory: str, position: int, first_chunk: pd.Series, text: bool = False):
+        self.name = first_chunk.name
+        self.prefix = os.path.join(directory, f"c{position:03d}")
+
+        numeric = pd.to_numeric(first_chunk, errors='coerce')
+        if not text and self.__is_numeric(first_chunk, numeric):
+            self.kind = 'numeric'
+            self.dtype = 'int64' if numeric.notna().all() and (numeric % 1 == 0).all() else 'float64'
+        elif first_chunk.nunique() <= max(1, len(first_chunk) * DICTIONARY_RATIO):
+            self.kind = 'dictionary'
+            self.categories = pd.Index([], dtype=object)
+        else:
+            self.kind = 'blob'
+            self.offset = 0
+            self.files = {suffix: open(self.prefix + suffix, 'wb') for suffix in ('.blob', '.offsets', '.valid')}
+            np.zeros(1, dtype='int64').tofile(self.files['.offsets'])
+        self.chunks = [] if self.kind == 'dictionary' else None
+        self.file = open(self.prefix + '.bin', 'wb') if self.kind == 'numeric' else None
+
+    def fits(self, chunk: pd.Series) -> bool:
+        """
+        Returns False if the chunk holds text this column's encoding cannot store.
+        """
+        return self.kind != 'numeric' or self.__is_numeric(chunk, pd.to_numeric(chunk, errors='coerce'))
+
+    def write(self, chunk: pd.Series) -> None:
+        if self.kind == 'numeric':
+            values = pd.to_numeric(chunk, errors='raise')
+            if self.dtype == 'int64' and (values.isna().any() or (values % 1 != 0).any()):
+                self.__widen_to_float()
+            values.to_numpy(dtype=self.dtype).tofile(self.file)
+
+        elif self.kind == 'dictionary':
+            # Codes are only final once every category is known, so chunks are kept until close().
+            new = pd.Index(chunk.dropna().unique()).difference(self.categories)
+            self.categories = self.categories.append(new)
+            self.chunks.append(self.categories.get_indexer(chunk).astype('int32'))
+
+        else:
+            valid = chunk.notna().to_numpy()
+            values = chunk.fillna('').tolist()
+            lengths = np.fromiter(map(len, values), dtype='int64', count=len(values))
+            (self.offset + np.cumsum(lengths)).tofile(self.files['.offsets'])
+            self.offset += int(lengths.sum())
+            self.files['.blob'].write(''.join(values).encode('utf-8'))
+            valid.tofile(self.files['.valid'])
+
+    def close(self) -> dict:
+        meta = {'name': self.name, 'kind': self.kind, 'file': os.path.basename(self.prefix)}
+        if self.kind == 'numeric':
+            self.file.close()
+            meta['dtype'] = self.dtype
+        elif self.kind == 'dictionary':
+            codes_dtype = 'int8' if len(self.categories) < 2**7 else 'int16' if len(self.categories) < 2**15 else 'int32'
+            with open(self.prefix + '.codes', 'wb') as f:
+                for codes in self.chunks:
+                    codes.astype(codes_dtype).tofile(f)
+            meta.update(dtype=codes_dtype, categories=self.categories.tolist())
+        else:
+            for file in self.files.values():
+                file.close()
+        return meta
+
+    @staticmethod
+    def __is_numeric(chunk: pd.Series, numeric: pd.Series) -> bool:
+        return chunk.notna().sum() == numeric.notna().sum()
+
+    def __widen_to_float(self) -> None:
+        # The integers written so far are rewritten as floats, a block at a time.
+        self.file.close()
+        path = self.prefix + '.bin'
+        written = _memmap(path, 'int64', os.path.getsize(path) // 8)
+        with open(path + '.tmp', 'wb') as f:
+            for start in range(0, len(written), WIDEN_BLOCK_ROWS):
+                written[start:start + WIDEN_BLOCK_ROWS].astype('float64').tofile(f)
+        del written
+        os.replace(path + '.tmp', path)
+        self.dtype = 'float64'
+        self.file = open(path, 'ab')
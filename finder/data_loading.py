@@ -0,0 +1,53 @@
+import os
+import threading
+
+import pandas as pd
+
+from finder.columnar import find_columnar, load_columnar
+
+
+_cache = {}
+_lock = threading.Lock()
+
+
+def load_csv(path: str) -> pd.DataFrame:
+    """
+    Reads a CSV file once per process and returns the same DataFrame to every caller.
+
+    Entries are keyed on the file's absolute path and modification time, so an
+    edited file is read again. Callers share the returned frame and must not
+    modify it in place. If the file has an up-to-date columnar copy (see
+    `finder.columnar.convert_csv`), or `path` is one, it is memory-mapped
+    instead of parsed.
+
+    Args:
+        path (str): Path to the CSV file or its columnar directory.
+
+    Returns:
+        pd.DataFrame: The parsed file.
+    """
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        raise FileNotFoundError(f"Data file '{path}' not found.")
+
+    key = (os.path.abspath(path), stat.st_mtime_ns)
+
+    with _lock:
+        df = _cache.get(key)
+        if df is None:
+            columnar = find_columnar(path)
+            df = load_columnar(columnar) if columnar else pd.read_csv(path)
+            # Older versions of an edited file are dropped; callers holding them keep their copy.
+            for stale in [cached for cached in _cache if cached[0] == key[0]]:
+                del _cache[stale]
+            _cache[key] = df
+    return df
+
+
+def clear_cache() -> None:
+    """
+    Forgets every cached file, e.g. after a reload.
+    """
+    with _lock:
+        _cache.clear()
@@ -0,0 +1,98 @@
+import numpy as np
+
+
+EARTH_RADIUS_KM = 6371.0088
+
+
+def to_unit_vectors(lat, lon) -> np.ndarray:
+    """
+    Maps latitudes and longitudes in degrees to points on the unit sphere.
+
+    Returns:
+        np.ndarray: An array of shape (n, 3).
+    """
+    lat = np.radians(np.asarray(lat, dtype=np.float64))
+    lon = np.radians(np.asarray(lon, dtype=np.float64))
+    cos_lat = np.cos(lat)
+    return np.column_stack((cos_lat * np.cos(lon), cos_lat * np.sin(lon), np.sin(lat)))
+
+
+def chord_to_km(chord: np.ndarray) -> np.ndarray:
+    """
+    Converts straight-line distances between unit vectors into great-circle distances in kilometres.
+    """
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.clip(chord / 2, 0, 1))
+
+
+class SpatialIndex:
+    """
+    A nearest-neighbour index over points given as latitude and longitude.
+
+    Points are stored as 3-D unit vectors. The straight-line distance between
+    two of them grows with their great-circle distance, so a Euclidean KD-tree
+    finds the geographically nearest points exactly, with no map projection.
+    scipy's cKDTree is used when scipy is installed. Otherwise a query scans
+    every point with NumPy, in blocks of queries so memory stays bounded.
+    """
+
+    def __init__(self, lat, lon, block_size: int = 4_000_000):
+        """
+        Builds the index.
+
+        Args:
+            lat: Latitudes of the points, in degrees.
+            lon: Longitudes of the points, in degrees.
+            block_size (int): The most query-point pairs the NumPy fallback compares at once.
+        """
+        self.points = to_unit_vectors(lat, lon)
+        self.block_size = block_size
+        try:
+            from scipy.spatial import cKDTree
+        except ImportError:
+            self.__tree = None
+        else:
+            self.__tree = cKDTree(self.points) if len(self.points) else None
+
+    def __len__(self) -> int:
+        return len(self.points)
+
+    def query(self, lat, lon, k: int) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Finds the `k` nearest points to each query location in one vectorized call.
+
+        Args:
+            lat: Latitudes of the query locations, in degrees.
+            lon: Longitudes of the query locations, in degrees.
+            k (int): The number of neighbours per location; capped at the number of points.
+
+        Returns:
+            tuple[np.ndarray, np.ndarray]: Distances in kilometres and positions of the
+                neighbours, both of shape (n, min(k, len(self))), nearest first.
+        """
+        queries = to_unit_vectors(np.atleast_1d(lat), np.atleast_1d(lon))
+        k = min(k, len(self.points))
+        if k == 0:
+            return np.empty((len(queries), 0)), np.empty((len(queries), 0), dtype=np.intp)
+
+        if self.__tree is not None:
+            chords, positions = self.__tree.query(queries, k=k)
+            return chord_to_km(chords.reshape(len(queries), k)), positions.reshape(len(queries), k)
+
+        chords = np.empty((len(queries), k))
+        positions = np.empty((len(queries), k), dtype=np.intp)
+        step = max(1, self.block_size // len(self.points))
+        for start in range(0, len(queries), step):
+            block = queries[start:start + step]
+            # For unit vectors |a - b|^2 = 2 - 2 a.b, so the nearest points have the largest dot products.
+            dots = block @ self.points.T
+            if k < len(self.points):
+                nearest = np.argpartition(-dots, k - 1, axis=1)[:, :k]
+            else:
+                nearest = np.broadcast_to(np.arange(len(self.points)), dots.shape)
+            nearest_dots = np.take_along_axis(dots, nearest, axis=1)
+            order = np.argsort(-nearest_dots, axis=1, kind='stable')
+
+            rows = slice(start, start + len(block))
+            positions[rows] = np.take_along_axis(nearest, order, axis=1)
+            chords[rows] = np.sqrt(np.maximum(0, 2 - 2 * np.take_along_axis(nearest_dots, order, axis=1)))
+        return chord_to_km(chords), positions
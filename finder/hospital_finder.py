@@ -1,9 +1,39 @@
+import bisect
+import json
+import os
+import threading
+import time
+import numpy as np
 import pandas as pd
+from types import MappingProxyType
+from typing import Iterable, NamedTuple, Sequence
+
+from finder.data_loading import load_csv
+from finder.geo import SpatialIndex
+from finder.metrics import METRICS
+from finder.normalization import LabelNormalizer
+
+
+class SpecialtyIndex(NamedTuple):
+    """
+    An immutable snapshot of the specialty -> hospitals lookup tables.
+    
+    `hospitals` fixes each hospital's bit position in `masks`; `by_specialty`
+    holds the same information as ready-made tuples in hospital order.
+    `labels` resolves near-miss spellings of the indexed specialties.
+    """
+    hospitals: tuple[str, ...]
+    by_specialty: MappingProxyType
+    masks: MappingProxyType
+    labels: LabelNormalizer
 
 
 class HospitalFinder:
     """
     A class to handle hospital data and patient data for a hospital finder application.
+    
+    HOSPITAL_TO_SPECIALTIES_MAP is the built-in default. `run_client` and the service
+    load Data/hospital_specialties.json over it at startup (`ReferenceWatcher.load`).
     """
     
     HOSPITAL_TO_SPECIALTIES_MAP = {
@@ -59,18 +89,129 @@ class HospitalFinder:
     }
     
 
-    def __init__(self, hospital_file: str):
+    # How many kilometres of extra travel one point of 'busy' is worth when ranking nearby hospitals.
+    BUSY_WEIGHT_KM = 1.0
+    
+    # Nearby hospitals are ranked among this many times k nearest candidates.
+    CANDIDATE_FACTOR = 4
+    
+
+    def __init__(self, hospital_file: str, specialty_map: dict[str, list[str]] | None = None):
         """
-        Initializes the HospitalFinder with patient and hospital data from CSV files.
+        Initializes the HospitalFinder with hospital data from a CSV file.
+        
+        The file is only parsed when its data is first needed (specialty lookups
+        don't need it), and the parsed frame is shared with other components
+        through `load_csv`.
         
         Args:
             hospital_file (str): Path to the hospital data CSV file.
+            specialty_map (dict[str, list[str]] | None): Hospital -> specialties map to index.
+                Defaults to HOSPITAL_TO_SPECIALTIES_MAP.
         """
-        try:
-            self.hospital_df = pd.read_csv(hospital_file)
-        except FileNotFoundError:
+        if not os.path.exists(hospital_file):
             raise FileNotFoundError(f"Hospital data file '{hospital_file}' not found.")
         
+        self.hospital_file = hospital_file
+        self.__busy_keys = None
+        self.__busy_order = None
+        self.__busy_lock = threading.Lock()
+        self.__coordinates = None
+        self.__spatial = (None, {})
+        self.__emergency = (None, 0)
+        self.__specialty_map = None
+        
+        self.specialty_index = None
+        self.index_version = 0
+        self.reference_version = 'builtin'
+        self.reload_specialty_map(specialty_map if specialty_map is not None else self.HOSPITAL_TO_SPECIALTIES_MAP)
+        
+    @staticmethod
+    def build_specialty_index(specialty_map: dict[str, list[str]]) -> SpecialtyIndex:
+        """
+        Inverts a hospital -> specialties map into specialty -> hospitals lookup tables.
+        
+        Args:
+            specialty_map (dict[str, list[str]]): The specialties offered by each hospital.
+            
+        Returns:
+            SpecialtyIndex: Tuples of hospitals per specialty, in map order, and a
+                bitset per specialty where bit i stands for the i-th hospital.
+        """
+        hospitals = tuple(specialty_map)
+        by_specialty = {}
+        masks = {}
+        
+        for bit, (hospital, specialties) in enumerate(specialty_map.items()):
+            for specialty in dict.fromkeys(specialties):
+                by_specialty.setdefault(specialty, []).append(hospital)
+                masks[specialty] = masks.get(specialty, 0) | (1 << bit)
+        
+        return SpecialtyIndex(
+            hospitals,
+            MappingProxyType({specialty: tuple(names) for specialty, names in by_specialty.items()}),
+            MappingProxyType(masks),
+            LabelNormalizer(by_specialty)
+        )
+        
+    def reload_specialty_map(self, specialty_map: dict[str, list[str]], version: str | None = None) -> bool:
+        """
+        Rebuilds the specialty index from a new hospital -> specialties map.
+        
+        The new index is built on the side and swapped in with a single
+        assignment, so concurrent lookups see either the old or the new index,
+        never a mix. An identical map is not rebuilt, and the spatial indexes of
+        specialties whose hospitals did not change are carried over.
+        
+        Args:
+            specialty_map (dict[str, list[str]]): The specialties offered by each hospital.
+            version (str | None): A label for this version of the map, kept in `reference_version`.
+            
+        Returns:
+            bool: True if the index was rebuilt, False if the map was unchanged.
+        """
+        specialty_map = {hospital: list(specialties) for hospital, specialties in specialty_map.items()}
+        if version is not None:
+            self.reference_version = version
+        # Map order fixes the bit positions, so the comparison is order-sensitive.
+        if self.__specialty_map is not None and list(self.__specialty_map.items()) == list(specialty_map.items()):
+            return False
+        
+        index = self.build_specialty_index(specialty_map)
+        owner, trees = self.__spatial
+        previous = self.specialty_index
+        if owner is not None and owner is previous:
+            self.__spatial = (index, {specialty: entry for specialty, entry in trees.items()
+                                      if index.by_specialty.get(specialty) == previous.by_specialty.get(specialty)})
+        self.specialty_index = index
+        self.__specialty_map = specialty_map
+        self.index_version += 1
+        return True
+        
+    def reload_hospital_data(self) -> None:
+        """
+        Drops everything derived from the hospital data file, e.g. after it was edited.
+        
+        The file itself is read again by `load_csv` once its modification time
+        changes. Busyness is re-sorted straight away, so lookups never see it
+        missing; updates applied with `update_busyness` since the last read are
+        replaced by the file's scores. Coordinates, emergency flags and spatial
+        indexes are rebuilt when next needed.
+        """
+        keys, order = self.__read_busy_keys()
+        with self.__busy_lock:
+            self.__busy_keys, self.__busy_order = keys, order
+        self.__coordinates = None
+        self.__emergency = (None, 0)
+        self.__spatial = (None, {})
+        
+    @property
+    def hospital_df(self) -> pd.DataFrame:
+        """
+        The hospital data, parsed on first access.
+        """
+        return load_csv(self.hospital_file)
+        
     def get_hospital_data(self) -> pd.DataFrame:
         """
         Returns the hospital data as a DataFrame.
@@ -80,46 +221,403 @@ class HospitalFinder:
         """
         return self.hospital_df
     
-    def get_hospital_by_specialty(self, specialty: str) -> list[str] | None:
+    def get_hospital_by_specialty(self, specialty: str, location: tuple[float, float] | None = None,
+                                  k: int = 3) -> tuple[str, ...] | None:
         """
-        Filters the hospital data by a specific medical specialty.
+        Looks up the hospitals that offer a specific medical specialty.
+        
+        Exact names are a single dictionary lookup. Other spellings, e.g.
+        'cardiology ' or 'Orthopedic', are resolved to an indexed specialty first.
         
         Args:
             specialty (str): The medical specialty to filter by.
+            location (tuple[float, float] | None): The patient's (latitude, longitude). If given,
+                only the `k` best nearby hospitals are returned; see `nearest_by_specialty`.
+            k (int): The number of hospitals returned for a location.
             
         Returns:
-            list: A list containing hospitals that match the specialty.
+            tuple: An immutable tuple of hospitals that match the specialty.
             None: If no hospitals match the specialty.
         """
-        matching_hospitals = []
+        if location is not None:
+            return self.nearest_by_specialty([specialty], [location[0]], [location[1]], k)[0]
         
-        for hospital, specialties in self.HOSPITAL_TO_SPECIALTIES_MAP.items():
-            if specialty in specialties:
-                matching_hospitals.append(hospital)
+        with METRICS.span('hospital_lookup'):
+            index = self.specialty_index
+            return index.by_specialty.get(self.__resolve(index, specialty))
+    
+    def nearest_by_specialty(self, specialties: Sequence[str], lats, lons, k: int = 3,
+                             busy_weight: float | None = None) -> list[tuple[str, ...] | None]:
+        """
+        Finds the best nearby hospitals for a batch of patients, e.g. a whole chunk.
+        
+        Each specialty has its own spatial index over the hospitals that offer it,
+        built the first time it is queried. Patients are grouped by specialty and
+        each group is answered with one vectorized nearest-neighbour query. The
+        `CANDIDATE_FACTOR * k` nearest capable hospitals are then ranked by
+        distance in km plus `busy_weight` times their current busyness.
+        Hospitals without coordinates are never returned.
+        
+        Args:
+            specialties (Sequence[str]): The specialty each patient needs.
+            lats: The patients' latitudes, in degrees.
+            lons: The patients' longitudes, in degrees.
+            k (int): The most hospitals returned per patient.
+            busy_weight (float | None): Kilometres per point of busyness. Defaults to BUSY_WEIGHT_KM.
+            
+        Returns:
+            list[tuple[str, ...] | None]: The hospitals for each patient, best first, or None
+                where the specialty has no located hospitals or the patient has no coordinates.
+        """
+        busy_weight = self.BUSY_WEIGHT_KM if busy_weight is None else busy_weight
+        lats = np.asarray(lats, dtype=np.float64)
+        lons = np.asarray(lons, dtype=np.float64)
+        if not len(specialties) == len(lats) == len(lons):
+            raise ValueError("specialties, lats and lons must have the same length.")
+        
+        results = [None] * len(specialties)
+        located = ~(np.isnan(lats) | np.isnan(lons))
+        
+        with METRICS.span('nearest_lookup'):
+            index = self.specialty_index
+            located_rows = np.flatnonzero(located)
+            codes, uniques = pd.factorize(np.asarray(specialties, dtype=object)[located_rows])
+            
+            for code, specialty in enumerate(uniques):
+                spatial, names, busy = self.__get_spatial(index, self.__resolve(index, specialty))
+                if spatial is None:
+                    continue
                 
-        if not matching_hospitals:
-            return None
+                rows = located_rows[codes == code]
+                distances, positions = spatial.query(lats[rows], lons[rows], self.CANDIDATE_FACTOR * k)
+                scores = distances + busy_weight * busy[positions]
+                best = np.take_along_axis(positions, np.argsort(scores, axis=1, kind='stable')[:, :k], axis=1)
+                for row, chosen in zip(rows.tolist(), best):
+                    results[row] = tuple(names[chosen])
         
-        return matching_hospitals
+        return results
     
-    def sort_hospitals_by_busyness(self, hospital_list: list[str]) -> list[str]:
-            """
-            Takes a list of hospital names and sorts them from least busy to most busy.
+    def get_hospitals_by_specialties(self, specialties: Iterable[str], require_all: bool = True) -> tuple[str, ...] | None:
+        """
+        Looks up the hospitals that offer several specialties, e.g. Cardiology AND Vascular Surgery.
+        
+        The specialties' bitsets are intersected (or unioned), so the cost does
+        not depend on how many hospitals offer each specialty.
+        
+        Args:
+            specialties (Iterable[str]): The medical specialties to filter by.
+            require_all (bool): True to require every specialty, False to accept any of them.
             
-            Args:
-                hospital_list (list[str]): A list of hospital names to be sorted.
-
-            Returns:
-                A sorted list of hospital names.
-            """
-            if self.hospitals_df.empty or not hospital_list:
-                return hospital_list 
-
-            filtered_df = self.hospitals_df[self.hospitals_df['name'].isin(hospital_list)]
+        Returns:
+            tuple: The matching hospitals, in map order.
+            None: If no hospitals match.
+        """
+        with METRICS.span('hospital_lookup'):
+            index = self.specialty_index
+            masks = [index.masks.get(self.__resolve(index, specialty), 0) for specialty in specialties]
+            if not masks:
+                return None
             
-            sorted_df = filtered_df.sort_values(by='busy', ascending=True)
-            return sorted_df['name'].tolist()
+            combined = masks[0]
+            for mask in masks[1:]:
+                combined = combined & mask if require_all else combined | mask
             
+            return self.__hospitals_in(index, combined)
+    
+    def get_emergency_hospitals(self, specialty: str | None = None) -> tuple[str, ...] | None:
+        """
+        Looks up the emergency-capable hospitals ('emergency care' is 'y') that offer a specialty.
+        
+        The emergency-capable subset is computed once per specialty index as a
+        bitset, so a lookup is one AND with the specialty's bitset.
+        
+        Args:
+            specialty (str | None): The medical specialty to filter by, or None for every
+                emergency-capable hospital.
             
+        Returns:
+            tuple: The matching hospitals, in map order.
+            None: If no emergency-capable hospital matches.
+        """
+        with METRICS.span('hospital_lookup'):
+            index = self.specialty_index
+            mask = self.__get_emergency_mask(index)
+            if specialty is not None:
+                mask &= index.masks.get(self.__resolve(index, specialty), 0)
+            return self.__hospitals_in(index, mask)
+    
+    def rank_hospitals_by_coverage(self, weights: dict[str, float] | Iterable[tuple],
+                                   top_n: int | None = None) -> list[tuple[str, float]]:
+        """
+        Ranks hospitals by how much of a weighted set of specialties they cover.
+        
+        A hospital's coverage is the sum of the weights of the specialties it
+        offers, divided by the total weight, so a hospital offering everything
+        scores 1. This routes a multi-system patient, e.g. the result of
+        `SpecialtyAnalyzer.classify`, with one lookup instead of one per specialty.
+        Hospitals with equal coverage are ordered least busy first.
+        
+        Args:
+            weights (dict[str, float] | Iterable[tuple]): Specialty -> weight, or
+                (specialty, weight, ...) tuples such as SpecialtyScore.
+            top_n (int | None): The most hospitals to return; None returns all that cover anything.
+            
+        Returns:
+            list[tuple[str, float]]: (hospital, coverage) pairs, best first.
+        """
+        items = weights.items() if isinstance(weights, dict) else ((item[0], item[1]) for item in weights)
+        totals = {}
+        for specialty, weight in items:
+            totals[specialty] = totals.get(specialty, 0.0) + float(weight)
+        total_weight = sum(totals.values())
+        if total_weight <= 0:
+            return []
+        
+        with METRICS.span('hospital_lookup'):
+            index = self.specialty_index
+            coverage = {}
+            for specialty, weight in totals.items():
+                for hospital in index.by_specialty.get(self.__resolve(index, specialty), ()):
+                    coverage[hospital] = coverage.get(hospital, 0.0) + weight
+        
+        with METRICS.span('busyness_sort'):
+            busy_keys = self.__get_busy_keys()
+            unknown = (float('inf'), float('inf'))
+            ranked = sorted(coverage.items(), key=lambda item: (-item[1], busy_keys.get(item[0], unknown)))
+        
+        return [(hospital, covered / total_weight) for hospital, covered in ranked[:top_n]]
+    
+    def sort_hospitals_by_busyness(self, hospital_list: Iterable[str]) -> list[str]:
+        """
+        Takes a list of hospital names and sorts them from least busy to most busy.
+        
+        Hospitals are compared through the precomputed busyness keys, so no
+        DataFrame is filtered or sorted per call. Ties keep the order of the
+        hospital data file, and hospitals without a busyness score go last in
+        their original order.
+        
+        Args:
+            hospital_list (Iterable[str]): The hospital names to be sorted.
+
+        Returns:
+            A sorted list of hospital names.
+        """
+        hospital_list = list(hospital_list)
+        if not hospital_list:
+            return hospital_list
+        
+        with METRICS.span('busyness_sort'):
+            busy_keys = self.__get_busy_keys()
+            
+            # Large requests are cheaper as one pass over the presorted order.
+            if len(hospital_list) * 8 >= len(busy_keys):
+                wanted = set(hospital_list)
+                with self.__busy_lock:
+                    ranked = [name for _, _, name in self.__busy_order if name in wanted]
+            else:
+                ranked = sorted((name for name in hospital_list if name in busy_keys), key=busy_keys.__getitem__)
             
+            return ranked + [name for name in hospital_list if name not in busy_keys]
+    
+    def get_busyness(self, hospital: str) -> float | None:
+        """
+        Returns the current busyness score of a hospital, including streamed updates.
+        """
+        key = self.__get_busy_keys().get(hospital)
+        return key[0] if key else None
+    
+    def update_busyness(self, updates: dict[str, float] | Iterable[tuple[str, float]]) -> None:
+        """
+        Applies new busyness scores without re-reading the hospital data file.
+        
+        Each update moves one entry within the presorted order, so the ranking
+        never has to be rebuilt. Unknown hospitals are added. `hospital_df`
+        keeps the scores it was loaded with; use `get_busyness` for live values.
+        
+        Args:
+            updates (dict[str, float] | Iterable[tuple[str, float]]): New scores by hospital name.
+        """
+        items = updates.items() if isinstance(updates, dict) else updates
+        self.__get_busy_keys()
+        
+        with self.__busy_lock:
+            for name, busy in items:
+                busy = float(busy)
+                old_key = self.__busy_keys.get(name)
+                if old_key is not None:
+                    del self.__busy_order[bisect.bisect_left(self.__busy_order, (*old_key, name))]
+                    key = (busy, old_key[1])
+                else:
+                    key = (busy, len(self.__busy_keys))
+                bisect.insort(self.__busy_order, (*key, name))
+                self.__busy_keys[name] = key
+    
+    def apply_busyness_feed(self, feed: Iterable[tuple[str, float]]) -> int:
+        """
+        Consumes a stream of (name, busy) updates, e.g. from `read_busyness_feed`.
+        
+        Args:
+            feed (Iterable[tuple[str, float]]): The updates, applied one at a time as they arrive.
+            
+        Returns:
+            int: The number of updates applied.
+        """
+        count = 0
+        for name, busy in feed:
+            self.update_busyness([(name, busy)])
+            count += 1
+        return count
+    
+    @staticmethod
+    def __resolve(index: SpecialtyIndex, specialty: str) -> str | None:
+        """
+        Returns the indexed name of a specialty, or None if it matches none.
+        """
+        if specialty in index.by_specialty:
+            return specialty
+        return index.labels.normalize(specialty)
+    
+    @staticmethod
+    def __hospitals_in(index: SpecialtyIndex, mask: int) -> tuple[str, ...] | None:
+        """
+        Returns the hospitals whose bits are set in a mask, in map order, or None if there are none.
+        """
+        hospitals = []
+        while mask:
+            lowest = mask & -mask
+            hospitals.append(index.hospitals[lowest.bit_length() - 1])
+            mask ^= lowest
+        return tuple(hospitals) or None
+    
+    def __get_emergency_mask(self, index: SpecialtyIndex) -> int:
+        """
+        Returns the bitset of the index's hospitals whose 'emergency care' is 'y',
+        computing it the first time it is needed for this index.
+        """
+        owner, mask = self.__emergency
+        if owner is index:
+            return mask
+        
+        hospital_df = self.hospital_df
+        if 'emergency care' not in hospital_df:
+            raise ValueError(f"Hospital data '{self.hospital_file}' has no 'emergency care' column.")
+        flags = hospital_df['emergency care'].astype('string').str.strip().str.casefold()
+        emergency = set(hospital_df['name'][flags.eq('y').fillna(False).to_numpy(dtype=bool)])
+        
+        mask = 0
+        for bit, hospital in enumerate(index.hospitals):
+            if hospital in emergency:
+                mask |= 1 << bit
+        self.__emergency = (index, mask)
+        return mask
+    
+    def __get_spatial(self, index: SpecialtyIndex, specialty: str | None):
+        """
+        Returns the spatial index over the located hospitals offering a specialty,
+        their names in index order, and their current busyness scores.
+        
+        The spatial indexes belong to one specialty index and are dropped when
+        it is swapped out by `reload_specialty_map`.
+        """
+        owner, trees = self.__spatial
+        if owner is not index:
+            trees = {}
+            self.__spatial = (index, trees)
+        
+        entry = trees.get(specialty)
+        if entry is None:
+            coordinates = self.__get_coordinates()
+            names = np.array([name for name in index.by_specialty.get(specialty, ()) if name in coordinates],
+                             dtype=object)
+            spatial = None
+            if len(names):
+                lat, lon = zip(*(coordinates[name] for name in names))
+                spatial = SpatialIndex(lat, lon)
+            entry = trees[specialty] = (spatial, names)
+        
+        spatial, names = entry
+        if spatial is None:
+            return None, names, None
         
+        busy_keys = self.__get_busy_keys()
+        busy = np.array([busy_keys[name][0] if name in busy_keys else np.nan for name in names])
+        # Hospitals without a busyness score count as the busiest.
+        busy = np.where(np.isnan(busy), np.nanmax(busy) if not np.isnan(busy).all() else 0.0, busy)
+        return spatial, names, busy
+    
+    def __get_coordinates(self) -> dict[str, tuple[float, float]]:
+        """
+        Returns each hospital's (lat, lon) from the 'lat' and 'lon' columns of the hospital data.
+        """
+        if self.__coordinates is None:
+            hospital_df = self.hospital_df
+            if 'lat' not in hospital_df or 'lon' not in hospital_df:
+                raise ValueError(f"Hospital data '{self.hospital_file}' has no 'lat' and 'lon' columns.")
+            lat = pd.to_numeric(hospital_df['lat'], errors='coerce')
+            lon = pd.to_numeric(hospital_df['lon'], errors='coerce')
+            self.__coordinates = {
+                name: (float(y), float(x)) for name, y, x in zip(hospital_df['name'], lat, lon)
+                if pd.notna(y) and pd.notna(x)
+            }
+        return self.__coordinates
+    
+    def __get_busy_keys(self) -> dict[str, tuple[float, int]]:
+        """
+        Returns the busyness sort keys, sorting the hospitals by their 'busy'
+        score the first time they are needed.
+        
+        `__busy_keys` maps each name to a (busy, file position) sort key and
+        `__busy_order` holds (busy, file position, name) in ascending order.
+        """
+        busy_keys = self.__busy_keys
+        if busy_keys is not None:
+            return busy_keys
+        
+        keys, order = self.__read_busy_keys()
+        with self.__busy_lock:
+            if self.__busy_keys is None:
+                self.__busy_keys, self.__busy_order = keys, order
+            return self.__busy_keys
+    
+    def __read_busy_keys(self) -> tuple[dict[str, tuple[float, int]], list[tuple[float, int, str]]]:
+        """
+        Reads the busyness sort keys and their ascending order from the hospital data.
+        """
+        hospital_df = self.hospital_df
+        busy = pd.to_numeric(hospital_df['busy'], errors='coerce')
+        keys = {}
+        for position, (name, score) in enumerate(zip(hospital_df['name'], busy)):
+            if pd.notna(score) and name not in keys:
+                keys[name] = (float(score), position)
+        return keys, sorted((*key, name) for name, key in keys.items())
+
+
+def read_busyness_feed(feed_file: str, follow: bool = False, poll_interval: float = 1.0):
+    """
+    Reads busyness updates from a local JSON-lines feed of {"name": ..., "busy": ...} objects.
+    
+    Args:
+        feed_file (str): Path to the feed file.
+        follow (bool): Keep waiting for lines appended to the file, like `tail -f`.
+        poll_interval (float): Seconds to wait between checks for new lines when following.
+        
+    Yields:
+        tuple[str, float]: (hospital name, busyness score) pairs.
+    """
+    with open(feed_file, encoding='utf-8') as f:
+        while True:
+            line = f.readline()
+            if not line:
+                if not follow:
+                    return
+                time.sleep(poll_interval)
+                continue
+            if not line.endswith('\n') and follow:
+                # A partially written line; wait for the rest of it.
+                f.seek(f.tell() - len(line.encode('utf-8')))
+                time.sleep(poll_interval)
+                continue
+            line = line.strip()
+            if line:
+                update = json.loads(line)
+                yield update['name'], float(update['busy'])
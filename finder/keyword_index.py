@@ -0,0 +1,123 @@
+import re
+
+
+class KeywordIndex:
+    """
+    An inverted index from keyword tokens and multi-token phrases to medical specialties.
+
+    The index is built once from a specialty -> keywords map. Keywords and
+    descriptions are tokenized by the same rules, so a keyword such as
+    'von hippel-lindau' is stored as the phrase ('von', 'hippel-lindau') and
+    matched against consecutive tokens of a description. Matching a description
+    is a single pass over its tokens with dictionary lookups, instead of a scan
+    over every specialty and keyword list.
+    """
+
+    _TOKEN_RE = re.compile(r"[^\W_]+(?:['\-][^\W_]+)*")
+
+    def __init__(self, specialty_map: dict[str, list[str]]):
+        """
+        Builds the index from a specialty map.
+
+        Args:
+            specialty_map (dict[str, list[str]]): Maps each specialty to its keywords.
+                The insertion order of the map is used to break score ties.
+        """
+        self.specialties = tuple(specialty_map)
+
+        single = {}
+        phrases = {}
+        for spec_id, keywords in enumerate(specialty_map.values()):
+            for keyword in keywords:
+                tokens = tuple(self.tokenize(keyword))
+                if not tokens:
+                    continue
+                if len(tokens) == 1:
+                    single.setdefault(tokens[0], set()).add(spec_id)
+                else:
+                    phrases.setdefault(tokens, set()).add(spec_id)
+
+        self._single = {token: tuple(sorted(ids)) for token, ids in single.items()}
+
+        # Phrases are grouped by their first token and tried longest first.
+        by_first = {}
+        for tokens, ids in phrases.items():
+            by_first.setdefault(tokens[0], []).append((tokens, tuple(sorted(ids))))
+        self._phrases = {
+            first: tuple(sorted(entries, key=lambda entry: -len(entry[0])))
+            for first, entries in by_first.items()
+        }
+
+    @classmethod
+    def tokenize(cls, text: str) -> list[str]:
+        """
+        Splits text into lowercase word tokens, dropping punctuation and possessive suffixes.
+
+        Args:
+            text (str): The text to tokenize.
+
+        Returns:
+            list[str]: The tokens, in order of appearance.
+        """
+        text = text.lower().replace('’', "'")
+        tokens = []
+        for token in cls._TOKEN_RE.findall(text):
+            if token.endswith("'s"):
+                token = token[:-2]
+            tokens.append(token)
+        return tokens
+
+    def score(self, tokens: list[str], heads: list[str] = ()) -> list[tuple[str, float]]:
+        """
+        Scores every specialty with at least one keyword present in the tokens.
+
+        Each distinct keyword found adds its length in tokens to its specialties,
+        so phrase matches outweigh single words. Tokens in `heads` (e.g. the roots
+        of noun chunks) that are keywords themselves add one extra point.
+
+        Args:
+            tokens (list[str]): The tokens of the description, from `tokenize`.
+            heads (list[str]): Optional salient tokens that boost their specialties.
+
+        Returns:
+            list[tuple[str, float]]: (specialty, score) pairs, best first. Ties are
+                broken by the order of the specialty map, so results are deterministic.
+        """
+        found = {}
+        n_tokens = len(tokens)
+        for pos, token in enumerate(tokens):
+            ids = self._single.get(token)
+            if ids is not None:
+                found[(token,)] = ids
+            for phrase, phrase_ids in self._phrases.get(token, ()):
+                end = pos + len(phrase)
+                if end <= n_tokens and tuple(tokens[pos:end]) == phrase:
+                    found[phrase] = phrase_ids
+
+        scores = {}
+        for phrase, ids in found.items():
+            for spec_id in ids:
+                scores[spec_id] = scores.get(spec_id, 0.0) + len(phrase)
+
+        for head in set(heads):
+            for spec_id in self._single.get(head, ()):
+                scores[spec_id] = scores.get(spec_id, 0.0) + 1.0
+
+        ranked = sorted(scores.items(), key=lambda item: (-item[1], item[0]))
+        return [(self.specialties[spec_id], score) for spec_id, score in ranked]
+
+    def best_match(self, tokens: list[str], heads: list[str] = ()) -> str | None:
+        """
+        Returns the highest scoring specialty for the tokens.
+
+        Args:
+            tokens (list[str]): The tokens of the description, from `tokenize`.
+            heads (list[str]): Optional salient tokens that boost their specialties.
+
+        Returns:
+            str | None: The best specialty, or None if no keyword matched.
+        """
+        ranked = self.score(tokens, heads)
+        if not ranked:
+            return None
+        return ranked[0][0]
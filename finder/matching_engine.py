@@ -1,8 +1,26 @@
+import contextlib
 import os
+import numpy as np
 import pandas as pd
+from typing import NamedTuple
 
+from finder.columnar import find_columnar, load_columnar
+from finder.data_loading import load_csv
+from finder.normalization import LabelNormalizer
 
 
+class SeverityPartition(NamedTuple):
+    """
+    The standardized patients of one severity level, with position indexes into `frame`.
+    
+    `frame` keeps the row labels of `simple_patient_df`, so partitions can be
+    recombined in the original order. The indexes map each body part (and, once
+    `index_specialties` has run, each specialty) to the sorted positions of its
+    rows within `frame`.
+    """
+    frame: pd.DataFrame
+    by_body_part: dict
+    by_specialty: dict | None
 
 
 class PatientDataHandler:
@@ -25,38 +43,196 @@ class PatientDataHandler:
         'chronic/stable': 'Chronic'
     }
     
-    def __init__(self, patient_file: str, hospital_file: str):
+    # Only these columns are read for the standardized view; the rest are loaded on demand.
+    PATIENT_DTYPES = {
+        'PatientID': 'string',
+        'AffectedBodyPart': 'category',
+        'Injury/Sickness': 'string',
+        'Severity': 'category'
+    }
+    
+    SEVERITY_LEVELS = ['High', 'Medium', 'Low', 'Chronic', 'Unknown']
+    
+    # Resolves raw severities through SEVERITY_MAP and the level names, tolerating case,
+    # punctuation and small misspellings ('Severe ', 'life threatening', 'Critcal'). Severity
+    # names are short and unlike each other, so a looser cutoff than for specialties is safe.
+    SEVERITY_NORMALIZER = LabelNormalizer(SEVERITY_LEVELS[:-1], SEVERITY_MAP, cutoff=0.85)
+    
+    # get_patient_data_basic options and the severity level each one selects.
+    SEVERITY_OPTIONS = {'low': 'Low', 'medium': 'Medium', 'high': 'High', 'chronic': 'Chronic'}
+    
+    BASIC_COLUMNS = ['PatientID', 'AffectedBodyPart', 'Injury/Sickness']
+    
+    __NO_ROWS = np.empty(0, dtype=np.intp)
+    
+    def __init__(self, patient_file: str, hospital_file: str, patients: pd.DataFrame | None = None):
         """
         Initializes the PatientDataHandler with patient and hospital data from CSV files.
+        
+        Nothing is parsed here. The standardized view (only the columns in
+        PATIENT_DTYPES) is built on first use, and the full patient and hospital
+        tables are read the first time `get_original_data` asks for them. Either
+        file may also be a columnar directory from `finder.columnar.convert_csv`,
+        and a CSV with an up-to-date columnar copy is memory-mapped instead of parsed.
+        
+        Args:
+            patient_file (str): Path to the patient data CSV file or its columnar directory.
+            hospital_file (str): Path to the hospital data CSV file or its columnar directory.
+            patients (pd.DataFrame | None): An already standardized view to serve instead of
+                reading `patient_file`'s, e.g. another handler's `simple_patient_df` or the
+                result of `standardize_patients`. It is shared, not copied.
         """
-        try:
-            self.patient_df = pd.read_csv(patient_file)
-            self.hospital_df = pd.read_csv(hospital_file)
-            self.temp_df = self.patient_df.copy()
-        except FileNotFoundError as e:
-            raise FileNotFoundError(f"Data file not found: {e}")
+        for data_file in (patient_file, hospital_file):
+            if not os.path.exists(data_file):
+                raise FileNotFoundError(f"Data file not found: {data_file}")
         
+        self.patient_file = patient_file
+        self.hospital_file = hospital_file
         self.severity_map = self.SEVERITY_MAP
         
-        self.simple_patient_df = self.__standardize_df()
+        self.__patient_df = None
+        self.__simple_patient_df = patients
+        
+        # Built on first use and kept up to date by add_patients.
+        self.__appended = []
+        self.__partitions = None
+        self.__id_index = None
+        self.__views = {}
+        self.__specialty_of = None
+        self.__analyzer = None
+
+
+    @property
+    def simple_patient_df(self) -> pd.DataFrame:
+        """
+        The standardized patient view, read and standardized on first access.
+        """
+        if self.__simple_patient_df is None:
+            raw_df = self.__read_patients(self.patient_file)
+            self.__simple_patient_df = self.__standardize_df(raw_df)
+        if self.__appended:
+            # Rows from add_patients are merged lazily, so a burst of additions costs one concat.
+            self.__simple_patient_df = self.__concat([self.__simple_patient_df] + self.__appended)
+            self.__appended = []
+        return self.__simple_patient_df
+
+
+    @property
+    def patient_df(self) -> pd.DataFrame:
+        """
+        The full, unmodified patient table, read on first access.
+        """
+        if self.__patient_df is None:
+            columnar = find_columnar(self.patient_file)
+            self.__patient_df = load_columnar(columnar) if columnar else pd.read_csv(self.patient_file)
+        return self.__patient_df
+
+
+    @property
+    def hospital_df(self) -> pd.DataFrame:
+        """
+        The full hospital table, shared with HospitalFinder through `load_csv`.
+        """
+        return load_csv(self.hospital_file)
+
+
+    @classmethod
+    def iter_patient_chunks(cls, patient_file: str, chunksize: int = 50_000, after_id: str | None = None):
+        """
+        Streams the standardized patient data in chunks of at most `chunksize` rows.
+        
+        Only one chunk is held in memory at a time, so files of any size can be
+        processed with a constant footprint. Columnar data is memory-mapped and
+        sliced instead of parsed.
+        
+        Args:
+            patient_file (str): Path to the patient data CSV file or its columnar directory.
+            chunksize (int): The number of rows read per chunk.
+            after_id (str | None): If given, rows up to and including this PatientID are skipped.
+        
+        Yields:
+            pd.DataFrame: Standardized chunks with the same columns as `simple_patient_df`.
+        """
+        columnar = find_columnar(patient_file)
+        if columnar:
+            # Slicing the memory-mapped columns touches only the pages of one chunk at a time.
+            patients = load_columnar(columnar, list(cls.PATIENT_DTYPES), cls.PATIENT_DTYPES)
+            reader = contextlib.nullcontext(patients.iloc[start:start + chunksize].copy()
+                                            for start in range(0, len(patients), chunksize))
+        else:
+            try:
+                reader = pd.read_csv(patient_file, usecols=list(cls.PATIENT_DTYPES), dtype=cls.PATIENT_DTYPES,
+                                     chunksize=chunksize)
+            except FileNotFoundError as e:
+                raise FileNotFoundError(f"Data file not found: {e}")
+        
+        skipping = after_id is not None
+        with reader as chunks:
+            for raw_df in chunks:
+                if skipping:
+                    matches = (raw_df['PatientID'] == after_id).to_numpy(dtype=bool, na_value=False).nonzero()[0]
+                    if len(matches) == 0:
+                        continue
+                    raw_df = raw_df.iloc[matches[0] + 1:].copy()
+                    skipping = False
+                    if raw_df.empty:
+                        continue
+                yield cls.__standardize_df(raw_df)
+        
+        if skipping:
+            raise ValueError(f"PatientID '{after_id}' not found in '{patient_file}'.")
+
+
+    @classmethod
+    def standardize_patients(cls, raw_df: pd.DataFrame) -> pd.DataFrame:
+        """
+        Builds the standardized view from raw rows, e.g. read from a source other than a patient file.
+        
+        Args:
+            raw_df (pd.DataFrame): Rows with the PATIENT_DTYPES columns and dtypes, raw
+                severities allowed. Its 'Severity' column is standardized in place.
+        
+        Returns:
+            pd.DataFrame: The standardized columns, ready to pass as `patients`.
+        """
+        return cls.__standardize_df(raw_df)
 
 
-    def __standardize_severity(self, raw_severity: str) -> str:
+    @classmethod
+    def __read_patients(cls, patient_file: str) -> pd.DataFrame:
         """
-        Takes a raw severity string, converts it to lowercase, and uses the 
-        severity_map to return a standardized category.
-        Returns 'Unknown' if the keyword is not found in the map.
+        Reads the PATIENT_DTYPES columns, memory-mapping a columnar copy when there is an up-to-date one.
         """
-        if not isinstance(raw_severity, str):
-            return 'Unknown'
-        return self.severity_map.get(raw_severity.lower(), 'Unknown')
+        columnar = find_columnar(patient_file)
+        if columnar:
+            return load_columnar(columnar, list(cls.PATIENT_DTYPES), cls.PATIENT_DTYPES)
+        try:
+            return pd.read_csv(patient_file, usecols=list(cls.PATIENT_DTYPES), dtype=cls.PATIENT_DTYPES)
+        except FileNotFoundError as e:
+            raise FileNotFoundError(f"Data file not found: {e}")
 
 
-    def __standardize_df(self) -> pd.DataFrame:
-    # Standardize the 'Severity' column in the patient DataFrame
-        self.temp_df['Severity'] = self.temp_df['Severity'].apply(self.__standardize_severity)
-        simple_patient_df = self.temp_df[['PatientID', 'AffectedBodyPart', 'Injury/Sickness', 'Severity']]
-        return simple_patient_df
+    @classmethod
+    def __standardize_df(cls, raw_df: pd.DataFrame) -> pd.DataFrame:
+        """
+        Standardizes the 'Severity' column in place and returns the standardized columns.
+        
+        The raw severities are categorical, so SEVERITY_NORMALIZER only runs over
+        the distinct spellings; every row is then recoded in one vectorized take.
+        Severities it cannot resolve become 'Unknown'.
+        """
+        severity = raw_df['Severity'].cat
+        levels = pd.Index(cls.SEVERITY_LEVELS)
+        
+        standardized = cls.SEVERITY_NORMALIZER.normalize_many(severity.categories)
+        recode = levels.get_indexer(standardized.fillna('Unknown'))
+        # Code -1 marks a missing value and picks the trailing 'Unknown' entry.
+        recode = np.append(recode, levels.get_loc('Unknown'))
+        
+        codes = recode[severity.codes.to_numpy()]
+        raw_df['Severity'] = pd.Categorical.from_codes(codes, categories=cls.SEVERITY_LEVELS)
+        
+        return raw_df[['PatientID', 'AffectedBodyPart', 'Injury/Sickness', 'Severity']]
 
 
     def get_original_data(self, option: int) -> pd.DataFrame:
@@ -83,28 +259,227 @@ class PatientDataHandler:
         """
         Returns a DataFrame containing basic patient data.
         
+        The frame is built once per option and the same object is returned on
+        later calls until `add_patients` changes the data, so treat it as read-only.
+        
         Args:
-            option (int): The option to filter the patient data.
-                        1 for all patients, 2 for patients with low-severity conditions, 
-                        3 for moderate-severity, and 4 for high-severity conditions, and 5 for chronic conditions.
+            option (str): The option to filter the patient data: 'all' for all patients, or
+                'low', 'medium', 'high' or 'chronic' for one severity level.
         
         Returns:
-            pd.DataFrame: A DataFrame with patient data with only PatientID, Name, and AffectedBodyPart.
-        """
-        required_columns = ['PatientID', 'AffectedBodyPart', 'Injury/Sickness']
-        
-        if option == 'all':
-            return self.simple_patient_df[required_columns]
-        elif option == 'low':
-            return self.simple_patient_df.loc[self.simple_patient_df['Severity'] == 'Low', required_columns]
-        elif option == 'medium':
-            return self.simple_patient_df.loc[self.simple_patient_df['Severity'] == 'Medium', required_columns]
-        elif option == 'high':
-            return self.simple_patient_df.loc[self.simple_patient_df['Severity'] == 'High', required_columns]
-        elif option == 'chronic':
-            return self.simple_patient_df.loc[self.simple_patient_df['Severity'] == 'Chronic', required_columns]
+            pd.DataFrame: A DataFrame with patient data with only PatientID, AffectedBodyPart and Injury/Sickness.
+        """
+        if option != 'all' and option not in self.SEVERITY_OPTIONS:
+            raise ValueError("Invalid option. Please choose 'all', 'low', 'medium', 'high' or 'chronic'.")
+        return self.filter_patients(severity=option)
+
+
+    def filter_patients(self, severity: str = 'all', body_part: str | None = None,
+                        specialty: str | None = None) -> pd.DataFrame:
+        """
+        Returns the patients matching every given filter, in file order.
+        
+        Filters are answered from the severity partitions and their body part and
+        specialty position indexes, so no filter scans the whole table. Results are
+        cached per combination and returned as the same read-only frame until the
+        data changes.
+        
+        Args:
+            severity (str): 'all', or 'low', 'medium', 'high' or 'chronic'.
+            body_part (str | None): Only patients with this AffectedBodyPart.
+            specialty (str | None): Only patients classified as this specialty;
+                requires `index_specialties` to have run.
+        
+        Returns:
+            pd.DataFrame: The PatientID, AffectedBodyPart and Injury/Sickness of the matching patients.
+        """
+        key = (severity, body_part, specialty)
+        view = self.__views.get(key)
+        if view is not None:
+            return view
+        
+        if severity == 'all':
+            levels = self.SEVERITY_LEVELS
+        elif severity in self.SEVERITY_OPTIONS:
+            levels = [self.SEVERITY_OPTIONS[severity]]
+        else:
+            raise ValueError(f"Invalid severity '{severity}'. Please choose 'all', 'low', 'medium', 'high' or 'chronic'.")
+        if specialty is not None and self.__specialty_of is None:
+            raise ValueError("Specialties are not indexed yet; call index_specialties first.")
+        
+        if severity == 'all' and body_part is None and specialty is None:
+            view = self.simple_patient_df[self.BASIC_COLUMNS]
         else:
-            raise ValueError("Invalid option. Please choose 1, 2, 3, or 4.")
+            partitions = self.__get_partitions()
+            pieces = []
+            for level in levels:
+                partition = partitions[level]
+                positions = None
+                for index, value in ((partition.by_body_part, body_part), (partition.by_specialty, specialty)):
+                    if value is None:
+                        continue
+                    matches = index.get(value, self.__NO_ROWS)
+                    positions = matches if positions is None else np.intersect1d(positions, matches, assume_unique=True)
+                pieces.append(partition.frame if positions is None else partition.frame.iloc[positions])
+            
+            view = pieces[0] if len(pieces) == 1 else pd.concat(pieces).sort_index()
+            view = view[self.BASIC_COLUMNS]
+        
+        self.__views[key] = view
+        return view
+
+
+    def get_patients(self, patient_ids) -> pd.DataFrame:
+        """
+        Looks up patients by PatientID through a hash index instead of a scan.
         
+        Args:
+            patient_ids (Iterable[str]): The IDs to look up.
+        
+        Returns:
+            pd.DataFrame: The standardized rows of the IDs that exist, in the order asked for.
+        """
+        simple_df = self.simple_patient_df
+        if self.__id_index is None:
+            self.__id_index = pd.Index(simple_df['PatientID'])
+        positions = self.__id_index.get_indexer(list(patient_ids))
+        return simple_df.iloc[positions[positions >= 0]]
+
+
+    @property
+    def specialties_indexed(self) -> bool:
+        """
+        Whether `index_specialties` has run, so `filter_patients` can filter by specialty.
+        """
+        return self.__specialty_of is not None
+
+
+    def patient_descriptions(self) -> list[str]:
+        """
+        Returns the distinct injury descriptions of the patients, in file order.
+        """
+        return self.simple_patient_df['Injury/Sickness'].dropna().unique().tolist()
+
+
+    def index_specialties(self, analyzer, specialties: dict[str, str] | None = None) -> None:
+        """
+        Classifies every distinct description once so patients can be filtered by specialty.
         
-    
\ No newline at end of file
+        Intake files repeat a small set of descriptions, so only the distinct ones
+        are sent through the analyzer, which escalates them as usual. The analyzer is kept, and `add_patients`
+        classifies new descriptions with it.
+        
+        Args:
+            analyzer (SpecialtyAnalyzer): Classifies the descriptions.
+            specialties (dict[str, str] | None): Specialties already determined for
+                `patient_descriptions()`, e.g. through an async client; only the
+                descriptions missing from it are classified with the analyzer.
+        """
+        descriptions = self.patient_descriptions()
+        specialty_of = dict(specialties or {})
+        missing = [description for description in descriptions if description not in specialty_of]
+        if missing:
+            specialty_of.update(zip(missing, analyzer.get_specialties(missing)))
+        self.__analyzer = analyzer
+        self.__specialty_of = {description: specialty_of[description] for description in descriptions}
+        
+        if self.__partitions is not None:
+            self.__partitions = {level: self.__index_partition(partition.frame)
+                                 for level, partition in self.__partitions.items()}
+        self.__views.clear()
+
+
+    def add_patients(self, patients: pd.DataFrame) -> int:
+        """
+        Adds patients to the standardized view without re-reading or re-indexing the file.
+        
+        The new rows are standardized on their own. Only the severity partitions
+        they fall into are extended, and their indexes are extended with the new
+        positions; every other partition and cached view is kept. The patient
+        file and `patient_df` are not changed.
+        
+        Args:
+            patients (pd.DataFrame): Rows with at least the PATIENT_DTYPES columns, raw severities allowed.
+        
+        Returns:
+            int: The number of patients added.
+        """
+        missing = [column for column in self.PATIENT_DTYPES if column not in patients.columns]
+        if missing:
+            raise ValueError(f"Missing patient columns: {missing}")
+        if patients.empty:
+            return 0
+        
+        partitions = self.__get_partitions()
+        total = sum(len(partition.frame) for partition in partitions.values())
+        new_df = self.__standardize_df(patients[list(self.PATIENT_DTYPES)].astype(self.PATIENT_DTYPES))
+        new_df.index = pd.RangeIndex(total, total + len(new_df))
+        
+        if self.__specialty_of is not None:
+            unseen = [d for d in new_df['Injury/Sickness'].dropna().unique().tolist() if d not in self.__specialty_of]
+            if unseen:
+                self.__specialty_of.update(zip(unseen, self.__analyzer.get_specialties(unseen)))
+        
+        touched = {'all'}
+        for level, positions in new_df.groupby('Severity', observed=True).indices.items():
+            partition = partitions[level]
+            added = new_df.iloc[positions]
+            offset = len(partition.frame)
+            extra = self.__index_partition(added)
+            partitions[level] = SeverityPartition(
+                self.__concat([partition.frame, added]),
+                self.__merge_positions(partition.by_body_part, extra.by_body_part, offset),
+                None if partition.by_specialty is None
+                else self.__merge_positions(partition.by_specialty, extra.by_specialty, offset)
+            )
+            touched.add(level.lower())
+        
+        self.__appended.append(new_df)
+        self.__id_index = None
+        self.__views = {key: view for key, view in self.__views.items() if key[0] not in touched}
+        return len(new_df)
+
+
+    def __get_partitions(self) -> dict[str, SeverityPartition]:
+        """
+        Splits the standardized view by severity once, indexing each partition by body part and specialty.
+        """
+        if self.__partitions is None:
+            simple_df = self.simple_patient_df
+            groups = simple_df.groupby('Severity', observed=False).indices
+            self.__partitions = {
+                level: self.__index_partition(simple_df.iloc[groups.get(level, self.__NO_ROWS)])
+                for level in self.SEVERITY_LEVELS
+            }
+        return self.__partitions
+
+
+    def __index_partition(self, frame: pd.DataFrame) -> SeverityPartition:
+        by_body_part = frame.groupby('AffectedBodyPart', observed=True).indices
+        by_specialty = None
+        if self.__specialty_of is not None:
+            specialties = frame['Injury/Sickness'].map(self.__specialty_of)
+            by_specialty = specialties.groupby(specialties.to_numpy(), dropna=True).indices
+        return SeverityPartition(frame, by_body_part, by_specialty)
+
+
+    @staticmethod
+    def __merge_positions(index: dict, extra: dict, offset: int) -> dict:
+        merged = dict(index)
+        for value, positions in extra.items():
+            shifted = positions + offset
+            merged[value] = np.concatenate([index[value], shifted]) if value in index else shifted
+        return merged
+
+
+    @staticmethod
+    def __concat(frames: list[pd.DataFrame]) -> pd.DataFrame:
+        """
+        Concatenates standardized frames, widening AffectedBodyPart's categories so it stays categorical.
+        """
+        categories = frames[0]['AffectedBodyPart'].cat.categories
+        for frame in frames[1:]:
+            categories = categories.union(frame['AffectedBodyPart'].cat.categories)
+        aligned = [frame.assign(AffectedBodyPart=frame['AffectedBodyPart'].cat.set_categories(categories))
+                   for frame in frames]
+        return pd.concat(aligned)
@@ -0,0 +1,176 @@
+import json
+import os
+import threading
+import time
+from contextlib import nullcontext
+
+
+class _Span:
+    """
+    Times the enclosed block and records it under the span's name.
+    """
+
+    __slots__ = ('metrics', 'name', 'labels', 'start')
+
+    def __init__(self, metrics, name: str, labels: tuple):
+        self.metrics = metrics
+        self.name = name
+        self.labels = labels
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.metrics._record(self.name, self.labels, time.perf_counter() - self.start)
+        return False
+
+
+class Metrics:
+    """
+    A minimal registry of counters and timing spans for the classify -> match pipeline.
+
+    Spans record count, total, maximum and a cumulative histogram of their
+    durations. Counters and spans accept string labels. Everything can be
+    exported as JSON or in the Prometheus text exposition format.
+
+    When disabled, `span` hands back one shared no-op context manager and
+    `increment`/`observe` return immediately, so instrumented code pays only
+    an attribute check.
+    """
+
+    BUCKETS = (0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 10.0)
+
+    _NULL_SPAN = nullcontext()
+
+    def __init__(self, enabled: bool = False, prefix: str = 'finder'):
+        """
+        Args:
+            enabled (bool): Whether to record anything.
+            prefix (str): Prepended to every metric name in the Prometheus export.
+        """
+        self.enabled = enabled
+        self.prefix = prefix
+        self.__lock = threading.Lock()
+        self.__counters = {}
+        self.__timings = {}
+
+    def enable(self) -> None:
+        self.enabled = True
+
+    def disable(self) -> None:
+        self.enabled = False
+
+    def reset(self) -> None:
+        """
+        Drops every recorded value.
+        """
+        with self.__lock:
+            self.__counters.clear()
+            self.__timings.clear()
+
+    def span(self, name: str, **labels):
+        """
+        Returns a context manager that times its block as `name`.
+
+        Args:
+            name (str): The span name, e.g. 'spacy_parse'.
+            **labels: Optional string labels, e.g. model='gemini-2.5-flash'.
+        """
+        if not self.enabled:
+            return self._NULL_SPAN
+        return _Span(self, name, tuple(sorted(labels.items())))
+
+    def observe(self, name: str, seconds: float, **labels) -> None:
+        """
+        Records a duration measured elsewhere, e.g. time spent waiting on a rate limiter.
+        """
+        if self.enabled:
+            self._record(name, tuple(sorted(labels.items())), seconds)
+
+    def increment(self, name: str, amount: float = 1, **labels) -> None:
+        """
+        Adds to a counter.
+
+        Args:
+            name (str): The counter name, e.g. 'escalations'.
+            amount (float): How much to add.
+            **labels: Optional string labels, e.g. tier='keyword'.
+        """
+        if not self.enabled:
+            return
+        key = (name, tuple(sorted(labels.items())))
+        with self.__lock:
+            self.__counters[key] = self.__counters.get(key, 0) + amount
+
+    def _record(self, name: str, labels: tuple, seconds: float) -> None:
+        key = (name, labels)
+        with self.__lock:
+            timing = self.__timings.get(key)
+            if timing is None:
+                timing = self.__timings[key] = {'count': 0, 'sum': 0.0, 'max': 0.0,
+                                                'buckets': [0] * len(self.BUCKETS)}
+            timing['count'] += 1
+            timing['sum'] += seconds
+            timing['max'] = max(timing['max'], seconds)
+            for i, bound in enumerate(self.BUCKETS):
+                if seconds <= bound:
+                    timing['buckets'][i] += 1
+
+    def snapshot(self) -> dict:
+        """
+        Returns a JSON-friendly copy of every counter and span.
+        """
+        with self.__lock:
+            counters = [{'name': name, 'labels': dict(labels), 'value': value}
+                        for (name, labels), value in sorted(self.__counters.items())]
+            spans = [{'name': name, 'labels': dict(labels), 'count': t['count'], 'sum': t['sum'],
+                      'mean': t['sum'] / t['count'], 'max': t['max']}
+                     for (name, labels), t in sorted(self.__timings.items())]
+        return {'enabled': self.enabled, 'counters': counters, 'spans': spans}
+
+    def to_json(self) -> str:
+        return json.dumps(self.snapshot(), indent=2)
+
+    def to_prometheus(self) -> str:
+        """
+        Renders counters as `<prefix>_<name>_total` and spans as `<prefix>_<name>_seconds` histograms.
+        """
+        with self.__lock:
+            counters = sorted(self.__counters.items())
+            timings = sorted((key, dict(t, buckets=list(t['buckets']))) for key, t in self.__timings.items())
+
+        lines = []
+        declared = set()
+        for (name, labels), value in counters:
+            metric = f"{self.prefix}_{name}_total"
+            if metric not in declared:
+                lines.append(f"# TYPE {metric} counter")
+                declared.add(metric)
+            lines.append(f"{metric}{self.__format_labels(labels)} {value}")
+
+        for (name, labels), timing in timings:
+            metric = f"{self.prefix}_{name}_seconds"
+            if metric not in declared:
+                lines.append(f"# TYPE {metric} histogram")
+                declared.add(metric)
+            for bound, count in zip(self.BUCKETS, timing['buckets']):
+                lines.append(f"{metric}_bucket{self.__format_labels(labels + (('le', str(bound)),))} {count}")
+            lines.append(f"{metric}_bucket{self.__format_labels(labels + (('le', '+Inf'),))} {timing['count']}")
+            lines.append(f"{metric}_sum{self.__format_labels(labels)} {timing['sum']}")
+            lines.append(f"{metric}_count{self.__format_labels(labels)} {timing['count']}")
+
+        return '\n'.join(lines) + '\n'
+
+    @staticmethod
+    def __format_labels(labels: tuple) -> str:
+        if not labels:
+            return ''
+        # Only the values are escaped, as the exposition format requires: backslash first, then quote and newline.
+        escaped = (f'{name}="' + str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') + '"'
+                   for name, value in labels)
+        return '{' + ','.join(escaped) + '}'
+
+
+# The process-wide registry. Set FINDER_METRICS=1 to enable it at import, or call METRICS.enable().
+METRICS = Metrics(enabled=os.getenv('FINDER_METRICS') == '1')
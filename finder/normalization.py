@@ -0,0 +1,99 @@
+import difflib
+import functools
+import re
+from typing import Iterable
+
+import numpy as np
+import pandas as pd
+
+
+class LabelNormalizer:
+    """
+    Maps free-text labels onto a fixed set of canonical labels.
+
+    Every label and synonym is reduced once to a canonical form (casefolded,
+    apostrophes dropped, other punctuation and runs of whitespace collapsed to
+    single spaces) and stored in a lookup table, so 'Severe ', 'SEVERE' and
+    'life threatening' resolve with one dictionary lookup. Anything not in the
+    table is fuzzy-matched against it with difflib, and those answers are kept
+    in a bounded LRU cache. Whole columns are normalized one distinct value at
+    a time.
+    """
+
+    _PUNCTUATION_RE = re.compile(r"[\W_]+")
+
+    # Misspellings of specialty names score 0.93 and up, while other specialties score lower,
+    # e.g. 'hematology' against 'rheumatology' scores 0.91, so near misses are rejected.
+    DEFAULT_CUTOFF = 0.92
+
+    def __init__(self, labels: Iterable[str], synonyms: dict[str, str] | None = None,
+                 cutoff: float = DEFAULT_CUTOFF, cache_size: int = 4096):
+        """
+        Builds the lookup table.
+
+        Args:
+            labels (Iterable[str]): The canonical labels.
+            synonyms (dict[str, str] | None): Other spellings, each mapped to one of `labels`.
+            cutoff (float): The lowest difflib similarity ratio accepted as a fuzzy match; 1 disables fuzzy matching.
+            cache_size (int): The most fuzzy lookups remembered.
+        """
+        self.labels = tuple(labels)
+        self.cutoff = cutoff
+
+        unknown = set((synonyms or {}).values()) - set(self.labels)
+        if unknown:
+            raise ValueError(f"Synonyms map to unknown labels: {sorted(unknown)}.")
+
+        self.table = {self.canonical_form(label): label for label in self.labels}
+        for synonym, label in (synonyms or {}).items():
+            self.table.setdefault(self.canonical_form(synonym), label)
+        self.__forms = list(self.table)
+        self.__fuzzy = functools.lru_cache(maxsize=cache_size)(self.__closest)
+
+    @classmethod
+    def canonical_form(cls, text: str) -> str:
+        """
+        Reduces a label to the form used for lookups, e.g. "Women's Health/Gynecology" -> 'womens health gynecology'.
+        """
+        text = text.casefold().replace("'", '').replace('’', '')
+        return cls._PUNCTUATION_RE.sub(' ', text).strip()
+
+    def normalize(self, text: str | None) -> str | None:
+        """
+        Resolves one label.
+
+        Args:
+            text (str | None): The label to resolve.
+
+        Returns:
+            str | None: The canonical label, or None if nothing matched closely enough.
+        """
+        if not isinstance(text, str):
+            return None
+        form = self.canonical_form(text)
+        if not form:
+            return None
+        label = self.table.get(form)
+        if label is None and self.cutoff < 1:
+            label = self.__fuzzy(form)
+        return label
+
+    def normalize_many(self, values: Iterable) -> pd.Series:
+        """
+        Resolves a column of labels, looking up each distinct value once.
+
+        Args:
+            values (Iterable): The labels, e.g. a Series or the categories of a categorical.
+
+        Returns:
+            pd.Series: The canonical labels, with None where nothing matched, aligned with `values`.
+        """
+        values = values if isinstance(values, pd.Series) else pd.Series(list(values), dtype=object)
+        codes, uniques = pd.factorize(values)
+        # Code -1 marks a missing value and picks the trailing None.
+        resolved = np.array([self.normalize(value) for value in uniques] + [None], dtype=object)
+        return pd.Series(resolved[codes], index=values.index, dtype=object)
+
+    def __closest(self, form: str) -> str | None:
+        matches = difflib.get_close_matches(form, self.__forms, n=1, cutoff=self.cutoff)
+        return self.table[matches[0]] if matches else None
@@ -0,0 +1,212 @@
+import os
+import threading
+from collections import OrderedDict, deque
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Iterable, Iterator
+
+import pandas as pd
+
+from finder.analysis import SpecialtyAnalyzer
+
+
+# The analyzer of the current worker process, created once by `_init_worker`.
+_worker_analyzer = None
+
+
+def _init_worker(semantic_threshold: float | None, tables: tuple) -> None:
+    global _worker_analyzer
+    # Workers never call Gemini; unresolved descriptions are handed back to the parent.
+    # The rules travel as plain tables, since their indexes do not pickle.
+    version, specialties, keywords, descriptions, synonyms = tables
+    rules = SpecialtyAnalyzer.build_rules(specialties, keywords, descriptions, synonyms, version)
+    _worker_analyzer = SpecialtyAnalyzer(ai_client=None, semantic_threshold=semantic_threshold, rules=rules)
+
+
+def _classify_chunk(texts: list[str]) -> tuple[list[str | None], dict[str, int]]:
+    before = dict(_worker_analyzer.tier_hits)
+    specialties = _worker_analyzer.classify_local(texts)
+    hits = {tier: count - before[tier] for tier, count in _worker_analyzer.tier_hits.items()}
+    return specialties, hits
+
+
+class ParallelClassifier:
+    """
+    Classifies chunks of patients on a pool of worker processes.
+
+    The local tiers (keywords, the spaCy parse and the semantic index) are
+    CPU-bound, so in one process they are serialized by the GIL. Each worker
+    builds its own SpecialtyAnalyzer once, in the pool initializer, and runs
+    `classify_local` on the distinct descriptions of a chunk; the rows are never
+    sent to the workers. Descriptions no worker could resolve come back to the
+    parent, where a single I/O thread escalates them through the analyzer's
+    rate-limited Gemini client while the workers carry on. Hospital lookups stay
+    with the caller's HospitalFinder, so hospital data is loaded once.
+
+    Results are yielded in input order, so the output matches a sequential run.
+    Workers keep the analyzer's rules as they were when the pool started.
+
+    A description is escalated once while any chunk waiting for it is in flight.
+    Once the last of those chunks is collected, its answer moves to a bounded
+    LRU of recent answers, so memory stays flat over files of any length.
+    """
+
+    def __init__(self, analyzer: SpecialtyAnalyzer, workers: int | None = None, max_pending: int | None = None,
+                 escalation_batch_size: int = 20, mp_context=None, max_answers: int = 100_000):
+        """
+        Starts the worker pool. Workers load spaCy the first time they need it.
+
+        Args:
+            analyzer (SpecialtyAnalyzer): Escalates unresolved descriptions; its settings are copied to the workers.
+            workers (int | None): The number of worker processes. Defaults to the number of CPUs.
+            max_pending (int | None): The most chunks in flight at once, which bounds memory use.
+                Defaults to twice the number of workers.
+            escalation_batch_size (int): The number of descriptions per Gemini request.
+            mp_context: The multiprocessing context for the pool, e.g. `multiprocessing.get_context('spawn')`.
+            max_answers (int): The most Gemini answers kept for descriptions no chunk in flight is waiting for.
+        """
+        self.analyzer = analyzer
+        self.workers = workers or os.cpu_count() or 1
+        self.max_pending = max_pending or 2 * self.workers
+        self.escalation_batch_size = escalation_batch_size
+        self.max_answers = max_answers
+
+        # How many distinct descriptions per chunk each local tier resolved in the workers.
+        self.tier_hits = dict.fromkeys(analyzer.tier_hits, 0)
+
+        rules = analyzer.rules
+        tables = (rules.version, rules.specialties, rules.keywords, rules.descriptions, rules.synonyms)
+        self.__pool = ProcessPoolExecutor(self.workers, mp_context=mp_context, initializer=_init_worker,
+                                          initargs=(analyzer.semantic_threshold, tables))
+        self.__escalator = ThreadPoolExecutor(max_workers=1, thread_name_prefix='finder-escalation')
+        # Description -> [the escalation job answering it, the number of chunks in flight waiting for it].
+        self.__escalations = {}
+        # Classification future of a chunk in flight -> what each of its unresolved descriptions waits
+        # on: an escalation job, or an answer already known. None until __escalate fills it, once.
+        self.__waiting = {}
+        # Recent answers of escalations no chunk is waiting for any more, least recently used first.
+        self.__answers = OrderedDict()
+        self.__lock = threading.Lock()
+
+    def map_chunks(self, chunks: Iterable[pd.DataFrame],
+                   column: str = 'Injury/Sickness') -> Iterator[tuple[pd.DataFrame, list[str]]]:
+        """
+        Classifies each chunk's descriptions in the worker pool.
+
+        Args:
+            chunks (Iterable[pd.DataFrame]): Patient chunks, e.g. from `PatientDataHandler.iter_patient_chunks`.
+            column (str): The column holding the descriptions.
+
+        Yields:
+            tuple[pd.DataFrame, list[str]]: Each chunk with its specialties, in input order.
+        """
+        pending = deque()
+        for chunk in chunks:
+            pending.append(self.__submit(chunk, column))
+            if len(pending) >= self.max_pending:
+                yield self.__collect(*pending.popleft())
+        while pending:
+            yield self.__collect(*pending.popleft())
+
+    def get_specialties(self, descriptions: Iterable[str], chunksize: int = 10_000) -> list[str]:
+        """
+        Like `SpecialtyAnalyzer.get_specialties`, split into chunks of `chunksize` for the workers.
+        """
+        series = pd.Series(list(descriptions), dtype=object)
+        chunks = (series.iloc[start:start + chunksize].to_frame('description')
+                  for start in range(0, len(series), chunksize))
+        return [specialty for _, specialties in self.map_chunks(chunks, 'description') for specialty in specialties]
+
+    def close(self) -> None:
+        """
+        Shuts down the worker pool and the escalation thread.
+        """
+        self.__pool.shutdown()
+        self.__escalator.shutdown()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def __submit(self, chunk: pd.DataFrame, column: str) -> tuple:
+        texts = [value if isinstance(value, str) else '' for value in chunk[column].tolist()]
+        codes, uniques = pd.factorize(pd.Series(texts, dtype=object))
+        uniques = uniques.tolist()
+
+        future = self.__pool.submit(_classify_chunk, uniques)
+        # Registered before the callback, which may run at once. `__collect` removes the entry, so
+        # a callback that only runs after the chunk was collected finds nothing to register.
+        with self.__lock:
+            self.__waiting[future] = None
+        # Escalations start as soon as a chunk is classified, not when its turn to be yielded comes.
+        future.add_done_callback(lambda done: self.__escalate(uniques, done))
+        return chunk, codes, uniques, future
+
+    def __collect(self, chunk: pd.DataFrame, codes, uniques: list[str], future: Future) -> tuple[pd.DataFrame, list[str]]:
+        try:
+            specialties, hits = future.result()
+        except BaseException:
+            with self.__lock:
+                self.__waiting.pop(future, None)
+            raise
+        for tier, count in hits.items():
+            self.tier_hits[tier] += count
+
+        # The done callback may not have run yet; escalating twice is a no-op.
+        self.__escalate(uniques, future)
+        with self.__lock:
+            waiting = self.__waiting.pop(future)
+        try:
+            answers = {text: source if isinstance(source, str) else source.result()[text]
+                       for text, source in waiting.items()}
+        finally:
+            self.__release(waiting)
+        resolved = [specialty if specialty is not None else answers[text] for text, specialty in zip(uniques, specialties)]
+        return chunk, [resolved[code] for code in codes]
+
+    def __escalate(self, texts: list[str], future: Future) -> None:
+        if future.cancelled() or future.exception() is not None:
+            return
+        specialties, _ = future.result()
+        with self.__lock:
+            # Only a chunk that is still in flight and not registered yet: `future.result()` wakes
+            # `__collect` before the done callbacks run, so this call can come after the collection.
+            if future not in self.__waiting or self.__waiting[future] is not None:
+                return
+            waiting = self.__waiting[future] = {}
+            new = []
+            for text, specialty in zip(texts, specialties):
+                if specialty is not None:
+                    continue
+                if text in self.__escalations:
+                    entry = self.__escalations[text]
+                    entry[1] += 1
+                    waiting[text] = entry[0]
+                elif text in self.__answers:
+                    self.__answers.move_to_end(text)
+                    waiting[text] = self.__answers[text]
+                else:
+                    new.append(text)
+            if new:
+                job = self.__escalator.submit(self.analyzer.escalate_many, new, self.escalation_batch_size)
+                for text in new:
+                    self.__escalations[text] = [job, 1]
+                    waiting[text] = job
+
+    def __release(self, waiting: dict) -> None:
+        with self.__lock:
+            for text, source in waiting.items():
+                entry = self.__escalations.get(text)
+                if entry is None or entry[0] is not source:
+                    continue
+                entry[1] -= 1
+                if entry[1] > 0:
+                    continue
+                del self.__escalations[text]
+                answer = source.result()[text] if source.done() and source.exception() is None else None
+                # Errors are not kept, so a later chunk escalates the description again.
+                if answer is not None and 'Error' not in answer:
+                    self.__answers[text] = answer
+                    if len(self.__answers) > self.max_answers:
+                        self.__answers.popitem(last=False)
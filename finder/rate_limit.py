@@ -0,0 +1,73 @@
+import asyncio
+import threading
+import time
+
+
+class TokenBucket:
+    """
+    A token-bucket rate limiter usable from both threads and asyncio tasks.
+
+    Tokens refill continuously at `rate` per second up to `capacity`. Callers
+    reserve tokens up front, so concurrent waiters are spaced out fairly
+    instead of all waking at once when the bucket refills.
+    """
+
+    def __init__(self, rate: float, capacity: float | None = None):
+        """
+        Initializes a full bucket.
+
+        Args:
+            rate (float): Tokens added per second, i.e. the sustained request rate.
+            capacity (float | None): The largest burst allowed. Defaults to one second of tokens.
+        """
+        if rate <= 0:
+            raise ValueError("rate must be positive.")
+
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else max(1.0, rate)
+        self.__tokens = self.capacity
+        self.__updated = time.monotonic()
+        self.__lock = threading.Lock()
+
+    def reserve(self, tokens: float = 1.0) -> float:
+        """
+        Takes tokens from the bucket, going into debt if there are not enough.
+
+        Args:
+            tokens (float): The number of tokens to take.
+
+        Returns:
+            float: How many seconds the caller must wait before proceeding.
+        """
+        with self.__lock:
+            now = time.monotonic()
+            self.__tokens = min(self.capacity, self.__tokens + (now - self.__updated) * self.rate)
+            self.__updated = now
+            self.__tokens -= tokens
+            if self.__tokens >= 0:
+                return 0.0
+            return -self.__tokens / self.rate
+
+    def acquire(self, tokens: float = 1.0) -> float:
+        """
+        Blocks the current thread until the tokens are available.
+
+        Returns:
+            float: The number of seconds spent waiting.
+        """
+        delay = self.reserve(tokens)
+        if delay > 0:
+            time.sleep(delay)
+        return delay
+
+    async def acquire_async(self, tokens: float = 1.0) -> float:
+        """
+        Suspends the current task until the tokens are available.
+
+        Returns:
+            float: The number of seconds spent waiting.
+        """
+        delay = self.reserve(tokens)
+        if delay > 0:
+            await asyncio.sleep(delay)
+        return delay
@@ -0,0 +1,260 @@
+import hashlib
+import json
+import os
+import threading
+
+from finder.analysis import SpecialtyAnalyzer, SpecialtyRules
+from finder.hospital_finder import HospitalFinder
+
+
+def load_specialty_rules(path: str, previous: SpecialtyRules | None = None) -> SpecialtyRules:
+    """
+    Reads the classification tables from a JSON file.
+
+    The file holds {"version": ..., "specialties": [...], "keywords": {...},
+    "descriptions": {...}, "synonyms": {...}}; see `export_reference_data`.
+    A file without a version is stamped with a digest of its contents.
+
+    Args:
+        path (str): Path to the JSON file.
+        previous (SpecialtyRules | None): The rules being replaced, whose indexes are reused where the tables are unchanged.
+
+    Returns:
+        SpecialtyRules: The rules in the file.
+
+    Raises:
+        ValueError: If the file is not valid JSON or its tables are inconsistent.
+    """
+    version, data = _read_json(path)
+    for table in ('specialties', 'keywords'):
+        if table not in data:
+            raise ValueError(f"Specialty rules '{path}' have no '{table}' table.")
+    return SpecialtyAnalyzer.build_rules(data['specialties'], data['keywords'], data.get('descriptions'),
+                                         data.get('synonyms'), version=version, previous=previous)
+
+
+def load_hospital_specialties(path: str) -> tuple[str, dict[str, list[str]]]:
+    """
+    Reads the hospital -> specialties map from a JSON file of {"version": ..., "hospitals": {...}}.
+
+    Args:
+        path (str): Path to the JSON file.
+
+    Returns:
+        tuple[str, dict[str, list[str]]]: The version stamp and the specialties offered by each hospital.
+
+    Raises:
+        ValueError: If the file is not valid JSON or the map is malformed.
+    """
+    version, data = _read_json(path)
+    hospitals = data.get('hospitals')
+    if not isinstance(hospitals, dict) or not all(
+            isinstance(specialties, list) and all(isinstance(s, str) for s in specialties)
+            for specialties in hospitals.values()):
+        raise ValueError(f"Hospital specialties '{path}' must map each hospital to a list of specialties.")
+    return version, hospitals
+
+
+def export_reference_data(specialties_file: str, hospital_specialties_file: str, version: str = '1') -> None:
+    """
+    Writes the built-in tables of SpecialtyAnalyzer and HospitalFinder to the JSON files the loaders read.
+    """
+    rules = {
+        'version': version,
+        'specialties': SpecialtyAnalyzer.VALID_SPECIALTIES_LIST,
+        'keywords': SpecialtyAnalyzer.SPACY_SPECIALTY_MAP,
+        'descriptions': SpecialtyAnalyzer.SPECIALTY_DESCRIPTIONS,
+        'synonyms': SpecialtyAnalyzer.SPECIALTY_SYNONYMS,
+    }
+    hospitals = {'version': version, 'hospitals': HospitalFinder.HOSPITAL_TO_SPECIALTIES_MAP}
+    for path, data in ((specialties_file, rules), (hospital_specialties_file, hospitals)):
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, indent=2, ensure_ascii=False)
+            f.write('\n')
+
+
+def _read_json(path: str) -> tuple[str, dict]:
+    with open(path, 'rb') as f:
+        raw = f.read()
+    try:
+        data = json.loads(raw)
+    except (json.JSONDecodeError, UnicodeDecodeError) as e:
+        raise ValueError(f"Reference data '{path}' is not valid JSON: {e}") from e
+    if not isinstance(data, dict):
+        raise ValueError(f"Reference data '{path}' must hold a JSON object.")
+    version = data.get('version')
+    return str(version) if version is not None else hashlib.sha256(raw).hexdigest()[:12], data
+
+
+class ReferenceWatcher:
+    """
+    Reloads the specialty rules and hospital data when their files change, without a restart.
+
+    Each file is stamped with its modification time and size, and only the
+    sources whose stamp moved are reloaded: the specialty rules file goes to
+    `SpecialtyAnalyzer.reload_rules`, the hospital specialties file to
+    `HospitalFinder.reload_specialty_map` and the hospital CSV to
+    `HospitalFinder.reload_hospital_data`. Each of those builds the new tables on
+    the side and swaps them in with one assignment, so classifications and
+    lookups in progress are never blocked; only reloads wait for each other.
+
+    The JSON files are authoritative: once loaded, their tables replace the
+    built-in ones of SpecialtyAnalyzer and HospitalFinder, which only serve as
+    defaults when no file is given. Edit the files, not the class tables, or
+    re-export them with `export_reference_data` after changing the classes.
+
+    Call `load` once at startup, then `check` periodically, `start` a polling
+    thread, or call `reload` to force a reload.
+    """
+
+    SOURCES = ('specialties', 'hospital_specialties', 'hospital_data')
+
+    def __init__(self, analyzer: SpecialtyAnalyzer, hospital_finder: HospitalFinder,
+                 specialties_file: str | None = None, hospital_specialties_file: str | None = None,
+                 poll_interval: float = 5.0):
+        """
+        Args:
+            analyzer (SpecialtyAnalyzer): Receives the specialty rules.
+            hospital_finder (HospitalFinder): Receives the hospital specialties and hospital data.
+            specialties_file (str | None): JSON file read by `load_specialty_rules`; None leaves the rules alone.
+            hospital_specialties_file (str | None): JSON file read by `load_hospital_specialties`;
+                None leaves the map alone.
+            poll_interval (float): Seconds between checks of the polling thread.
+        """
+        self.analyzer = analyzer
+        self.hospital_finder = hospital_finder
+        self.poll_interval = poll_interval
+        self.files = {
+            'specialties': specialties_file,
+            'hospital_specialties': hospital_specialties_file,
+            'hospital_data': hospital_finder.hospital_file,
+        }
+
+        # The last error per source, cleared by its next successful reload.
+        self.errors = {}
+        # The hospital CSV is read lazily and already current, so only later edits need a reload.
+        self.__stamps = {'hospital_data': self.__stamp(hospital_finder.hospital_file)}
+        self.__lock = threading.Lock()
+        self.__stop = threading.Event()
+        self.__thread = None
+
+    @property
+    def versions(self) -> dict[str, str]:
+        """
+        The version stamps of the specialty rules and hospital specialties in use.
+        """
+        return {'specialties': self.analyzer.rules.version, 'hospitals': self.hospital_finder.reference_version}
+
+    def load(self) -> dict[str, list[str] | bool]:
+        """
+        Loads the JSON files at startup and reports the built-in tables they replace.
+
+        The hospital CSV is only stamped: HospitalFinder reads it lazily, and
+        nothing derived from it exists yet that a reload would have to drop.
+
+        Returns:
+            dict[str, list[str] | bool]: As for `check`.
+
+        Raises:
+            ValueError: If a JSON file cannot be loaded.
+        """
+        changes = self.__reload(force=True, sources=('specialties', 'hospital_specialties'))
+        if self.errors:
+            raise ValueError('; '.join(self.errors.values()))
+        for source, changed in changes.items():
+            if changed:
+                replaced = ', '.join(changed) if isinstance(changed, list) else 'hospital -> specialties map'
+                print(f"'{self.files[source]}' replaces the built-in {replaced}.")
+        return changes
+
+    def check(self) -> dict[str, list[str] | bool]:
+        """
+        Reloads the sources whose files changed since the last check.
+
+        A source that fails to load keeps its current tables, and is retried once its file changes again.
+
+        Returns:
+            dict[str, list[str] | bool]: What each reloaded source changed: the changed
+                tables for 'specialties', otherwise whether anything was swapped in.
+        """
+        return self.__reload(force=False)
+
+    def reload(self) -> dict[str, list[str] | bool]:
+        """
+        Reloads every source now, whether or not its file changed, e.g. for an admin endpoint.
+
+        Returns:
+            dict[str, list[str] | bool]: As for `check`.
+
+        Raises:
+            ValueError: If a file cannot be loaded; the other sources are still reloaded.
+        """
+        changes = self.__reload(force=True)
+        if self.errors:
+            raise ValueError('; '.join(self.errors.values()))
+        return changes
+
+    def start(self) -> None:
+        """
+        Starts a daemon thread that calls `check` every `poll_interval` seconds.
+        """
+        if self.__thread is not None:
+            return
+        self.__stop.clear()
+        self.__thread = threading.Thread(target=self.__poll, name='finder-reference-watcher', daemon=True)
+        self.__thread.start()
+
+    def stop(self) -> None:
+        """
+        Stops the polling thread.
+        """
+        self.__stop.set()
+        if self.__thread is not None:
+            self.__thread.join()
+            self.__thread = None
+
+    def __poll(self) -> None:
+        while not self.__stop.wait(self.poll_interval):
+            self.check()
+
+    def __reload(self, force: bool, sources: tuple[str, ...] = SOURCES) -> dict[str, list[str] | bool]:
+        changes = {}
+        with self.__lock:
+            for source in sources:
+                path = self.files[source]
+                if path is None:
+                    continue
+                stamp = self.__stamp(path)
+                if stamp is None:
+                    self.errors[source] = f"Reference data '{path}' not found."
+                    continue
+                if not force and self.__stamps.get(source) == stamp:
+                    continue
+                # Stamped before loading, so a broken file is not retried until it changes.
+                self.__stamps[source] = stamp
+
+                try:
+                    changes[source] = self.__load(source, path)
+                except (OSError, ValueError) as e:
+                    self.errors[source] = str(e)
+                    print(f"Keeping the current {source.replace('_', ' ')}: {e}")
+                else:
+                    self.errors.pop(source, None)
+        return changes
+
+    @staticmethod
+    def __stamp(path: str) -> tuple[int, int] | None:
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+
+    def __load(self, source: str, path: str) -> list[str] | bool:
+        if source == 'specialties':
+            return self.analyzer.reload_rules(load_specialty_rules(path, previous=self.analyzer.rules))
+        if source == 'hospital_specialties':
+            version, specialty_map = load_hospital_specialties(path)
+            return self.hospital_finder.reload_specialty_map(specialty_map, version)
+        self.hospital_finder.reload_hospital_data()
+        return True
@@ -0,0 +1,180 @@
+import functools
+import re
+import zlib
+
+import numpy as np
+
+from finder.keyword_index import KeywordIndex
+
+
+class SemanticIndex:
+    """
+    An offline similarity index over hashed character n-grams of each specialty's vocabulary.
+
+    Each keyword and each clause of a specialty's description becomes one
+    prototype row of a dense NumPy matrix, built once. Words are split into
+    character n-grams (so 'aortic' shares most of its features with 'aorta', and
+    'endocarditis' with 'pericarditis'), hashed into a fixed number of columns,
+    weighted by how few specialties share them, and L2-normalized. A batch of
+    descriptions is scored with a single matrix multiply against the prototypes,
+    keeping each specialty's best prototype, with no model download, GPU or
+    network call.
+    """
+
+    def __init__(self, specialty_texts: dict[str, list[str]], dim: int = 4096, ngram_range: tuple[int, int] = (3, 5),
+                 threshold: float = 0.45, margin: float = 0.05, block_size: int = 1024):
+        """
+        Builds the specialty matrix.
+
+        Args:
+            specialty_texts (dict[str, list[str]]): Maps each specialty to its keywords and descriptions.
+                The insertion order of the map is used to break score ties.
+            dim (int): The number of hashed feature columns.
+            ngram_range (tuple[int, int]): The smallest and largest character n-gram lengths.
+            threshold (float): The lowest cosine similarity accepted as a match.
+            margin (float): How far the best specialty must score above the runner-up to be accepted.
+            block_size (int): The most descriptions embedded at once, which bounds memory use.
+        """
+        self.specialties = tuple(specialty_texts)
+        self.dim = dim
+        self.ngram_range = ngram_range
+        self.threshold = threshold
+        self.margin = margin
+        self.block_size = block_size
+        # Intake descriptions reuse a small vocabulary, so each token is hashed once.
+        self.__token_features = functools.lru_cache(maxsize=65_536)(self.__hash_token)
+
+        # Each keyword and each clause of a description becomes its own prototype row, so a short
+        # description is compared with short phrases rather than with a specialty's whole vocabulary.
+        prototypes, starts = [], []
+        for specialty, texts in specialty_texts.items():
+            phrases = [phrase for text in texts for phrase in self.__split(text)]
+            if not phrases:
+                raise ValueError(f"Specialty '{specialty}' has no keywords or description.")
+            starts.append(len(prototypes))
+            prototypes.extend(phrases)
+        self.starts = np.array(starts)
+
+        counts = self.__count(prototypes)
+        # Features shared by many specialties say little about which one a description belongs to.
+        document_frequency = np.count_nonzero(np.add.reduceat(counts, self.starts, axis=0), axis=0)
+        self.idf = np.log((1 + len(self.specialties)) / (1 + document_frequency)).astype(np.float32) + 1
+        self.matrix = self.__weight(counts)
+
+    def features(self, text: str) -> list[int]:
+        """
+        Returns the hashed feature columns of a text: one per word and one per character n-gram.
+
+        Args:
+            text (str): The text to featurize.
+
+        Returns:
+            list[int]: Column indexes, repeated once per occurrence.
+        """
+        columns = []
+        for token in KeywordIndex.tokenize(text):
+            columns.extend(self.__token_features(token))
+        return columns
+
+    def vectorize(self, texts: list[str]) -> np.ndarray:
+        """
+        Embeds texts as weighted, L2-normalized rows.
+
+        Args:
+            texts (list[str]): The texts to embed.
+
+        Returns:
+            np.ndarray: A float32 array of shape (len(texts), dim).
+        """
+        return self.__weight(self.__count(texts))
+
+    def scores(self, texts: list[str]) -> np.ndarray:
+        """
+        Returns the similarity of every text to every specialty: the cosine
+        similarity to the specialty's closest prototype phrase.
+
+        Args:
+            texts (list[str]): The descriptions to score.
+
+        Returns:
+            np.ndarray: An array of shape (len(texts), len(specialties)).
+        """
+        scores = np.empty((len(texts), len(self.specialties)), dtype=np.float32)
+        for start in range(0, len(texts), self.block_size):
+            block = self.vectorize(texts[start:start + self.block_size]) @ self.matrix.T
+            scores[start:start + len(block)] = np.maximum.reduceat(block, self.starts, axis=1)
+        return scores
+
+    def best_matches(self, texts: list[str]) -> list[str | None]:
+        """
+        Picks the closest specialty for each text when it is a confident match.
+
+        A match is confident when its similarity reaches `threshold` and beats
+        the runner-up by at least `margin`.
+
+        Args:
+            texts (list[str]): The descriptions to classify.
+
+        Returns:
+            list[str | None]: The specialties, with None where no match was confident.
+        """
+        if not texts:
+            return []
+
+        scores = self.scores(texts)
+        best = scores.argmax(axis=1)
+        rows = np.arange(len(texts))
+        top = scores[rows, best]
+        scores[rows, best] = -np.inf
+        runner_up = scores.max(axis=1) if scores.shape[1] > 1 else np.zeros(len(texts))
+
+        confident = (top >= self.threshold) & (top - runner_up >= self.margin)
+        return [self.specialties[b] if ok else None for b, ok in zip(best, confident)]
+
+    def rank(self, text: str) -> list[tuple[str, float]]:
+        """
+        Ranks the specialties a text is similar to, when its best match is confident.
+
+        Args:
+            text (str): The description to classify.
+
+        Returns:
+            list[tuple[str, float]]: (specialty, similarity) pairs reaching `threshold`,
+                best first, or an empty list if the best match is not confident.
+        """
+        scores = self.scores([text])[0]
+        order = np.argsort(-scores, kind='stable')
+        top = scores[order[0]]
+        runner_up = scores[order[1]] if len(order) > 1 else 0.0
+        if top < self.threshold or top - runner_up < self.margin:
+            return []
+        return [(self.specialties[i], float(scores[i])) for i in order if scores[i] >= self.threshold]
+
+    def __hash_token(self, token: str) -> tuple[int, ...]:
+        low, high = self.ngram_range
+        columns = [zlib.crc32(token.encode('utf-8')) % self.dim]
+        padded = f"<{token}>"
+        for n in range(low, min(high, len(padded)) + 1):
+            for start in range(len(padded) - n + 1):
+                columns.append(zlib.crc32(padded[start:start + n].encode('utf-8')) % self.dim)
+        return tuple(columns)
+
+    @staticmethod
+    def __split(text: str) -> list[str]:
+        phrases = [phrase.strip() for phrase in re.split(r'[,:;]', text)]
+        return [phrase for phrase in phrases if phrase]
+
+    def __count(self, texts: list[str]) -> np.ndarray:
+        counts = np.zeros((len(texts), self.dim), dtype=np.float32)
+        rows, columns = [], []
+        for row, text in enumerate(texts):
+            features = self.features(text)
+            rows.extend([row] * len(features))
+            columns.extend(features)
+        np.add.at(counts, (rows, columns), 1)
+        return counts
+
+    def __weight(self, counts: np.ndarray) -> np.ndarray:
+        weighted = np.log1p(counts) * self.idf
+        norms = np.linalg.norm(weighted, axis=1, keepdims=True)
+        return weighted / np.where(norms == 0, 1, norms)
@@ -0,0 +1,257 @@
+import asyncio
+import json
+from urllib.parse import parse_qs
+
+from finder.ai_funcs import AsyncGeminiClient
+from finder.analysis import SpecialtyAnalyzer
+from finder.batching import MicroBatcher, QueueFullError
+from finder.classification_cache import ClassificationCache
+from finder.hospital_finder import HospitalFinder
+from finder.matching_engine import PatientDataHandler
+from finder.metrics import METRICS
+from finder.reference_data import ReferenceWatcher
+
+
+class FinderService:
+    """
+    A long-lived ASGI application that serves the finder over HTTP.
+
+    The analyzer, hospital finder and patient data handler are created once and
+    shared by every request. Concurrent classifications are coalesced by a
+    MicroBatcher, so spaCy sees them as one `nlp.pipe` batch and unresolved
+    descriptions share batched Gemini prompts. The patients' distinct
+    descriptions are classified the same way at startup, so /patients can
+    filter by specialty.
+
+    Endpoints:
+        POST /classify   {"description": str} or {"descriptions": [str, ...]}
+        POST /recommend  {"description": str, "location": [lat, lon], "k": int}  (location and k optional)
+        POST /route      {"description": str, "top_k": int}
+        GET  /patients   ?severity=all|low|medium|high|chronic&body_part=...&specialty=...
+        POST /reload     reloads the specialty rules and hospital data from their files
+        GET  /health
+        GET  /metrics    ?format=prometheus|json
+    """
+
+    def __init__(self, analyzer: SpecialtyAnalyzer, hospital_finder: HospitalFinder, async_client,
+                 data_handler: PatientDataHandler | None = None, max_batch_size: int = 64,
+                 max_wait: float = 0.01, max_queue: int = 1024, max_in_flight: int = 4, watcher: ReferenceWatcher | None = None):
+        """
+        Args:
+            analyzer (SpecialtyAnalyzer): Classifies injury descriptions.
+            hospital_finder (HospitalFinder): Matches specialties to hospitals.
+            async_client (AsyncGeminiClient): Escalates what the local tiers cannot resolve.
+            data_handler (PatientDataHandler | None): Serves /patients; the endpoint is disabled without it.
+            max_batch_size (int): The most descriptions classified together.
+            max_wait (float): Seconds a request may wait for its batch to fill.
+            max_queue (int): Waiting requests allowed before new ones get 503.
+            max_in_flight (int): Batches processed at once, e.g. while earlier ones wait on Gemini.
+            watcher (ReferenceWatcher | None): Serves /reload and polls the reference files while
+                the service runs; the endpoint is disabled without it.
+        """
+        self.analyzer = analyzer
+        self.hospital_finder = hospital_finder
+        self.async_client = async_client
+        self.data_handler = data_handler
+        self.watcher = watcher
+        self.batcher = MicroBatcher(self.__classify_batch, max_batch_size, max_wait, max_queue, max_in_flight)
+        # Batches overlap while they wait on Gemini; their CPU-bound local tiers take turns.
+        self.__local_lock = asyncio.Lock()
+        # Held while the patients' specialties are classified, so they are classified once.
+        self.__index_lock = asyncio.Lock()
+
+        self.__routes = {
+            ('POST', '/classify'): self.__classify,
+            ('POST', '/recommend'): self.__recommend,
+            ('POST', '/route'): self.__route,
+            ('GET', '/patients'): self.__patients,
+            ('POST', '/reload'): self.__reload,
+            ('GET', '/health'): self.__health,
+            ('GET', '/metrics'): self.__metrics,
+        }
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'lifespan':
+            await self.__lifespan(receive, send)
+            return
+        if scope['type'] != 'http':
+            return
+
+        handler = self.__routes.get((scope['method'], scope['path']))
+        if handler is None:
+            await self.__respond(send, 404, {'error': f"No route for {scope['method']} {scope['path']}."})
+            return
+
+        try:
+            body = await self.__read_body(receive)
+            payload = json.loads(body) if body else {}
+            if not isinstance(payload, dict):
+                raise ValueError("The request body must be a JSON object.")
+            status, result = await handler(payload, scope)
+        except QueueFullError as e:
+            status, result = 503, {'error': str(e)}
+        except (ValueError, KeyError, TypeError) as e:
+            status, result = 400, {'error': str(e)}
+
+        await self.__respond(send, status, result)
+
+    async def __classify(self, payload: dict, scope) -> tuple[int, dict]:
+        if 'descriptions' in payload:
+            descriptions = payload['descriptions']
+            if not isinstance(descriptions, list) or not all(isinstance(d, str) for d in descriptions):
+                raise ValueError("'descriptions' must be a list of strings.")
+            specialties = await asyncio.gather(*(self.batcher.submit(description) for description in descriptions))
+            return 200, {'specialties': specialties}
+
+        description = self.__description(payload)
+        return 200, {'specialty': await self.batcher.submit(description)}
+
+    async def __recommend(self, payload: dict, scope) -> tuple[int, dict]:
+        description = self.__description(payload)
+        location = payload.get('location')
+        if location is not None and (not isinstance(location, list) or len(location) != 2
+                                     or not all(isinstance(value, (int, float)) for value in location)):
+            raise ValueError("'location' must be a [latitude, longitude] pair.")
+        k = payload.get('k', 3)
+        if not isinstance(k, int) or k < 1:
+            raise ValueError("'k' must be a positive integer.")
+        specialty = await self.batcher.submit(description)
+
+        hospitals = None
+        if 'Error' not in specialty:
+            hospitals = self.hospital_finder.get_hospital_by_specialty(specialty, location, k)
+        if location is None and hospitals:
+            hospitals = self.hospital_finder.sort_hospitals_by_busyness(hospitals)
+
+        return 200, {'specialty': specialty, 'hospitals': list(hospitals or [])}
+
+    async def __route(self, payload: dict, scope) -> tuple[int, dict]:
+        description = self.__description(payload)
+        top_k = payload.get('top_k', 3)
+        if not isinstance(top_k, int) or top_k < 1:
+            raise ValueError("'top_k' must be a positive integer.")
+
+        # Escalations go through the async client, like /classify's; the analyzer has no sync client here.
+        scores = await self.analyzer.classify_async(description, self.async_client, top_k)
+        valid = [score for score in scores if 'Error' not in score.specialty]
+        hospitals = self.hospital_finder.rank_hospitals_by_coverage(valid)
+
+        return 200, {'specialties': [score._asdict() for score in scores],
+                     'hospitals': [{'name': name, 'coverage': coverage} for name, coverage in hospitals]}
+
+    async def __patients(self, payload: dict, scope) -> tuple[int, dict]:
+        if self.data_handler is None:
+            return 404, {'error': "Patient data is not loaded."}
+        query = parse_qs(scope.get('query_string', b'').decode('latin-1'))
+        specialty = query.get('specialty', [None])[0]
+        if specialty is not None:
+            await self.__index_specialties()
+        patients = self.data_handler.filter_patients(query.get('severity', ['all'])[0],
+                                                     query.get('body_part', [None])[0], specialty)
+        return 200, {'patients': patients.astype(object).where(patients.notna(), None).to_dict(orient='records')}
+
+    async def __reload(self, payload: dict, scope) -> tuple[int, dict]:
+        if self.watcher is None:
+            return 404, {'error': "Reference data reloading is not configured."}
+        # Reloads build their indexes on the side; classifications keep being served meanwhile.
+        changes = await asyncio.to_thread(self.watcher.reload)
+        return 200, {'reloaded': changes, 'versions': self.watcher.versions}
+
+    async def __health(self, payload: dict, scope) -> tuple[int, dict]:
+        versions = {'specialties': self.analyzer.rules.version, 'hospitals': self.hospital_finder.reference_version}
+        return 200, {'status': 'ok', 'batcher': self.batcher.stats, 'tiers': self.analyzer.tier_hits,
+                     'versions': versions}
+
+    async def __metrics(self, payload: dict, scope) -> tuple[int, dict | str]:
+        query = parse_qs(scope.get('query_string', b'').decode('latin-1'))
+        if query.get('format', ['prometheus'])[0] == 'json':
+            return 200, METRICS.snapshot()
+        return 200, METRICS.to_prometheus()
+
+    async def __classify_batch(self, descriptions: list[str]) -> list[str]:
+        async with self.__local_lock:
+            specialties = await asyncio.to_thread(self.analyzer.classify_local, descriptions)
+
+        unresolved = list(dict.fromkeys(text for text, specialty in zip(descriptions, specialties) if specialty is None))
+        if unresolved:
+            answers = await self.analyzer.escalate_many_async(unresolved, self.async_client)
+            specialties = [specialty if specialty is not None else answers[text]
+                           for text, specialty in zip(descriptions, specialties)]
+        return specialties
+
+    async def __index_specialties(self) -> None:
+        # Runs at startup; an app served without lifespan events indexes on the first specialty query.
+        async with self.__index_lock:
+            if self.data_handler.specialties_indexed:
+                return
+            descriptions = await asyncio.to_thread(self.data_handler.patient_descriptions)
+            specialties = await self.__classify_batch(descriptions)
+            self.data_handler.index_specialties(self.analyzer, dict(zip(descriptions, specialties)))
+
+    @staticmethod
+    def __description(payload: dict) -> str:
+        description = payload.get('description')
+        if not isinstance(description, str) or not description.strip():
+            raise ValueError("'description' must be a non-empty string.")
+        return description
+
+    async def __lifespan(self, receive, send) -> None:
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                await self.batcher.start()
+                if self.data_handler is not None:
+                    await self.__index_specialties()
+                if self.watcher is not None:
+                    self.watcher.start()
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                await self.batcher.stop()
+                if self.watcher is not None:
+                    self.watcher.stop()
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+
+    @staticmethod
+    async def __read_body(receive) -> bytes:
+        chunks = []
+        while True:
+            message = await receive()
+            chunks.append(message.get('body', b''))
+            if not message.get('more_body', False):
+                return b''.join(chunks)
+
+    @staticmethod
+    async def __respond(send, status: int, result: dict | str) -> None:
+        if isinstance(result, str):
+            body, content_type = result.encode('utf-8'), b'text/plain; version=0.0.4; charset=utf-8'
+        else:
+            body, content_type = json.dumps(result, ensure_ascii=False).encode('utf-8'), b'application/json'
+        headers = [(b'content-type', content_type), (b'content-length', str(len(body)).encode())]
+        if status == 503:
+            headers.append((b'retry-after', b'1'))
+        await send({'type': 'http.response.start', 'status': status, 'headers': headers})
+        await send({'type': 'http.response.body', 'body': body})
+
+
+def create_app(patient_file: str = "./Data/patientData.csv", hospital_file: str = "./Data/hospitalData.csv",
+               specialties_file: str | None = "./Data/specialties.json",
+               hospital_specialties_file: str | None = "./Data/hospital_specialties.json",
+               reload_interval: float = 5.0, cache_file: str | None = None, **service_options) -> FinderService:
+    """
+    Builds the service with the default components, e.g. for
+    `uvicorn finder.service:create_app --factory`.
+    
+    The specialty rules and hospital specialties are loaded from their files and
+    reloaded every `reload_interval` seconds when those files change. A cache in
+    `cache_file` is attached after the rules load, so its answers survive restarts.
+    """
+    async_client = AsyncGeminiClient()
+    analyzer = SpecialtyAnalyzer(ai_client=None)
+    hospital_finder = HospitalFinder(hospital_file)
+    data_handler = PatientDataHandler(patient_file, hospital_file)
+    watcher = ReferenceWatcher(analyzer, hospital_finder, specialties_file, hospital_specialties_file, reload_interval)
+    watcher.load()
+    if cache_file is not None:
+        analyzer.use_cache(ClassificationCache(cache_file))
+    return FinderService(analyzer, hospital_finder, async_client, data_handler, watcher=watcher, **service_options)
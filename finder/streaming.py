@@ -0,0 +1,223 @@
+import json
+import os
+from abc import ABC, abstractmethod
+
+import pandas as pd
+
+from finder.matching_engine import PatientDataHandler
+
+
+class ResultSink(ABC):
+    """
+    Base class for an append-only destination of result chunks.
+
+    A sink reports a `position()` after each write. The position is saved in
+    the checkpoint, and a resumed run passes it back so anything written after
+    the last checkpoint, e.g. by a crash mid-chunk, is discarded.
+    """
+
+    def __init__(self, path: str, position=None):
+        self.path = path
+
+    @abstractmethod
+    def write(self, results_df: pd.DataFrame) -> None:
+        """
+        Appends a chunk of results.
+        """
+
+    @abstractmethod
+    def position(self):
+        """
+        Returns where the sink stands after the last write, once it is durable.
+        """
+
+    def close(self) -> None:
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class _TextSink(ResultSink):
+    """
+    A sink backed by one text file; its position is the file's size in bytes.
+    """
+
+    def __init__(self, path: str, position: int | None = None):
+        super().__init__(path)
+        if position is None:
+            self.file = open(path, 'w', encoding='utf-8', newline='')
+        else:
+            self.file = open(path, 'r+', encoding='utf-8', newline='')
+            self.file.truncate(position)
+            self.file.seek(position)
+
+    def position(self) -> int:
+        self.file.flush()
+        os.fsync(self.file.fileno())
+        return self.file.tell()
+
+    def close(self) -> None:
+        self.file.close()
+
+
+class CsvSink(_TextSink):
+    """
+    Writes results as CSV. Hospital lists are joined with '; '.
+    """
+
+    def write(self, results_df: pd.DataFrame) -> None:
+        results_df = results_df.assign(**{
+            'Hospital(s)': results_df['Hospital(s)'].map(lambda names: '; '.join(names) if names else '')
+        })
+        results_df.to_csv(self.file, header=self.file.tell() == 0, index=False)
+
+
+class JsonlSink(_TextSink):
+    """
+    Writes results as one JSON object per line.
+    """
+
+    def write(self, results_df: pd.DataFrame) -> None:
+        results_df = results_df.astype(object).where(results_df.notna(), None)
+        for record in results_df.to_dict(orient='records'):
+            if record['Hospital(s)'] is not None:
+                record['Hospital(s)'] = list(record['Hospital(s)'])
+            self.file.write(json.dumps(record, ensure_ascii=False) + '\n')
+
+
+class ParquetSink(ResultSink):
+    """
+    Writes results as a directory of Parquet part files, one per chunk.
+
+    Its position is the number of parts written. Requires `pyarrow`.
+    """
+
+    def __init__(self, path: str, position: int | None = None):
+        super().__init__(path)
+        os.makedirs(path, exist_ok=True)
+        self.parts = position or 0
+        for name in os.listdir(path):
+            if name.startswith('part-') and int(name[5:10]) >= self.parts:
+                os.remove(os.path.join(path, name))
+
+    def write(self, results_df: pd.DataFrame) -> None:
+        results_df = results_df.assign(**{
+            'Hospital(s)': results_df['Hospital(s)'].map(lambda names: list(names) if names else None)
+        })
+        results_df.to_parquet(os.path.join(self.path, f"part-{self.parts:05d}.parquet"), index=False)
+        self.parts += 1
+
+    def position(self) -> int:
+        return self.parts
+
+
+SINKS = {'.csv': CsvSink, '.jsonl': JsonlSink, '.parquet': ParquetSink}
+
+
+def open_sink(path: str, position=None) -> ResultSink:
+    """
+    Opens the sink matching the output path's extension (.csv, .jsonl or .parquet).
+
+    Args:
+        path (str): The output path.
+        position: A position from a previous run's checkpoint to resume from, or None to start over.
+    """
+    extension = os.path.splitext(path)[1].lower()
+    if extension not in SINKS:
+        raise ValueError(f"Unsupported output format '{extension}'. Choose one of {sorted(SINKS)}.")
+    return SINKS[extension](path, position)
+
+
+class StreamCheckpoint:
+    """
+    Records the last PatientID whose results are safely in the sink.
+
+    The checkpoint is a small JSON file next to the output, replaced atomically
+    after every chunk.
+    """
+
+    def __init__(self, output_path: str):
+        self.path = output_path + '.checkpoint'
+
+    def load(self) -> dict | None:
+        """
+        Returns the saved state ('last_patient_id', 'position', 'rows'), or None if there is none.
+        """
+        if not os.path.exists(self.path):
+            return None
+        with open(self.path, encoding='utf-8') as f:
+            return json.load(f)
+
+    def save(self, last_patient_id: str, position, rows: int) -> None:
+        tmp_path = self.path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({'last_patient_id': last_patient_id, 'position': position, 'rows': rows}, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.path)
+
+    def clear(self) -> None:
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+
+def stream_results(patient_file: str, output_path: str, analyzer, hospital_finder,
+                   chunksize: int = 10_000, resume: bool = True, classifier=None) -> int:
+    """
+    Classifies every patient in a file and writes the recommendations to a sink, chunk by chunk.
+
+    Memory use is bounded by the chunk size. After each chunk, the checkpoint
+    records the last PatientID written, so an interrupted run picks up from
+    there when started again with `resume=True`.
+
+    Args:
+        patient_file (str): Path to the patient data CSV file.
+        output_path (str): Where to write results; the extension picks the format.
+        analyzer (SpecialtyAnalyzer): Classifies the injury descriptions.
+        hospital_finder (HospitalFinder): Matches specialties to hospitals.
+        chunksize (int): The number of patients processed per chunk.
+        resume (bool): Continue from the checkpoint if one exists, instead of starting over.
+        classifier (ParallelClassifier | None): Classifies the chunks in worker processes;
+            None classifies them one at a time with `analyzer`.
+
+    Returns:
+        int: The total number of result rows in the output.
+    """
+    checkpoint = StreamCheckpoint(output_path)
+    state = checkpoint.load() if resume else None
+    if state is None:
+        state = {'last_patient_id': None, 'position': None, 'rows': 0}
+    else:
+        print(f"Resuming after PatientID {state['last_patient_id']} ({state['rows']} rows already written).")
+
+    rows = state['rows']
+    chunks = PatientDataHandler.iter_patient_chunks(patient_file, chunksize, after_id=state['last_patient_id'])
+
+    if classifier is not None:
+        classified = classifier.map_chunks(chunks)
+    else:
+        classified = ((chunk, analyzer.get_specialties(chunk['Injury/Sickness'])) for chunk in chunks)
+
+    with open_sink(output_path, state['position']) as sink:
+        for chunk, specialties in classified:
+            hospitals = [None if 'Error' in specialty else hospital_finder.get_hospital_by_specialty(specialty)
+                         for specialty in specialties]
+
+            results_df = pd.DataFrame({
+                'PatientID': chunk['PatientID'].to_numpy(),
+                'Injury': chunk['Injury/Sickness'].to_numpy(),
+                'Determined_Speciality': specialties,
+                'Hospital(s)': hospitals
+            })
+            sink.write(results_df)
+
+            rows += len(results_df)
+            checkpoint.save(str(chunk['PatientID'].iloc[-1]), sink.position(), rows)
+            print(f"Processed {rows} patients.")
+
+    checkpoint.clear()
+    return rows
@@ -0,0 +1,231 @@
+import heapq
+import itertools
+import threading
+import time
+from collections import OrderedDict, deque
+from typing import Iterator
+
+import pandas as pd
+
+from finder.analysis import SpecialtyAnalyzer
+from finder.hospital_finder import HospitalFinder
+from finder.metrics import METRICS
+
+
+class TriageScheduler:
+    """
+    Classifies and routes patients in order of severity instead of file order.
+
+    Submitted patients are split by their standardized 'Severity' into batches
+    on a heap, so a 'High' batch submitted behind a backlog of millions of
+    low-acuity rows is still the next one processed. The lanes are:
+
+    - 'High' is the critical lane. It is escalated to Gemini straight away and
+      routed to emergency-capable hospitals offering the specialty, least busy
+      first. Without one, it goes to the emergency departments offering
+      'Trauma/Critical Care', and failing those to the specialty's hospitals;
+      'Emergency_Route' records which ('specialty', 'trauma' or 'none').
+    - 'Medium' and 'Unknown' form the standard lane, routed like `stream_results`.
+    - 'Low' and 'Chronic' form the background lane. Rows the local tiers resolve are
+      routed at once. Their Gemini escalations are deferred until no critical
+      or standard work is queued.
+
+    `submit` may be called from other threads while `run` is consuming.
+    """
+
+    # Heap priority of each severity level; lower runs first.
+    PRIORITIES = {'High': 0, 'Medium': 1, 'Unknown': 1, 'Low': 2, 'Chronic': 2}
+    LANES = ('critical', 'standard', 'background')
+
+    RESULT_COLUMNS = ['PatientID', 'Severity', 'Injury', 'Determined_Speciality', 'Hospital(s)', 'Emergency_Route']
+
+    # Where critical patients go when no emergency department offers their specialty.
+    FALLBACK_SPECIALTY = 'Trauma/Critical Care'
+
+    def __init__(self, analyzer: SpecialtyAnalyzer, hospital_finder: HospitalFinder, batch_size: int = 256,
+                 escalation_batch_size: int = 20, max_answers: int = 100_000):
+        """
+        Args:
+            analyzer (SpecialtyAnalyzer): Classifies the injury descriptions.
+            hospital_finder (HospitalFinder): Matches specialties to hospitals.
+            batch_size (int): The most rows processed at once, which bounds how long a
+                newly submitted critical batch can wait.
+            escalation_batch_size (int): The number of descriptions per Gemini request.
+            max_answers (int): The most Gemini answers kept for reuse by later batches.
+        """
+        self.analyzer = analyzer
+        self.hospital_finder = hospital_finder
+        self.batch_size = batch_size
+        self.escalation_batch_size = escalation_batch_size
+        self.max_answers = max_answers
+
+        # Rows processed per lane; 'deferred' counts background rows whose escalation waited.
+        self.stats = {lane: 0 for lane in self.LANES} | {'deferred': 0}
+
+        self.__queue = []
+        self.__deferred = deque()
+        # Recent Gemini answers by description, least recently used first, so a repeated
+        # description is not escalated again while it stays among the last `max_answers`.
+        # Errors are not kept, so a description that failed is retried with its next batch.
+        self.__answers = OrderedDict()
+        self.__sequence = itertools.count()
+        self.__condition = threading.Condition()
+        self.__closed = False
+
+    def submit(self, patients: pd.DataFrame) -> int:
+        """
+        Queues patients, e.g. a chunk from `PatientDataHandler.iter_patient_chunks`.
+
+        Args:
+            patients (pd.DataFrame): Rows with 'PatientID', 'Injury/Sickness' and a standardized 'Severity'.
+
+        Returns:
+            int: The number of batches queued.
+        """
+        groups = patients.groupby('Severity', observed=True, sort=False).indices
+        now = time.perf_counter()
+        batches = 0
+        with self.__condition:
+            if self.__closed:
+                raise ValueError("The scheduler is closed.")
+            for level, positions in groups.items():
+                priority = self.PRIORITIES.get(level, self.PRIORITIES['Unknown'])
+                for start in range(0, len(positions), self.batch_size):
+                    batch = patients.iloc[positions[start:start + self.batch_size]]
+                    heapq.heappush(self.__queue, (priority, next(self.__sequence), now, batch))
+                    batches += 1
+            self.__condition.notify_all()
+        return batches
+
+    def close(self) -> None:
+        """
+        Stops accepting patients; `run(wait=True)` returns once everything queued is done.
+        """
+        with self.__condition:
+            self.__closed = True
+            self.__condition.notify_all()
+
+    def pending(self) -> int:
+        """
+        Returns the number of queued batches, not counting deferred escalations.
+        """
+        with self.__condition:
+            return len(self.__queue)
+
+    def run(self, wait: bool = False, finish_deferred: bool = True) -> Iterator[pd.DataFrame]:
+        """
+        Processes the queue, most severe first.
+
+        Args:
+            wait (bool): Keep waiting for submissions until `close` is called, instead of
+                returning when the queue is empty.
+            finish_deferred (bool): Escalate the deferred background rows once the queue is empty.
+                False returns instead and keeps them for a later call, e.g. while more
+                patients are still to be submitted.
+
+        Yields:
+            pd.DataFrame: Results with RESULT_COLUMNS, one frame per processed batch.
+        """
+        while True:
+            with self.__condition:
+                while wait and not self.__queue and not (finish_deferred and self.__deferred) and not self.__closed:
+                    self.__condition.wait()
+                if self.__queue:
+                    priority, _, queued_at, batch = heapq.heappop(self.__queue)
+                    deferred = None
+                elif finish_deferred and self.__deferred:
+                    deferred = self.__deferred.popleft()
+                else:
+                    return
+
+            if deferred is not None:
+                results = self.__finish_deferred(*deferred)
+            else:
+                results = self.__process(priority, queued_at, batch)
+            if results is not None:
+                yield results
+
+    def __process(self, priority: int, queued_at: float, batch: pd.DataFrame) -> pd.DataFrame | None:
+        lane = self.LANES[priority]
+        METRICS.observe('triage_wait', time.perf_counter() - queued_at, lane=lane)
+        self.stats[lane] += len(batch)
+
+        with METRICS.span('triage_batch', lane=lane):
+            texts = [text if isinstance(text, str) else '' for text in batch['Injury/Sickness'].tolist()]
+            specialties = self.analyzer.classify_local(texts)
+
+            if lane == 'background' and None in specialties:
+                # Gemini waits until nothing more urgent is queued; the resolved rows go out now.
+                unresolved = [i for i, specialty in enumerate(specialties) if specialty is None]
+                resolved = [i for i, specialty in enumerate(specialties) if specialty is not None]
+                with self.__condition:
+                    # One Gemini request per deferred piece, so a critical batch never waits behind more than one.
+                    for start in range(0, len(unresolved), self.escalation_batch_size):
+                        piece = unresolved[start:start + self.escalation_batch_size]
+                        self.__deferred.append((batch.iloc[piece], [texts[i] for i in piece]))
+                self.stats['deferred'] += len(unresolved)
+                if not resolved:
+                    return None
+                batch = batch.iloc[resolved]
+                specialties = [specialties[i] for i in resolved]
+            else:
+                specialties = self.__escalate(texts, specialties)
+
+            return self.__route(batch, specialties, critical=lane == 'critical')
+
+    def __finish_deferred(self, batch: pd.DataFrame, texts: list[str]) -> pd.DataFrame:
+        with METRICS.span('triage_batch', lane='background'):
+            specialties = self.__escalate(texts, [None] * len(texts))
+            return self.__route(batch, specialties, critical=False)
+
+    def __escalate(self, texts: list[str], specialties: list[str | None]) -> list[str]:
+        answers = {}
+        for text in dict.fromkeys(text for text, specialty in zip(texts, specialties) if specialty is None):
+            if text in self.__answers:
+                self.__answers.move_to_end(text)
+                answers[text] = self.__answers[text]
+        unresolved = [text for text, specialty in zip(texts, specialties) if specialty is None and text not in answers]
+        if unresolved:
+            escalated = self.analyzer.escalate_many(list(dict.fromkeys(unresolved)), self.escalation_batch_size)
+            answers.update(escalated)
+            for text, answer in escalated.items():
+                if 'Error' not in answer:
+                    self.__answers[text] = answer
+                    if len(self.__answers) > self.max_answers:
+                        self.__answers.popitem(last=False)
+        return [specialty if specialty is not None else answers[text] for text, specialty in zip(texts, specialties)]
+
+    def __route(self, batch: pd.DataFrame, specialties: list[str], critical: bool) -> pd.DataFrame:
+        finder = self.hospital_finder
+        routes = {}
+        for specialty in dict.fromkeys(specialties):
+            if 'Error' in specialty:
+                routes[specialty] = (None, None)
+            elif critical:
+                routes[specialty] = self.__route_critical(specialty)
+            else:
+                routes[specialty] = (finder.get_hospital_by_specialty(specialty), None)
+        hospitals = [routes[specialty][0] for specialty in specialties]
+        emergency_routes = [routes[specialty][1] for specialty in specialties]
+
+        return pd.DataFrame({
+            'PatientID': batch['PatientID'].to_numpy(),
+            'Severity': batch['Severity'].astype(object).to_numpy(),
+            'Injury': batch['Injury/Sickness'].to_numpy(),
+            'Determined_Speciality': specialties,
+            'Hospital(s)': hospitals,
+            'Emergency_Route': emergency_routes,
+        }, columns=self.RESULT_COLUMNS)
+
+    def __route_critical(self, specialty: str) -> tuple[tuple[str, ...] | None, str]:
+        # A critical patient without a matching emergency department still needs one that can
+        # stabilize them, not any department with 'emergency care' set, e.g. a psychiatric one.
+        finder = self.hospital_finder
+        names = finder.get_emergency_hospitals(specialty)
+        route = 'specialty'
+        if not names:
+            names = finder.get_emergency_hospitals(self.FALLBACK_SPECIALTY)
+            route = 'trauma'
+        if names:
+            return tuple(finder.sort_hospitals_by_busyness(names)), route
+        return finder.get_hospital_by_specialty(specialty), 'none'
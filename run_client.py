@@ -1,19 +1,42 @@
 import pandas as pd
 
 from finder.ai_funcs import GeminiClient as ac
+from finder.classification_cache import ClassificationCache
+from finder.columnar import convert_csv
 from finder.analysis import SpecialtyAnalyzer as sa
 from finder.hospital_finder import HospitalFinder as hf
 from finder.matching_engine import PatientDataHandler as pdh
+from finder.parallel import ParallelClassifier
+from finder.reference_data import ReferenceWatcher
+from finder.streaming import stream_results
+from finder.triage import TriageScheduler
 
 
-def setup():
-    global ai_client, analyzer, hospital_finder, data_handler
+PATIENT_FILE = "./Data/patientData.csv"
+HOSPITAL_FILE = "./Data/hospitalData.csv"
+SPECIALTIES_FILE = "./Data/specialties.json"
+HOSPITAL_SPECIALTIES_FILE = "./Data/hospital_specialties.json"
+
+
+def setup(cache_file: str | None = None):
+    """
+    Initializes the shared components and loads the reference files.
+    
+    Args:
+        cache_file (str | None): SQLite file of a ClassificationCache kept across runs.
+            It is attached once the specialty rules are loaded, so it survives restarts.
+    """
+    global ai_client, analyzer, hospital_finder, data_handler, watcher
     
     try:
         ai_client = ac()
         analyzer = sa(ai_client)
-        hospital_finder = hf("./Data/hospitalData.csv") 
-        data_handler = pdh("./Data/patientData.csv", "./Data/hospitalData.csv")
+        hospital_finder = hf(HOSPITAL_FILE) 
+        data_handler = pdh(PATIENT_FILE, HOSPITAL_FILE)
+        watcher = ReferenceWatcher(analyzer, hospital_finder, SPECIALTIES_FILE, HOSPITAL_SPECIALTIES_FILE)
+        watcher.load()
+        if cache_file is not None:
+            analyzer.use_cache(ClassificationCache(cache_file))
         print("All components initialized successfully.")
         print(25*'-')
     
@@ -21,7 +44,7 @@ def setup():
         print(f"Error during setup: {e}")
         raise
     
-def get_results_single(name: str, injury_desc: str):
+def get_results_single(name: str, injury_desc: str, location: tuple[float, float] | None = None):
     """
     Takes a patient's name and injury description, determines the specialty needed,
     and finds hospitals that can treat the injury.
@@ -29,6 +52,8 @@ def get_results_single(name: str, injury_desc: str):
     Args:
         name (str): The name of the patient.
         injury_desc (str): A description of the patient's injury or sickness.
+        location (tuple[float, float] | None): The patient's (latitude, longitude). If given,
+            the nearest suitable hospitals are recommended instead of all of them.
         
     Returns:
         None
@@ -40,7 +65,7 @@ def get_results_single(name: str, injury_desc: str):
         print(f"Error determining specialty for '{name}': {determined_speciality}")
         return
     
-    hospital_names = hospital_finder.get_hospital_by_specialty(determined_speciality)
+    hospital_names = hospital_finder.get_hospital_by_specialty(determined_speciality, location)
     
     if not hospital_names:
         print(f"No hospitals found for specialty '{determined_speciality}' for patient '{name}'.")
@@ -49,12 +74,63 @@ def get_results_single(name: str, injury_desc: str):
     print(f"Patient: {name}")
     print(f"Injury/Sickness: {injury_desc}")
     print(f"Determined Specialty: {determined_speciality}")
-    print("Recommended Hospital(s):")
+    
+    if location is not None:
+        print("Recommended Hospital(s), nearest and least busy first:")
+    else:
+        print("Recommended Hospital(s), least busy first:")
+        hospital_names = hospital_finder.sort_hospitals_by_busyness(hospital_names)
     
     for hospital in hospital_names:
         print(f"- {hospital}")
 
-def get_results_csv():
+def get_results_ranked(name: str, injury_desc: str, top_k: int = 3):
+    """
+    Like `get_results_single`, but for patients whose condition involves several
+    specialties: ranks hospitals by how much of the weighted set of specialties
+    they cover.
+    
+    Args:
+        name (str): The name of the patient.
+        injury_desc (str): A description of the patient's injury or sickness.
+        top_k (int): The most specialties to consider.
+        
+    Returns:
+        None
+    """
+    scores = analyzer.classify(injury_desc, top_k)
+    
+    if any('Error' in score.specialty for score in scores):
+        print(f"Error determining specialty for '{name}': {scores[0].specialty}")
+        return
+    
+    ranked = hospital_finder.rank_hospitals_by_coverage(scores)
+    
+    print(f"Patient: {name}")
+    print(f"Injury/Sickness: {injury_desc}")
+    print(f"Determined Specialties ({scores[0].source}):")
+    for score in scores:
+        print(f"- {score.specialty}: {score.score:.2f}")
+    
+    if not ranked:
+        print("No hospitals found for these specialties.")
+        return
+    
+    print("Recommended Hospital(s), best coverage first:")
+    for hospital, coverage in ranked:
+        print(f"- {hospital} ({coverage:.0%})")
+
+def get_results_csv(limit: int | None = 10):
+    """
+    Classifies the patients in the patient data file and prints a report of
+    their recommended hospitals.
+    
+    Args:
+        limit (int | None): The number of patients to process, or None for all of them.
+        
+    Returns:
+        None
+    """
     patient_data = data_handler.get_patient_data_basic('all')
     
     if patient_data is None:
@@ -67,11 +143,12 @@ def get_results_csv():
     
     results_list = []
     
-    for index, row in patient_data.head(10).iterrows():
-        patient_id = row['PatientID']
-        injury = row['Injury/Sickness']
-        
-        determined_speciality = analyzer.get_specialty(injury)
+    if limit is not None:
+        patient_data = patient_data.head(limit)
+    specialties = analyzer.get_specialties(patient_data['Injury/Sickness'])
+    
+    for patient_id, injury, determined_speciality in zip(patient_data['PatientID'], patient_data['Injury/Sickness'], specialties):
+        hospital_names = None
         
         if 'Error' not in determined_speciality:
             hospital_names = hospital_finder.get_hospital_by_specialty(determined_speciality)
@@ -97,6 +174,112 @@ def get_results_csv():
     print(results_df)
         
 
+def get_results_stream(output_path: str, chunksize: int = 10_000, resume: bool = True):
+    """
+    Processes the whole patient data file in chunks and writes the results to
+    `output_path` (.csv, .jsonl or .parquet) instead of printing them.
+    
+    Memory use stays constant regardless of the file's size, and an interrupted
+    run resumes after the last completed PatientID.
+    
+    Args:
+        output_path (str): Where to write the results.
+        chunksize (int): The number of patients processed per chunk.
+        resume (bool): Continue from the last checkpoint if there is one.
+        
+    Returns:
+        None
+    """
+    rows = stream_results(PATIENT_FILE, output_path, analyzer, hospital_finder, chunksize=chunksize, resume=resume)
+    print(f"Wrote {rows} results to '{output_path}'.")
+        
+
+def get_results_parallel(output_path: str, workers: int | None = None, chunksize: int = 10_000,
+                         resume: bool = True):
+    """
+    Like `get_results_stream`, but classifies the chunks on a pool of worker
+    processes, one per CPU by default. The output is identical to a sequential run.
+    
+    Args:
+        output_path (str): Where to write the results.
+        workers (int | None): The number of worker processes, or None for one per CPU.
+        chunksize (int): The number of patients processed per chunk.
+        resume (bool): Continue from the last checkpoint if there is one.
+        
+    Returns:
+        None
+    """
+    with ParallelClassifier(analyzer, workers) as classifier:
+        rows = stream_results(PATIENT_FILE, output_path, analyzer, hospital_finder, chunksize=chunksize,
+                              resume=resume, classifier=classifier)
+    print(f"Wrote {rows} results to '{output_path}' using {classifier.workers} worker(s).")
+        
+
+def get_results_triage(limit: int | None = 10, chunksize: int = 50_000):
+    """
+    Classifies the patients in the patient data file most severe first and
+    prints their recommendations as they are made. 'High' severity patients
+    are only routed to emergency-capable hospitals, and Gemini escalations for
+    'Low' and 'Chronic' patients wait until everything more urgent is done.
+    
+    Args:
+        limit (int | None): The number of results to print, or None for all of them.
+        chunksize (int): The number of patients read from the file at a time.
+        
+    Returns:
+        None
+    """
+    scheduler = TriageScheduler(analyzer, hospital_finder)
+    
+    def triaged():
+        # Each chunk is processed before the next is read, so only one chunk and the
+        # deferred background rows are held at once.
+        for chunk in data_handler.iter_patient_chunks(PATIENT_FILE, chunksize):
+            scheduler.submit(chunk)
+            yield from scheduler.run(finish_deferred=False)
+        yield from scheduler.run()
+    
+    printed = 0
+    for results_df in triaged():
+        if limit is not None:
+            results_df = results_df.head(limit - printed)
+        print(results_df.to_string(index=False, header=printed == 0))
+        printed += len(results_df)
+        if limit is not None and printed >= limit:
+            break
+    print(f"Processed by lane: {scheduler.stats}")
+        
+
+def reload_reference_data():
+    """
+    Reloads the specialty rules, hospital specialties and hospital data whose
+    files changed since setup or the last reload, without restarting.
+    
+    Returns:
+        None
+    """
+    changes = watcher.check()
+    for source, changed in changes.items():
+        print(f"Reloaded {source.replace('_', ' ')}: {changed}")
+    if not changes:
+        print("Reference data is unchanged.")
+    print(f"Versions in use: {watcher.versions}")
+        
+
+def convert_data():
+    """
+    Writes memory-mappable columnar copies of the patient and hospital files.
+    
+    Later runs load those copies instead of parsing the CSVs, as long as the
+    CSVs are not modified; re-run this after editing them.
+    
+    Returns:
+        None
+    """
+    for data_file in (PATIENT_FILE, HOSPITAL_FILE):
+        print(f"Converted '{data_file}' to '{convert_csv(data_file)}'.")
+        
+
 if __name__ == "__main__":
     setup()
     get_results_single("John Doe", "Severe headache and dizziness")
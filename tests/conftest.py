@@ -0,0 +1,61 @@
+import asyncio
+import os
+import sys
+from types import SimpleNamespace
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+HOSPITAL_FILE = os.path.join(ROOT, 'Data', 'hospitalData.csv')
+
+
+@pytest.fixture(autouse=True)
+def english_pipeline(monkeypatch):
+    """
+    Uses en_core_web_sm when it is installed. Otherwise a blank English pipeline
+    that marks every token as its own noun-chunk root stands in for it, so the
+    parse tier runs without the model download.
+    """
+    import spacy
+    from spacy.language import Language
+    from spacy.util import is_package
+
+    if is_package('en_core_web_sm'):
+        return
+
+    if 'test_noun_roots' not in Language.factories:
+        @Language.component('test_noun_roots')
+        def noun_roots(doc):
+            for token in doc:
+                token.pos_, token.dep_, token.head = 'NOUN', 'ROOT', token
+            return doc
+
+    def load(name, **kwargs):
+        nlp = spacy.blank('en')
+        nlp.add_pipe('test_noun_roots', name='parser')
+        return nlp
+
+    monkeypatch.setattr(spacy, 'load', load)
+
+
+class StubModel:
+    """
+    Stands in for a Gemini model handle, answering every prompt with `answer` after `delay` seconds.
+    """
+
+    def __init__(self, answer: str, delay: float = 0.0):
+        self.answer = answer
+        self.delay = delay
+        self.prompts = []
+
+    async def generate_content_async(self, prompt: str):
+        self.prompts.append(prompt)
+        await asyncio.sleep(self.delay)
+        return SimpleNamespace(text=self.answer)
+
+
+@pytest.fixture
+def stub_model():
+    return StubModel('Genetics')
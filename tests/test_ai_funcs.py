@@ -0,0 +1,130 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+import finder.rate_limit
+from finder.ai_funcs import AsyncGeminiClient, is_retryable
+from finder.rate_limit import TokenBucket
+
+
+class APIError(Exception):
+    def __init__(self, code):
+        super().__init__(f"HTTP {code}")
+        self.code = code
+
+
+class ConcurrencyModel:
+    """
+    Echoes every prompt after `delay` seconds, tracking how many requests were in flight at once.
+    """
+
+    def __init__(self, delay=0.01):
+        self.delay = delay
+        self.in_flight = 0
+        self.peak = 0
+
+    async def generate_content_async(self, prompt):
+        self.in_flight += 1
+        self.peak = max(self.peak, self.in_flight)
+        await asyncio.sleep(self.delay)
+        self.in_flight -= 1
+        return SimpleNamespace(text=prompt.upper())
+
+
+class FlakyModel:
+    """
+    Raises the given errors in turn, then answers.
+    """
+
+    def __init__(self, *errors):
+        self.errors = list(errors)
+        self.calls = 0
+
+    async def generate_content_async(self, prompt):
+        self.calls += 1
+        if self.errors:
+            raise self.errors.pop(0)
+        return SimpleNamespace(text='Cardiology')
+
+
+def client_for(model, **options):
+    options.setdefault('requests_per_second', 1000)
+    options.setdefault('base_delay', 0.001)
+    return AsyncGeminiClient(model_factory=lambda name: model, **options)
+
+
+def test_in_flight_requests_are_capped_and_answers_keep_their_order():
+    model = ConcurrencyModel()
+    client = client_for(model, max_in_flight=3)
+    prompts = [f"prompt {i}" for i in range(10)]
+
+    assert asyncio.run(client.generate_many(prompts)) == [prompt.upper() for prompt in prompts]
+    assert model.peak == 3
+
+
+def test_token_bucket_allows_a_burst_then_spaces_requests_at_the_rate(monkeypatch):
+    now = [100.0]
+    monkeypatch.setattr(finder.rate_limit.time, 'monotonic', lambda: now[0])
+    bucket = TokenBucket(rate=10, capacity=2)
+
+    assert [bucket.reserve() for _ in range(4)] == pytest.approx([0.0, 0.0, 0.1, 0.2])
+
+    now[0] += 1.0
+    # A second refills ten tokens, but the bucket holds at most two after paying its debt.
+    assert [bucket.reserve() for _ in range(3)] == pytest.approx([0.0, 0.0, 0.1])
+
+
+def test_rate_limited_client_waits_for_tokens():
+    client = client_for(ConcurrencyModel(delay=0), requests_per_second=50, burst=1)
+
+    async def timed():
+        loop = asyncio.get_running_loop()
+        start = loop.time()
+        await client.generate_many([f"prompt {i}" for i in range(6)])
+        return loop.time() - start
+
+    # The first request spends the burst; the other five wait 1/50 s each.
+    assert asyncio.run(timed()) >= 0.09
+
+
+def test_retryable_failures_are_retried_until_they_succeed():
+    model = FlakyModel(APIError(429), APIError(503), TimeoutError())
+    client = client_for(model, max_retries=4)
+
+    assert asyncio.run(client.generate_text('prompt')) == 'Cardiology'
+    assert model.calls == 4
+
+
+def test_retries_give_up_after_max_retries():
+    model = FlakyModel(*[APIError(503)] * 5)
+    client = client_for(model, max_retries=2)
+
+    assert asyncio.run(client.generate_text('prompt')) is None
+    assert model.calls == 3
+
+
+def test_other_failures_are_not_retried():
+    model = FlakyModel(APIError(400))
+
+    assert asyncio.run(client_for(model).generate_text('prompt')) is None
+    assert model.calls == 1
+    assert not is_retryable(ValueError('bad prompt'))
+
+
+def test_backoff_ceiling_doubles_up_to_max_delay():
+    client = AsyncGeminiClient(base_delay=0.5, max_delay=3.0)
+
+    for attempt, ceiling in enumerate([0.5, 1.0, 2.0, 3.0, 3.0]):
+        delays = [client.backoff_delay(attempt) for _ in range(200)]
+        assert 0 <= min(delays) and max(delays) <= ceiling
+        assert max(delays) > ceiling / 2
+
+
+def test_a_model_that_cannot_be_created_fails_the_request_like_the_sync_client():
+    def unconfigured(name):
+        raise ValueError("GEMINI_KEY not found.")
+
+    client = AsyncGeminiClient(requests_per_second=1000, model_factory=unconfigured)
+
+    assert asyncio.run(client.generate_many(['prompt', 'prompt'])) == [None, None]
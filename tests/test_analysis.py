@@ -0,0 +1,140 @@
+import asyncio
+import json
+import os
+import re
+from types import SimpleNamespace
+
+import pandas as pd
+
+from conftest import ROOT
+from finder.ai_funcs import AsyncGeminiClient
+from finder.analysis import SpecialtyAnalyzer
+from finder.classification_cache import ClassificationCache
+
+
+class ClinicGemini:
+    """
+    Answers single and batch prompts from a description -> specialty map, recording how many prompts it got.
+    """
+
+    SINGLE = re.compile(r"\*\*Patient Injury Description:\*\*\s*'(.*)'", re.DOTALL)
+    ENTRY = re.compile(r'^\s*(\{"index": \d+,.*\})$', re.MULTILINE)
+
+    def __init__(self, answers, default='Genetics'):
+        self.answers = answers
+        self.default = default
+        self.prompts = 0
+
+    def answer(self, description):
+        return self.answers.get(description, self.default)
+
+    def generate_text(self, prompt, model_name=None):
+        self.prompts += 1
+        entries = [json.loads(entry) for entry in self.ENTRY.findall(prompt)]
+        if entries:
+            return json.dumps([{'index': entry['index'], 'specialty': self.answer(entry['description'])}
+                               for entry in entries])
+        return self.answer(self.SINGLE.search(prompt).group(1).strip())
+
+
+def mixed_descriptions():
+    patients = pd.read_csv(os.path.join(ROOT, 'Data', 'patientData.csv'))
+    descriptions = patients['Injury/Sickness'].tolist()[:40]
+    # Held-out conditions for the semantic tier, escalations, repeats and blanks.
+    descriptions += ['Inguinal hernia', 'Sudden loss of vision', 'zzzz qqqq', 'Unspecified presentation 3',
+                     'Acute sinusitis', 'zzzz qqqq', descriptions[0], '', '   ']
+    return descriptions
+
+
+def test_batch_classification_matches_one_at_a_time():
+    answers = {'Unspecified presentation 3': 'Endocrinology', 'Acute sinusitis': 'Otolaryngology (ENT)'}
+    descriptions = mixed_descriptions()
+
+    batch_gemini, single_gemini = ClinicGemini(answers), ClinicGemini(answers)
+    batch = SpecialtyAnalyzer(ai_client=batch_gemini).get_specialties(descriptions, batch_size=8)
+    single = SpecialtyAnalyzer(ai_client=single_gemini)
+
+    assert batch == [single.get_specialty(description) for description in descriptions]
+    assert batch[descriptions.index('Unspecified presentation 3')] == 'Endocrinology'
+    # The distinct escalations share a prompt instead of one each per occurrence.
+    assert batch_gemini.prompts < single_gemini.prompts
+
+
+def test_batch_tier_counts_match_one_at_a_time():
+    descriptions = mixed_descriptions()
+
+    batch = SpecialtyAnalyzer(ai_client=ClinicGemini({}))
+    batch.get_specialties(descriptions)
+    single = SpecialtyAnalyzer(ai_client=ClinicGemini({}))
+    for description in descriptions:
+        single.get_specialty(description)
+
+    assert batch.tier_hits == single.tier_hits
+
+
+class MalformedBatchGemini(ClinicGemini):
+    """
+    Answers batch prompts with a fixed response and single prompts from the map, recording which were asked singly.
+    """
+
+    def __init__(self, batch_response, answers):
+        super().__init__(answers)
+        self.batch_response = batch_response
+        self.asked_singly = []
+
+    def generate_text(self, prompt, model_name=None):
+        if self.ENTRY.search(prompt):
+            return self.batch_response
+        description = self.SINGLE.search(prompt).group(1).strip()
+        self.asked_singly.append(description)
+        return self.answer(description)
+
+    async def generate_content_async(self, prompt):
+        return SimpleNamespace(text=self.generate_text(prompt))
+
+
+UNRESOLVED = [f"Unspecified presentation {i}" for i in range(5)]
+
+# Entry 0 is valid once normalized; 1 names no approved specialty, 2 has none, 3's index is a
+# string, an index past the batch and a bare string are ignored, and 4 is missing.
+MALFORMED_BATCH = ('Sure! [{"index": 0, "specialty": "cardiology "}, {"index": 1, "specialty": "Basket weaving"}, '
+                   '{"index": 2}, {"index": "3", "specialty": "Neurology"}, {"index": 9, "specialty": "Neurology"}, '
+                   '"Neurology"]')
+
+RETRY_ANSWERS = {UNRESOLVED[1]: 'Neurology', UNRESOLVED[2]: 'Oncology', UNRESOLVED[3]: 'Dermatology',
+                 UNRESOLVED[4]: 'Not a specialty'}
+
+
+def test_only_valid_batch_answers_are_accepted_and_the_rest_are_retried_singly(tmp_path):
+    gemini = MalformedBatchGemini(MALFORMED_BATCH, RETRY_ANSWERS)
+    cache = ClassificationCache(str(tmp_path / 'cache.db'))
+    analyzer = SpecialtyAnalyzer(ai_client=gemini, cache=cache)
+
+    answers = analyzer.escalate_many(UNRESOLVED)
+
+    assert answers == dict(zip(UNRESOLVED, ['Cardiology', 'Neurology', 'Oncology', 'Dermatology',
+                                            'General/Minor Care']))
+    assert gemini.asked_singly == UNRESOLVED[1:]
+    assert cache.get(UNRESOLVED[0]) == ('Cardiology', 'gemini')
+    # A retry that still names no approved specialty falls back without being cached.
+    assert cache.get(UNRESOLVED[4]) is None
+
+
+def test_unparseable_batch_answers_are_all_retried_singly():
+    for response in ('I cannot help with that.', '[{"index": 0, "specialty": "Cardiology"', ''):
+        gemini = MalformedBatchGemini(response, dict.fromkeys(UNRESOLVED[:3], 'Nephrology/Urology'))
+
+        assert SpecialtyAnalyzer(ai_client=gemini).escalate_many(UNRESOLVED[:3]) == \
+            dict.fromkeys(UNRESOLVED[:3], 'Nephrology/Urology')
+        assert gemini.asked_singly == UNRESOLVED[:3]
+
+
+def test_async_escalations_validate_batch_answers_the_same_way():
+    gemini = MalformedBatchGemini(MALFORMED_BATCH, RETRY_ANSWERS)
+    client = AsyncGeminiClient(requests_per_second=1000, model_factory=lambda name: gemini)
+
+    answers = asyncio.run(SpecialtyAnalyzer(ai_client=None).escalate_many_async(UNRESOLVED, client))
+
+    assert answers == SpecialtyAnalyzer(ai_client=MalformedBatchGemini(MALFORMED_BATCH, RETRY_ANSWERS)) \
+        .escalate_many(UNRESOLVED)
+    assert sorted(gemini.asked_singly) == UNRESOLVED[1:]
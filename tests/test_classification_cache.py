@@ -0,0 +1,98 @@
+import sqlite3
+
+from finder.analysis import SpecialtyAnalyzer
+from finder.classification_cache import ClassificationCache
+
+
+def stored_rows(db_path) -> int:
+    with sqlite3.connect(db_path) as conn:
+        return conn.execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+
+
+def test_writes_are_buffered_until_flush(tmp_path):
+    db_path = tmp_path / 'cache.db'
+    cache = ClassificationCache(str(db_path), flush_size=100)
+    cache.bind('rules')
+    for i in range(10):
+        cache.put(f'description {i}', 'Cardiology', 'gemini')
+
+    assert stored_rows(db_path) == 0
+    cache.flush()
+    assert stored_rows(db_path) == 10
+    cache.close()
+
+
+def test_buffer_is_written_when_full_and_on_close(tmp_path):
+    db_path = tmp_path / 'cache.db'
+    cache = ClassificationCache(str(db_path), max_entries=2, flush_size=4)
+    cache.bind('rules')
+    for i in range(5):
+        cache.put(f'description {i}', 'Oncology', 'spacy')
+
+    assert stored_rows(db_path) == 4
+    # Evicted from memory but not yet written, so served from the buffer.
+    assert cache.get('description 4') == ('Oncology', 'spacy')
+    cache.close()
+    assert stored_rows(db_path) == 5
+
+    reopened = ClassificationCache(str(db_path))
+    reopened.bind('rules')
+    assert reopened.get('description 0') == ('Oncology', 'spacy')
+
+
+def test_invalidate_drops_buffered_entries(tmp_path):
+    cache = ClassificationCache(str(tmp_path / 'cache.db'))
+    cache.bind('rules')
+    cache.put('chest pain', 'Cardiology', 'spacy')
+    cache.put('rare disease', 'Genetics', 'gemini')
+    cache.invalidate('new rules', tiers={'spacy'})
+    cache.close()
+
+    reopened = ClassificationCache(str(tmp_path / 'cache.db'))
+    reopened.bind('new rules')
+    assert reopened.get('chest pain') is None
+    assert reopened.get('rare disease') == ('Genetics', 'gemini')
+
+
+def test_fingerprint_depends_on_keyword_order():
+    analyzer = SpecialtyAnalyzer(ai_client=None)
+    rules = analyzer.rules
+    keywords = dict(rules.keywords)
+    keywords['Cardiology'] = list(reversed(keywords['Cardiology']))
+    reordered = SpecialtyAnalyzer(ai_client=None, rules=SpecialtyAnalyzer.build_rules(
+        rules.specialties, keywords, rules.descriptions, rules.synonyms))
+    shuffled = SpecialtyAnalyzer(ai_client=None, rules=SpecialtyAnalyzer.build_rules(
+        rules.specialties, dict(reversed(list(rules.keywords.items()))), rules.descriptions, rules.synonyms))
+
+    assert reordered.rules_fingerprint() != analyzer.rules_fingerprint()
+    assert shuffled.rules_fingerprint() != analyzer.rules_fingerprint()
+
+
+def test_keyword_hits_skip_the_cache(tmp_path):
+    cache = ClassificationCache(str(tmp_path / 'cache.db'))
+    analyzer = SpecialtyAnalyzer(ai_client=None, cache=cache)
+
+    assert analyzer.classify_local(['Acute Myocardial Infarction', 'Hip fracture']) == ['Cardiology', 'Orthopedics']
+    assert len(cache) == 0
+    assert cache.stats == {'memory_hits': 0, 'disk_hits': 0, 'misses': 0, 'evictions': 0}
+
+
+def test_parse_answers_are_cached_and_served_before_parsing(tmp_path, monkeypatch):
+    import spacy
+
+    cache = ClassificationCache(str(tmp_path / 'cache.db'))
+    cache.bind(SpecialtyAnalyzer(ai_client=None).rules_fingerprint())
+    cache.put('zzzz qqqq', 'Genetics', 'spacy')
+    cache.close()
+
+    def load(name, **kwargs):
+        raise AssertionError("spaCy was loaded for a cached description")
+
+    monkeypatch.setattr(spacy, 'load', load)
+    reopened = ClassificationCache(str(tmp_path / 'cache.db'))
+    analyzer = SpecialtyAnalyzer(ai_client=None, cache=reopened)
+
+    assert reopened.get('zzzz qqqq') == ('Genetics', 'spacy')
+    assert analyzer.classify_local(['zzzz qqqq']) == ['Genetics']
+    assert analyzer.tier_hits['cache'] == 1
+    assert analyzer.tier_hits['parse'] == 0
@@ -0,0 +1,49 @@
+import pandas as pd
+
+from finder.columnar import convert_csv, load_columnar
+
+
+def convert(tmp_path, frame, chunksize=2):
+    path = str(tmp_path / 'data.csv')
+    frame.to_csv(path, index=False)
+    return pd.read_csv(path), load_columnar(convert_csv(path, chunksize=chunksize))
+
+
+def test_integer_column_widens_to_float_when_a_later_chunk_has_blanks(tmp_path):
+    expected, loaded = convert(tmp_path, pd.DataFrame({'Age': [30, 41, 52, None, 7]}))
+
+    assert loaded['Age'].dtype == 'float64'
+    pd.testing.assert_series_equal(loaded['Age'], expected['Age'], check_names=False)
+
+
+def test_integer_column_widens_to_float_when_a_later_chunk_has_fractions(tmp_path):
+    expected, loaded = convert(tmp_path, pd.DataFrame({'busy': ['1', '2', '3', '4', '4.5']}))
+
+    assert loaded['busy'].tolist() == expected['busy'].tolist() == [1.0, 2.0, 3.0, 4.0, 4.5]
+
+
+def test_numeric_column_becomes_text_when_a_later_chunk_has_text(tmp_path):
+    frame = pd.DataFrame({
+        'PatientID': ['007', '008', '009', '010', 'PID11'],
+        'Code': ['1', '1', '2', '2', 'B'],
+        'Age': [1, 2, 3, 4, 5],
+    })
+    path = str(tmp_path / 'data.csv')
+    frame.to_csv(path, index=False)
+
+    loaded = load_columnar(convert_csv(path, chunksize=2))
+
+    # The leading zeros a numeric encoding would have dropped survive.
+    assert loaded['PatientID'].astype(object).tolist() == ['007', '008', '009', '010', 'PID11']
+    assert loaded['Code'].astype(object).tolist() == ['1', '1', '2', '2', 'B']
+    assert loaded['Age'].dtype == 'int64'
+    assert loaded['Age'].tolist() == [1, 2, 3, 4, 5]
+
+
+def test_dictionary_column_gains_categories_across_chunks(tmp_path):
+    severities = ['High', 'High', 'Low', 'Low', 'Medium', None, 'High', 'Chronic']
+    expected, loaded = convert(tmp_path, pd.DataFrame({'Severity': severities}))
+
+    assert isinstance(loaded['Severity'].dtype, pd.CategoricalDtype)
+    assert loaded['Severity'].astype(object).where(loaded['Severity'].notna(), None).tolist() == severities
+    assert expected['Severity'].isna().tolist() == loaded['Severity'].isna().tolist()
@@ -0,0 +1,88 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from conftest import HOSPITAL_FILE
+from finder.geo import EARTH_RADIUS_KM, SpatialIndex
+from finder.hospital_finder import HospitalFinder
+
+
+def haversine_km(lat1, lon1, lat2, lon2):
+    lat1, lon1, lat2, lon2 = map(np.radians, (lat1, lon1, lat2, lon2))
+    a = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(a))
+
+
+def numpy_index(lat, lon, block_size=4_000_000) -> SpatialIndex:
+    """
+    Builds an index that uses the NumPy fallback whether or not scipy is installed.
+    """
+    index = SpatialIndex(lat, lon, block_size)
+    index._SpatialIndex__tree = None
+    return index
+
+
+def random_points(rng, n):
+    return rng.uniform(-80, 80, n), rng.uniform(-180, 180, n)
+
+
+@pytest.mark.parametrize('k', [1, 4, 25, 40])
+def test_numpy_fallback_returns_the_nearest_points_nearest_first(k):
+    rng = np.random.default_rng(7)
+    lat, lon = random_points(rng, 25)
+    query_lat, query_lon = random_points(rng, 30)
+    # A small block size splits the queries into several blocks.
+    index = numpy_index(lat, lon, block_size=100)
+
+    distances, positions = index.query(query_lat, query_lon, k)
+
+    expected = haversine_km(query_lat[:, None], query_lon[:, None], lat[None, :], lon[None, :])
+    order = np.argsort(expected, axis=1, kind='stable')[:, :min(k, len(lat))]
+    assert positions.shape == distances.shape == (30, min(k, len(lat)))
+    np.testing.assert_array_equal(positions, order)
+    np.testing.assert_allclose(distances, np.take_along_axis(expected, order, axis=1), atol=1e-6)
+    assert (np.diff(distances, axis=1) >= 0).all()
+
+
+def test_kd_tree_agrees_with_the_numpy_fallback():
+    pytest.importorskip('scipy')
+    rng = np.random.default_rng(11)
+    lat, lon = random_points(rng, 50)
+    query_lat, query_lon = random_points(rng, 20)
+
+    tree_distances, tree_positions = SpatialIndex(lat, lon).query(query_lat, query_lon, 5)
+    distances, positions = numpy_index(lat, lon).query(query_lat, query_lon, 5)
+
+    np.testing.assert_array_equal(tree_positions, positions)
+    np.testing.assert_allclose(tree_distances, distances, atol=1e-6)
+
+
+def test_distances_are_great_circle_kilometres_across_the_antimeridian():
+    index = numpy_index([0.0, 0.0, 10.0], [178.0, 179.9, -179.9])
+
+    distances, positions = index.query(0.0, -179.9, 3)
+
+    assert positions.tolist() == [[1, 0, 2]]
+    np.testing.assert_allclose(distances[0], haversine_km(0.0, -179.9, np.array([0.0, 0.0, 10.0]),
+                                                          np.array([179.9, 178.0, -179.9])), atol=1e-6)
+    assert distances[0, 0] == pytest.approx(22.24, abs=0.01)
+
+
+def test_an_empty_index_finds_nothing():
+    distances, positions = numpy_index([], []).query([43.7, 45.5], [-79.4, -73.6], 3)
+
+    assert distances.shape == positions.shape == (2, 0)
+
+
+def test_hospitals_are_recommended_nearest_first_when_busyness_is_ignored():
+    finder = HospitalFinder(HOSPITAL_FILE)
+    hospitals = pd.read_csv(HOSPITAL_FILE).dropna(subset=['lat', 'lon']).set_index('name')
+    cardiology = [name for name in finder.get_hospital_by_specialty('Cardiology') if name in hospitals.index]
+    patients = [(43.6591, -79.3877), (43.7735, -79.5019), (43.6426, -79.4216)]
+
+    lats, lons = zip(*patients)
+    results = finder.nearest_by_specialty(['Cardiology'] * len(patients), lats, lons, k=3, busy_weight=0)
+
+    for (lat, lon), chosen in zip(patients, results):
+        distance = haversine_km(lat, lon, hospitals.loc[cardiology, 'lat'], hospitals.loc[cardiology, 'lon'])
+        assert list(chosen) == list(distance.sort_values(kind='stable').index[:3])
@@ -0,0 +1,59 @@
+from finder.analysis import SpecialtyAnalyzer
+from finder.keyword_index import KeywordIndex
+
+
+def test_tokenize_keeps_hyphenated_words_and_drops_possessives():
+    assert KeywordIndex.tokenize("Patient’s Von Hippel-Lindau, left_side.") == \
+        ['patient', 'von', 'hippel-lindau', 'left', 'side']
+
+
+def test_phrases_outweigh_the_single_words_they_contain():
+    index = KeywordIndex({'Cardiology': ['heart'], 'Emergency Medicine': ['heart attack']})
+
+    assert index.score(KeywordIndex.tokenize('Suspected heart attack')) == \
+        [('Emergency Medicine', 2.0), ('Cardiology', 1.0)]
+
+
+def test_phrases_only_match_consecutive_tokens():
+    index = KeywordIndex({'Cardiology': ['heart'], 'Emergency Medicine': ['heart attack']})
+
+    assert index.score(KeywordIndex.tokenize('Attack of heart pain')) == [('Cardiology', 1.0)]
+
+
+def test_each_keyword_counts_once():
+    index = KeywordIndex({'Neurology': ['migraine'], 'Rheumatology/Immunology': ['joint', 'swelling']})
+
+    assert index.best_match(KeywordIndex.tokenize('Migraine, migraine and more migraine with joint swelling')) \
+        == 'Rheumatology/Immunology'
+
+
+def test_ties_follow_the_order_of_the_specialty_map():
+    tokens = KeywordIndex.tokenize('Chest pain')
+
+    assert KeywordIndex({'Cardiology': ['chest'], 'Pulmonology': ['pain']}).best_match(tokens) == 'Cardiology'
+    assert KeywordIndex({'Pulmonology': ['pain'], 'Cardiology': ['chest']}).best_match(tokens) == 'Pulmonology'
+    assert [specialty for specialty, _ in KeywordIndex({'B': ['pain'], 'A': ['pain'], 'C': ['pain']}).score(tokens)] \
+        == ['B', 'A', 'C']
+
+
+def test_heads_break_ties_toward_their_specialty():
+    index = KeywordIndex({'Cardiology': ['chest'], 'Orthopedics': ['fracture']})
+    tokens = KeywordIndex.tokenize('Chest wall fracture')
+
+    assert index.best_match(tokens) == 'Cardiology'
+    assert index.best_match(tokens, heads=['fracture']) == 'Orthopedics'
+
+
+def test_no_keyword_means_no_match():
+    index = KeywordIndex({'Cardiology': ['heart']})
+
+    assert index.score(['zzzz']) == []
+    assert index.best_match(['zzzz']) is None
+
+
+def test_built_in_phrases_resolve_descriptions():
+    index = SpecialtyAnalyzer.KEYWORD_INDEX
+
+    assert index.best_match(KeywordIndex.tokenize('Von Hippel-Lindau syndrome')) == 'Genetics'
+    assert index.score(KeywordIndex.tokenize('Pathologic fracture of the femur from bone cancer')) == \
+        [('Orthopedics', 2.0), ('Oncology', 1.0)]
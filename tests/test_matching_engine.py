@@ -0,0 +1,128 @@
+import os
+
+import pandas as pd
+import pytest
+
+from conftest import HOSPITAL_FILE, ROOT
+from finder.analysis import SpecialtyAnalyzer
+from finder.matching_engine import PatientDataHandler
+
+
+PATIENT_FILE = os.path.join(ROOT, 'Data', 'patientData.csv')
+
+NEW_PATIENTS = pd.DataFrame({
+    'PatientID': ['PID9001', 'PID9002', 'PID9003', 'PID9004'],
+    'Severity': ['Severe ', 'life threatening', 'Moderate', None],
+    'AffectedBodyPart': ['Heart', 'Tail', 'Heart', 'Brain'],
+    'Injury/Sickness': ['Acute Myocardial Infarction', 'Hip fracture', 'Atrial fibrillation', 'Migraine'],
+})
+
+
+class GeneticsGemini:
+    """
+    Answers every escalation with 'Genetics'.
+    """
+
+    def generate_text(self, prompt, model_name=None):
+        return 'Genetics'
+
+
+FILTERS = [(severity, body_part) for severity in ('all', 'high', 'medium', 'low', 'chronic')
+           for body_part in (None, 'Heart', 'Brain', 'Tail', 'Nowhere')]
+
+
+def scan(simple_df: pd.DataFrame, severity: str, body_part: str | None) -> list[list]:
+    """
+    Filters by scanning every row, the way the partitions must agree with.
+    """
+    mask = pd.Series(True, index=simple_df.index)
+    if severity != 'all':
+        mask &= simple_df['Severity'] == PatientDataHandler.SEVERITY_OPTIONS[severity]
+    if body_part is not None:
+        mask &= simple_df['AffectedBodyPart'] == body_part
+    return simple_df.loc[mask, PatientDataHandler.BASIC_COLUMNS].astype(object).values.tolist()
+
+
+def rows(frame: pd.DataFrame) -> list[list]:
+    return frame.astype(object).values.tolist()
+
+
+def test_partitions_answer_every_filter_like_a_full_scan():
+    handler = PatientDataHandler(PATIENT_FILE, HOSPITAL_FILE)
+    simple_df = handler.simple_patient_df
+
+    for severity, body_part in FILTERS:
+        view = handler.filter_patients(severity, body_part)
+        assert list(view.columns) == PatientDataHandler.BASIC_COLUMNS
+        assert rows(view) == scan(simple_df, severity, body_part), (severity, body_part)
+        assert view.index.is_monotonic_increasing
+
+
+def test_views_are_cached_and_bad_severities_rejected():
+    handler = PatientDataHandler(PATIENT_FILE, HOSPITAL_FILE)
+
+    assert handler.get_patient_data_basic('high') is handler.get_patient_data_basic('high')
+    with pytest.raises(ValueError, match='Invalid option'):
+        handler.get_patient_data_basic('urgent')
+    with pytest.raises(ValueError, match='Invalid severity'):
+        handler.filter_patients('urgent')
+    with pytest.raises(ValueError, match='index_specialties'):
+        handler.filter_patients(specialty='Cardiology')
+
+
+def test_added_patients_are_filtered_like_a_file_that_contained_them(tmp_path):
+    combined_file = str(tmp_path / 'patients.csv')
+    pd.concat([pd.read_csv(PATIENT_FILE), NEW_PATIENTS]).to_csv(combined_file, index=False)
+    reference = PatientDataHandler(combined_file, HOSPITAL_FILE).simple_patient_df
+
+    handler = PatientDataHandler(PATIENT_FILE, HOSPITAL_FILE)
+    low, chronic = handler.filter_patients('low'), handler.filter_patients('chronic', 'Brain')
+    high = handler.filter_patients('high')
+
+    assert handler.add_patients(NEW_PATIENTS) == len(NEW_PATIENTS)
+
+    for severity, body_part in FILTERS:
+        assert rows(handler.filter_patients(severity, body_part)) == scan(reference, severity, body_part), \
+            (severity, body_part)
+    # Only the views of the severities that gained patients are rebuilt.
+    assert handler.filter_patients('low') is low
+    assert handler.filter_patients('chronic', 'Brain') is chronic
+    assert handler.filter_patients('high') is not high
+    assert rows(handler.simple_patient_df) == rows(reference)
+    assert handler.get_patients(['PID9004', 'PID1001'])['PatientID'].tolist() == ['PID9004', 'PID1001']
+    assert handler.get_patients(['PID9004'])['Severity'].tolist() == ['Unknown']
+
+
+def test_added_patients_join_the_specialty_index():
+    handler = PatientDataHandler(PATIENT_FILE, HOSPITAL_FILE)
+    handler.index_specialties(SpecialtyAnalyzer(ai_client=GeneticsGemini()))
+    cardiology = handler.filter_patients('high', specialty='Cardiology')['PatientID'].tolist()
+
+    handler.add_patients(NEW_PATIENTS)
+
+    assert handler.filter_patients('high', specialty='Cardiology')['PatientID'].tolist() == cardiology + ['PID9001']
+    assert handler.filter_patients('medium', 'Heart', 'Cardiology')['PatientID'].tolist()[-1] == 'PID9003'
+    assert handler.filter_patients(specialty='Orthopedics', body_part='Tail')['PatientID'].tolist() == ['PID9002']
+
+
+def test_add_patients_checks_its_columns():
+    handler = PatientDataHandler(PATIENT_FILE, HOSPITAL_FILE)
+
+    with pytest.raises(ValueError, match='Missing patient columns'):
+        handler.add_patients(NEW_PATIENTS.drop(columns='Severity'))
+    assert handler.add_patients(NEW_PATIENTS.iloc[:0]) == 0
+
+
+def test_a_handler_serves_a_prepared_view_without_reading_its_file(monkeypatch):
+    raw_df = pd.read_csv(PATIENT_FILE, usecols=list(PatientDataHandler.PATIENT_DTYPES),
+                         dtype=PatientDataHandler.PATIENT_DTYPES)
+    patients = PatientDataHandler.standardize_patients(raw_df)
+
+    def read(*args, **kwargs):
+        raise AssertionError("the patient file was read")
+
+    monkeypatch.setattr(pd, 'read_csv', read)
+    handler = PatientDataHandler(PATIENT_FILE, HOSPITAL_FILE, patients=patients)
+
+    assert handler.simple_patient_df is patients
+    assert rows(handler.filter_patients('high', 'Heart')) == scan(patients, 'high', 'Heart')
@@ -0,0 +1,10 @@
+from finder.metrics import Metrics
+
+
+def test_prometheus_label_values_are_escaped():
+    metrics = Metrics(enabled=True)
+    metrics.increment('errors', source='say "hi"\nC:\\path')
+
+    line = next(line for line in metrics.to_prometheus().splitlines() if line.startswith('finder_errors_total{'))
+
+    assert line == 'finder_errors_total{source="say \\"hi\\"\\nC:\\\\path"} 1'
@@ -0,0 +1,79 @@
+import json
+import re
+
+import pandas as pd
+import pytest
+
+from finder.analysis import SpecialtyAnalyzer
+from finder.matching_engine import PatientDataHandler
+from finder.normalization import LabelNormalizer
+
+SPECIALTIES = SpecialtyAnalyzer.SPECIALTY_NORMALIZER
+
+
+@pytest.mark.parametrize('answer, specialty', [
+    ('Cardiology', 'Cardiology'),
+    ('  CARDIOLOGY. ', 'Cardiology'),
+    ("womens health / gynecology", "Women's Health/Gynecology"),
+    ('Orthopaedics', 'Orthopedics'),
+    ('Hematology', 'Oncology'),
+    ('Cardiolgy', 'Cardiology'),
+    ('Opthalmology', 'Ophthalmology'),
+    ('Gastroenterolgy', 'Gastroenterology'),
+])
+def test_spellings_and_synonyms_resolve(answer, specialty):
+    assert SPECIALTIES.normalize(answer) == specialty
+
+
+@pytest.mark.parametrize('answer', [
+    'Haematologist', 'Radiology', 'Pathology', 'Neurologist', 'Psychology', 'Toxicology', 'Podiatry', '', None,
+])
+def test_near_misses_of_other_specialties_are_rejected(answer):
+    assert SPECIALTIES.normalize(answer) is None
+
+
+def test_hematology_is_not_fuzzy_matched_to_rheumatology():
+    # 'hematology' scores 0.91 against 'rheumatology'; only the synonym maps it.
+    assert LabelNormalizer(SpecialtyAnalyzer.VALID_SPECIALTIES_LIST).normalize('Hematology') is None
+
+
+def test_synonyms_must_name_known_labels():
+    with pytest.raises(ValueError, match='unknown labels'):
+        LabelNormalizer(['High', 'Low'], {'Severe': 'Critical'})
+
+
+def test_columns_are_normalized_one_distinct_value_at_a_time():
+    values = pd.Series(['Severe ', 'life threatening', None, 'Critcal', 'moderate', 'whatever'])
+
+    resolved = PatientDataHandler.SEVERITY_NORMALIZER.normalize_many(values)
+
+    assert resolved.tolist() == ['High', 'High', None, 'High', 'Medium', None]
+
+
+class BatchThenSingle:
+    """
+    Answers a batch prompt with `batch_answer` for every entry and single prompts with `single_answer`.
+    """
+
+    ENTRY = re.compile(r'^\s*\{"index": (\d+),', re.MULTILINE)
+
+    def __init__(self, batch_answer, single_answer):
+        self.batch_answer, self.single_answer = batch_answer, single_answer
+        self.single_prompts = 0
+
+    def generate_text(self, prompt, model_name=None):
+        indexes = self.ENTRY.findall(prompt)
+        if indexes:
+            return json.dumps([{'index': int(i), 'specialty': self.batch_answer} for i in indexes])
+        self.single_prompts += 1
+        return self.single_answer
+
+
+def test_a_near_miss_batch_answer_is_retried_on_its_own():
+    gemini = BatchThenSingle('Radiology', 'Oncology')
+    analyzer = SpecialtyAnalyzer(ai_client=gemini)
+
+    answers = analyzer.escalate_many(['Unspecified presentation 1', 'Unspecified presentation 2'])
+
+    assert answers == dict.fromkeys(['Unspecified presentation 1', 'Unspecified presentation 2'], 'Oncology')
+    assert gemini.single_prompts == 2
@@ -0,0 +1,102 @@
+import multiprocessing
+import sys
+
+import pandas as pd
+
+from finder.analysis import SpecialtyAnalyzer
+from finder.parallel import ParallelClassifier
+
+
+class CountingGemini:
+    """
+    Answers every prompt with 'Genetics' and counts the descriptions it was asked about.
+    """
+
+    def __init__(self):
+        self.descriptions = []
+
+    def generate_text(self, prompt, model_name=None):
+        self.descriptions.append(prompt)
+        return 'Genetics'
+
+
+def test_escalations_are_dropped_once_collected_and_answers_stay_bounded():
+    gemini = CountingGemini()
+    analyzer = SpecialtyAnalyzer(ai_client=gemini)
+    chunks = [pd.DataFrame({'Injury/Sickness': [f"Unspecified presentation {i % 3}", 'Hip fracture']})
+              for i in range(12)]
+
+    # One chunk in flight at a time, so every lookup happens after the previous chunk was collected.
+    with ParallelClassifier(analyzer, workers=1, max_pending=1, escalation_batch_size=1, max_answers=2,
+                            mp_context=multiprocessing.get_context('fork')) as classifier:
+        results = [specialties for _, specialties in classifier.map_chunks(chunks)]
+        escalations = classifier._ParallelClassifier__escalations
+        answers = classifier._ParallelClassifier__answers
+
+        assert results == [['Genetics', 'Orthopedics']] * 12
+        assert escalations == {}
+        assert len(answers) == 2
+        # Three descriptions cycle through an LRU of two, so each is evicted before it comes round again.
+        assert len(gemini.descriptions) == 12
+
+
+def test_recent_answers_are_reused_after_their_chunks_are_collected():
+    gemini = CountingGemini()
+    analyzer = SpecialtyAnalyzer(ai_client=gemini)
+    chunks = [pd.DataFrame({'Injury/Sickness': ['Unspecified presentation 1']}) for _ in range(6)]
+
+    with ParallelClassifier(analyzer, workers=1, max_pending=1, escalation_batch_size=1,
+                            mp_context=multiprocessing.get_context('fork')) as classifier:
+        results = [specialties for _, specialties in classifier.map_chunks(chunks)]
+
+    assert results == [['Genetics']] * 6
+    assert len(gemini.descriptions) == 1
+
+
+class FailingGemini:
+    def __init__(self):
+        self.prompts = 0
+
+    def generate_text(self, prompt, model_name=None):
+        self.prompts += 1
+        return None
+
+
+def test_a_done_callback_running_after_collection_registers_nothing():
+    gemini = FailingGemini()
+    analyzer = SpecialtyAnalyzer(ai_client=gemini)
+    chunk = pd.DataFrame({'Injury/Sickness': ['Unspecified presentation 1']})
+
+    with ParallelClassifier(analyzer, workers=1, escalation_batch_size=1,
+                            mp_context=multiprocessing.get_context('fork')) as classifier:
+        submitted = classifier._ParallelClassifier__submit(chunk, 'Injury/Sickness')
+        _, specialties = classifier._ParallelClassifier__collect(*submitted)
+        prompts = gemini.prompts
+
+        # What a callback that loses the race against __collect does.
+        _, _, uniques, future = submitted
+        classifier._ParallelClassifier__escalate(uniques, future)
+
+        assert specialties == ['Gemini-API-Error']
+        assert classifier._ParallelClassifier__waiting == {}
+        assert classifier._ParallelClassifier__escalations == {}
+        assert gemini.prompts == prompts
+
+
+def test_nothing_is_left_registered_when_callbacks_race_collection():
+    switch_interval = sys.getswitchinterval()
+    sys.setswitchinterval(1e-6)
+    try:
+        for _ in range(10):
+            analyzer = SpecialtyAnalyzer(ai_client=FailingGemini())
+            chunks = [pd.DataFrame({'Injury/Sickness': [f"Unspecified presentation {i % 4}"]}) for i in range(8)]
+            with ParallelClassifier(analyzer, workers=2, max_pending=1, escalation_batch_size=1,
+                                    mp_context=multiprocessing.get_context('fork')) as classifier:
+                results = [specialties for _, specialties in classifier.map_chunks(chunks)]
+
+                assert results == [['Gemini-API-Error']] * 8
+                assert classifier._ParallelClassifier__waiting == {}
+                assert classifier._ParallelClassifier__escalations == {}
+                assert len(classifier._ParallelClassifier__answers) == 0
+    finally:
+        sys.setswitchinterval(switch_interval)
@@ -0,0 +1,79 @@
+import json
+import os
+import shutil
+
+import pytest
+
+from conftest import HOSPITAL_FILE, ROOT
+from finder.analysis import SpecialtyAnalyzer
+from finder.hospital_finder import HospitalFinder
+from finder.reference_data import ReferenceWatcher
+from finder.service import create_app
+
+
+def watcher_for(tmp_path, monkeypatch):
+    for name in ('specialties.json', 'hospital_specialties.json'):
+        shutil.copy(os.path.join(ROOT, 'Data', name), tmp_path / name)
+    hospital_file = str(tmp_path / 'hospitalData.csv')
+    shutil.copy(HOSPITAL_FILE, hospital_file)
+
+    hospital_finder = HospitalFinder(hospital_file)
+
+    def parse_hospital_data():
+        raise AssertionError("the hospital CSV was parsed")
+
+    monkeypatch.setattr(hospital_finder, 'reload_hospital_data', parse_hospital_data)
+    analyzer = SpecialtyAnalyzer(ai_client=None)
+    return ReferenceWatcher(analyzer, hospital_finder, str(tmp_path / 'specialties.json'),
+                            str(tmp_path / 'hospital_specialties.json'))
+
+
+def test_load_reads_the_json_files_without_parsing_hospital_data(tmp_path, monkeypatch, capsys):
+    watcher = watcher_for(tmp_path, monkeypatch)
+
+    changes = watcher.load()
+
+    assert set(changes) == {'specialties', 'hospital_specialties'}
+    with open(tmp_path / 'specialties.json', encoding='utf-8') as f:
+        assert watcher.versions['specialties'] == json.load(f)['version']
+    assert watcher.check() == {}
+
+
+def test_load_reports_the_built_in_tables_a_file_replaces(tmp_path, monkeypatch, capsys):
+    watcher = watcher_for(tmp_path, monkeypatch)
+    path = tmp_path / 'specialties.json'
+    path.write_text(path.read_text().replace('"heart",', '"heart", "palpitation",', 1))
+
+    watcher.load()
+
+    assert "replaces the built-in keywords" in capsys.readouterr().out
+    assert 'palpitation' in watcher.analyzer.rules.keywords['Cardiology']
+
+
+def test_load_fails_on_a_broken_file(tmp_path, monkeypatch):
+    watcher = watcher_for(tmp_path, monkeypatch)
+    (tmp_path / 'specialties.json').write_text('{')
+
+    with pytest.raises(ValueError, match='not valid JSON'):
+        watcher.load()
+
+
+def test_cached_gemini_answers_survive_a_restart_with_edited_rules(tmp_path, monkeypatch):
+    watcher_for(tmp_path, monkeypatch)
+    path = tmp_path / 'specialties.json'
+    path.write_text(path.read_text().replace('"heart",', '"heart", "palpitation",', 1))
+    cache_file = str(tmp_path / 'cache.db')
+
+    def start():
+        return create_app(os.path.join(ROOT, 'Data', 'patientData.csv'), str(tmp_path / 'hospitalData.csv'),
+                          str(path), str(tmp_path / 'hospital_specialties.json'), cache_file=cache_file)
+
+    first = start()
+    first.analyzer.cache.put('zzzz qqqq', 'Genetics', 'gemini')
+    first.analyzer.cache.close()
+
+    restarted = start()
+
+    assert restarted.analyzer.cache.get('zzzz qqqq') == ('Genetics', 'gemini')
+    assert restarted.analyzer.cache.fingerprint == restarted.analyzer.rules_fingerprint()
+    restarted.analyzer.cache.close()
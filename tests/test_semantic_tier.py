@@ -0,0 +1,38 @@
+import os
+
+import pandas as pd
+
+from benchmarks.generators import HELD_OUT_CONDITIONS
+from conftest import ROOT
+from finder.analysis import SpecialtyAnalyzer
+
+
+def patient_descriptions():
+    patients = pd.read_csv(os.path.join(ROOT, 'Data', 'patientData.csv'))
+    return [text.lower() for text in patients['Injury/Sickness'].dropna()]
+
+
+def test_held_out_conditions_are_not_in_the_patient_file():
+    descriptions = patient_descriptions()
+    leaked = [condition for conditions in HELD_OUT_CONDITIONS.values() for condition in conditions
+              if any(condition.lower() in text or text in condition.lower() for text in descriptions)]
+    assert leaked == []
+
+
+def test_descriptions_do_not_name_patient_file_conditions():
+    descriptions = set(patient_descriptions())
+    phrases = {phrase.strip().lower() for text in SpecialtyAnalyzer.SPECIALTY_DESCRIPTIONS.values()
+               for phrase in text.replace(':', ',').split(',')}
+    assert phrases & descriptions == set()
+
+
+def test_semantic_tier_resolves_held_out_conditions():
+    index = SpecialtyAnalyzer(ai_client=None).semantic_index
+    texts = ['Inguinal hernia', 'Sudden loss of vision', "Barrett's esophagus", 'Shortness of breath on exertion']
+    assert index.best_matches(texts) == ['General Surgery', 'Ophthalmology', 'Gastroenterology', 'Pulmonology']
+
+
+def test_semantic_tier_escalates_what_it_was_never_told_about():
+    index = SpecialtyAnalyzer(ai_client=None).semantic_index
+    assert index.best_matches(['Transposition of the great arteries', "Alzheimer's disease", 'Acute sinusitis']) \
+        == [None, None, None]
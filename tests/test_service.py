@@ -0,0 +1,130 @@
+import asyncio
+import json
+
+from finder.ai_funcs import AsyncGeminiClient
+from finder.analysis import SpecialtyAnalyzer
+from finder.hospital_finder import HospitalFinder
+from finder.matching_engine import PatientDataHandler
+from finder.service import FinderService
+
+from conftest import HOSPITAL_FILE
+
+
+def call(app, method: str, path: str, body=None, query: bytes = b'') -> tuple[int, dict]:
+    messages = []
+
+    async def receive():
+        return {'type': 'http.request', 'body': json.dumps(body).encode() if body is not None else b'',
+                'more_body': False}
+
+    async def send(message):
+        messages.append(message)
+
+    asyncio.run(app({'type': 'http', 'method': method, 'path': path, 'query_string': query}, receive, send))
+    return messages[0]['status'], json.loads(messages[1]['body'])
+
+
+def make_service(stub_model) -> FinderService:
+    async_client = AsyncGeminiClient(requests_per_second=1000, model_factory=lambda name: stub_model)
+    # Like create_app, the analyzer has no sync client, so escalations must use the async one.
+    return FinderService(SpecialtyAnalyzer(ai_client=None), HospitalFinder(HOSPITAL_FILE), async_client)
+
+
+def test_route_escalates_unresolvable_description_through_async_client(stub_model):
+    status, result = call(make_service(stub_model), 'POST', '/route', {'description': 'zzzz qqqq', 'top_k': 2})
+
+    assert status == 200
+    assert result['specialties'] == [{'specialty': 'Genetics', 'score': 1.0, 'source': 'gemini'}]
+    assert result['hospitals']
+    assert len(stub_model.prompts) == 1
+
+
+def test_route_resolves_keywords_without_gemini(stub_model):
+    status, result = call(make_service(stub_model), 'POST', '/route',
+                          {'description': 'Pathologic fracture of the femur from bone cancer'})
+
+    assert status == 200
+    assert [score['specialty'] for score in result['specialties']] == ['Orthopedics', 'Oncology']
+    assert stub_model.prompts == []
+
+
+def test_keyword_request_does_not_wait_behind_escalating_batch():
+    from conftest import StubModel
+
+    service = make_service(StubModel('Genetics', delay=1.0))
+    service.analyzer.classify_local(['warm up'])  # Loads spaCy outside the timed part.
+
+    async def post(description: str, after: float) -> float:
+        await asyncio.sleep(after)
+        started = asyncio.get_running_loop().time()
+        messages = []
+
+        async def receive():
+            return {'type': 'http.request', 'body': json.dumps({'description': description}).encode()}
+
+        async def send(message):
+            messages.append(message)
+
+        await service({'type': 'http', 'method': 'POST', 'path': '/classify', 'query_string': b''}, receive, send)
+        assert messages[0]['status'] == 200
+        return asyncio.get_running_loop().time() - started
+
+    async def main():
+        escalating, keyword = await asyncio.gather(post('zzzz qqqq', 0), post('Acute Myocardial Infarction', 0.1))
+        await service.batcher.stop()
+        return escalating, keyword
+
+    escalating, keyword = asyncio.run(main())
+    assert escalating >= 1.0
+    assert keyword < 0.5
+
+
+def test_non_object_body_is_rejected(stub_model):
+    for body in ([{'description': 'chest pain'}], 'chest pain', 3):
+        status, result = call(make_service(stub_model), 'POST', '/classify', body)
+        assert status == 400
+        assert 'JSON object' in result['error']
+
+
+def patient_service(tmp_path, stub_model) -> FinderService:
+    patient_file = tmp_path / 'patients.csv'
+    patient_file.write_text('PatientID,Severity,AffectedBodyPart,Injury/Sickness\n'
+                            'P1,Critical,Heart,Acute Myocardial Infarction\n'
+                            'P2,Moderate,Other,zzzz qqqq\n'
+                            'P3,Mild,Other,zzzz qqqq\n')
+    service = make_service(stub_model)
+    service.data_handler = PatientDataHandler(str(patient_file), HOSPITAL_FILE)
+    return service
+
+
+def test_patients_are_filtered_by_specialty_escalated_through_the_async_client(tmp_path, stub_model):
+    service = patient_service(tmp_path, stub_model)
+
+    status, result = call(service, 'GET', '/patients', query=b'specialty=Genetics')
+    assert status == 200
+    assert [patient['PatientID'] for patient in result['patients']] == ['P2', 'P3']
+
+    prompts = len(stub_model.prompts)
+    status, result = call(service, 'GET', '/patients', query=b'severity=high&specialty=Cardiology')
+    assert status == 200
+    assert [patient['PatientID'] for patient in result['patients']] == ['P1']
+    assert len(stub_model.prompts) == prompts
+
+
+def test_specialties_are_indexed_at_startup(tmp_path, stub_model):
+    service = patient_service(tmp_path, stub_model)
+    messages = iter([{'type': 'lifespan.startup'}, {'type': 'lifespan.shutdown'}])
+    sent = []
+
+    async def receive():
+        return next(messages)
+
+    async def send(message):
+        sent.append(message['type'])
+        if message['type'] == 'lifespan.startup.complete':
+            assert service.data_handler.specialties_indexed
+
+    asyncio.run(service({'type': 'lifespan'}, receive, send))
+
+    assert sent == ['lifespan.startup.complete', 'lifespan.shutdown.complete']
+    assert service.data_handler.filter_patients(specialty='Genetics')['PatientID'].tolist() == ['P2', 'P3']
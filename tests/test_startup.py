@@ -0,0 +1,40 @@
+import json
+import subprocess
+import sys
+
+from benchmarks.bench_startup import DEFERRED_MODULES
+from conftest import ROOT
+
+
+# Records every data file read or memory-mapped, then imports run_client and runs setup().
+STARTUP_SNIPPET = """
+import json, sys
+import pandas as pd
+import finder.columnar
+
+reads = []
+
+def recording(load):
+    def wrapper(path, *args, **kwargs):
+        reads.append(str(path))
+        return load(path, *args, **kwargs)
+    return wrapper
+
+pd.read_csv = recording(pd.read_csv)
+finder.columnar.load_columnar = recording(finder.columnar.load_columnar)
+
+import run_client
+imported = sorted(sys.modules)
+run_client.setup()
+print(json.dumps({'import': imported, 'setup': sorted(sys.modules), 'reads': reads}))
+"""
+
+
+def test_run_client_defers_spacy_gemini_and_csv_loading():
+    proc = subprocess.run([sys.executable, '-c', STARTUP_SNIPPET], cwd=ROOT, capture_output=True, text=True,
+                          check=True)
+    startup = json.loads(proc.stdout.strip().splitlines()[-1])
+
+    for stage in ('import', 'setup'):
+        assert [name for name in DEFERRED_MODULES if name in startup[stage]] == []
+    assert startup['reads'] == []
@@ -0,0 +1,166 @@
+import json
+import os
+
+import pandas as pd
+import pytest
+
+from conftest import HOSPITAL_FILE
+from finder.analysis import SpecialtyAnalyzer
+from finder.columnar import convert_csv
+from finder.hospital_finder import HospitalFinder
+from finder.streaming import ResultSink, StreamCheckpoint, open_sink, stream_results
+
+
+PATIENTS = [
+    ('P1', 'Critical', 'Heart', 'Acute Myocardial Infarction'),
+    ('P2', 'Moderate', 'Leg', 'Hip fracture'),
+    ('P3', 'Mild', 'Other', 'zzzz qqqq'),
+    ('P4', 'Critical', 'Brain', 'Ischemic Stroke with right-sided paralysis'),
+    ('P5', 'Mild', 'Skin', 'Eczema flare-up'),
+    ('P6', 'Moderate', 'Heart', 'Acute Myocardial Infarction'),
+    ('P7', 'Chronic', 'Eye', 'Glaucoma'),
+]
+
+
+class OfflineGemini:
+    """
+    Fails every request, so escalated descriptions come back as 'Gemini-API-Error'.
+    """
+
+    def generate_text(self, prompt, model_name=None):
+        return None
+
+
+class ChunkRecordingAnalyzer(SpecialtyAnalyzer):
+    """
+    Records the size of every chunk it classifies, and fails on chunk number `fail_on`.
+    """
+
+    def __init__(self, fail_on=None):
+        super().__init__(ai_client=OfflineGemini())
+        self.chunk_sizes = []
+        self.fail_on = fail_on
+
+    def get_specialties(self, descriptions, *args, **kwargs):
+        descriptions = list(descriptions)
+        self.chunk_sizes.append(len(descriptions))
+        if len(self.chunk_sizes) == self.fail_on:
+            raise RuntimeError("worker crashed")
+        return super().get_specialties(descriptions, *args, **kwargs)
+
+
+def write_patients(tmp_path) -> str:
+    path = str(tmp_path / 'patients.csv')
+    pd.DataFrame(PATIENTS, columns=['PatientID', 'Severity', 'AffectedBodyPart', 'Injury/Sickness']) \
+        .to_csv(path, index=False)
+    return path
+
+
+def expected_results(finder) -> list[dict]:
+    specialties = SpecialtyAnalyzer(ai_client=OfflineGemini()).get_specialties([text for *_, text in PATIENTS])
+    return [{'PatientID': patient_id, 'Injury': text, 'Determined_Speciality': specialty,
+             'Hospital(s)': None if 'Error' in specialty else list(finder.get_hospital_by_specialty(specialty))}
+            for (patient_id, *_, text), specialty in zip(PATIENTS, specialties)]
+
+
+def read_jsonl(path) -> list[dict]:
+    with open(path, encoding='utf-8') as f:
+        return [json.loads(line) for line in f]
+
+
+def test_jsonl_output_matches_classifying_everything_at_once(tmp_path):
+    finder = HospitalFinder(HOSPITAL_FILE)
+    analyzer = ChunkRecordingAnalyzer()
+    output = str(tmp_path / 'results.jsonl')
+
+    assert stream_results(write_patients(tmp_path), output, analyzer, finder, chunksize=3) == len(PATIENTS)
+
+    assert read_jsonl(output) == expected_results(finder)
+    assert analyzer.chunk_sizes == [3, 3, 1]
+    assert not os.path.exists(StreamCheckpoint(output).path)
+
+
+def test_csv_output_joins_hospitals_and_leaves_errors_blank(tmp_path):
+    finder = HospitalFinder(HOSPITAL_FILE)
+    output = str(tmp_path / 'results.csv')
+
+    stream_results(write_patients(tmp_path), output, ChunkRecordingAnalyzer(), finder, chunksize=2)
+
+    written = pd.read_csv(output, keep_default_na=False)
+    expected = expected_results(finder)
+    assert written['PatientID'].tolist() == [row['PatientID'] for row in expected]
+    assert written['Hospital(s)'].tolist() == ['; '.join(row['Hospital(s)'] or []) for row in expected]
+    assert written.loc[2, 'Determined_Speciality'] == 'Gemini-API-Error'
+
+
+def test_columnar_input_streams_the_same_results(tmp_path):
+    finder = HospitalFinder(HOSPITAL_FILE)
+    patient_file = write_patients(tmp_path)
+    from_csv, from_columnar = str(tmp_path / 'csv.jsonl'), str(tmp_path / 'columnar.jsonl')
+
+    stream_results(patient_file, from_csv, ChunkRecordingAnalyzer(), finder, chunksize=3)
+    analyzer = ChunkRecordingAnalyzer()
+    stream_results(convert_csv(patient_file, chunksize=2), from_columnar, analyzer, finder, chunksize=3)
+
+    assert read_jsonl(from_columnar) == read_jsonl(from_csv)
+    assert analyzer.chunk_sizes == [3, 3, 1]
+
+
+def test_a_crashed_run_resumes_after_its_last_checkpoint(tmp_path):
+    finder = HospitalFinder(HOSPITAL_FILE)
+    patient_file = write_patients(tmp_path)
+    output = str(tmp_path / 'results.jsonl')
+
+    with pytest.raises(RuntimeError):
+        stream_results(patient_file, output, ChunkRecordingAnalyzer(fail_on=2), finder, chunksize=3)
+    assert StreamCheckpoint(output).load()['last_patient_id'] == 'P3'
+    # A half-written chunk after the checkpoint is discarded on resume.
+    with open(output, 'a', encoding='utf-8') as f:
+        f.write('{"PatientID": "P4", "Inj')
+
+    analyzer = ChunkRecordingAnalyzer()
+    assert stream_results(patient_file, output, analyzer, finder, chunksize=3) == len(PATIENTS)
+
+    assert read_jsonl(output) == expected_results(finder)
+    assert analyzer.chunk_sizes == [3, 1]
+
+
+def test_resume_false_starts_over_despite_a_checkpoint(tmp_path):
+    finder = HospitalFinder(HOSPITAL_FILE)
+    patient_file = write_patients(tmp_path)
+    output = str(tmp_path / 'results.csv')
+
+    with pytest.raises(RuntimeError):
+        stream_results(patient_file, output, ChunkRecordingAnalyzer(fail_on=3), finder, chunksize=3)
+
+    analyzer = ChunkRecordingAnalyzer()
+    assert stream_results(patient_file, output, analyzer, finder, chunksize=3, resume=False) == len(PATIENTS)
+    assert analyzer.chunk_sizes == [3, 3, 1]
+    assert pd.read_csv(output)['PatientID'].tolist() == [patient_id for patient_id, *_ in PATIENTS]
+
+
+def test_unknown_output_formats_are_rejected(tmp_path):
+    with pytest.raises(ValueError, match="Unsupported output format '.xlsx'"):
+        open_sink(str(tmp_path / 'results.xlsx'))
+
+
+def test_parquet_output_writes_one_part_per_chunk(tmp_path):
+    pytest.importorskip('pyarrow')
+    finder = HospitalFinder(HOSPITAL_FILE)
+    output = str(tmp_path / 'results.parquet')
+
+    stream_results(write_patients(tmp_path), output, ChunkRecordingAnalyzer(), finder, chunksize=3)
+
+    assert sorted(os.listdir(output)) == ['part-00000.parquet', 'part-00001.parquet', 'part-00002.parquet']
+    assert pd.read_parquet(output)['PatientID'].tolist() == [patient_id for patient_id, *_ in PATIENTS]
+
+
+def test_sinks_must_implement_write_and_position(tmp_path):
+    class Incomplete(ResultSink):
+        def write(self, results_df):
+            pass
+
+    with pytest.raises(TypeError, match='position'):
+        Incomplete(str(tmp_path / 'results.txt'))
+    with pytest.raises(TypeError):
+        ResultSink(str(tmp_path / 'results.txt'))
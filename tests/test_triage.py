@@ -0,0 +1,110 @@
+import pandas as pd
+
+from conftest import HOSPITAL_FILE
+from finder.analysis import SpecialtyAnalyzer
+from finder.hospital_finder import HospitalFinder
+from finder.triage import TriageScheduler
+
+
+class ScriptedGemini:
+    """
+    Answers every prompt with the next of a list of responses, recording the prompts.
+    """
+
+    def __init__(self, *responses):
+        self.responses = list(responses)
+        self.prompts = []
+
+    def generate_text(self, prompt, model_name=None):
+        self.prompts.append(prompt)
+        return self.responses.pop(0) if len(self.responses) > 1 else self.responses[0]
+
+
+def patients(*rows):
+    return pd.DataFrame([{'PatientID': f"P{i}", 'Severity': severity, 'Injury/Sickness': text}
+                         for i, (severity, text) in enumerate(rows)])
+
+
+def run(scheduler, rows):
+    scheduler.submit(rows)
+    return pd.concat(list(scheduler.run()), ignore_index=True)
+
+
+def test_critical_patient_without_a_matching_emergency_department_goes_to_trauma_centres():
+    finder = HospitalFinder(HOSPITAL_FILE)
+    scheduler = TriageScheduler(SpecialtyAnalyzer(ai_client=None), finder)
+
+    results = run(scheduler, patients(('High', 'Glaucoma'), ('High', 'Acute Myocardial Infarction')))
+
+    eye, heart = results.to_dict('records')
+    assert eye['Determined_Speciality'] == 'Ophthalmology'
+    assert eye['Emergency_Route'] == 'trauma'
+    assert set(eye['Hospital(s)']) == set(finder.get_emergency_hospitals('Trauma/Critical Care'))
+    assert 'Centre for Addiction and Mental Health (CAMH)' not in eye['Hospital(s)']
+    assert heart['Emergency_Route'] == 'specialty'
+
+
+def test_critical_patient_keeps_specialty_hospitals_when_no_emergency_department_can_take_them():
+    finder = HospitalFinder(HOSPITAL_FILE, {
+        'Toronto General Hospital': ['Cardiology'],
+        'Hennick Bridgepoint Hospital': ['Ophthalmology'],
+    })
+    scheduler = TriageScheduler(SpecialtyAnalyzer(ai_client=None), finder)
+
+    results = run(scheduler, patients(('High', 'Glaucoma'), ('Medium', 'Glaucoma')))
+
+    critical, standard = results.to_dict('records')
+    assert critical['Hospital(s)'] == ('Hennick Bridgepoint Hospital',)
+    assert critical['Emergency_Route'] == 'none'
+    assert standard['Emergency_Route'] is None
+
+
+def test_failed_escalations_are_retried_instead_of_remembered():
+    gemini = ScriptedGemini('', '', 'Genetics')
+    scheduler = TriageScheduler(SpecialtyAnalyzer(ai_client=gemini), HospitalFinder(HOSPITAL_FILE))
+    rows = patients(('Medium', 'Unspecified presentation 17'))
+
+    first = run(scheduler, rows)
+    assert first.loc[0, 'Determined_Speciality'] == 'Gemini-API-Error'
+    assert first.loc[0, 'Hospital(s)'] is None
+
+    second = run(scheduler, rows)
+    assert second.loc[0, 'Determined_Speciality'] == 'Genetics'
+
+    prompts = len(gemini.prompts)
+    third = run(scheduler, rows)
+    assert third.loc[0, 'Determined_Speciality'] == 'Genetics'
+    assert len(gemini.prompts) == prompts
+
+
+def test_deferred_escalations_wait_for_the_final_run():
+    gemini = ScriptedGemini('Genetics')
+    scheduler = TriageScheduler(SpecialtyAnalyzer(ai_client=gemini), HospitalFinder(HOSPITAL_FILE))
+
+    scheduler.submit(patients(('Low', 'Unspecified presentation 17'), ('High', 'Acute Myocardial Infarction')))
+    ready = pd.concat(list(scheduler.run(finish_deferred=False)), ignore_index=True)
+    assert ready['Determined_Speciality'].tolist() == ['Cardiology']
+    assert not gemini.prompts
+
+    background = pd.concat(list(scheduler.run()), ignore_index=True)
+    assert background['Determined_Speciality'].tolist() == ['Genetics']
+
+
+def test_remembered_answers_are_bounded_and_the_least_recent_is_dropped_first():
+    gemini = ScriptedGemini('Genetics')
+    scheduler = TriageScheduler(SpecialtyAnalyzer(ai_client=gemini), HospitalFinder(HOSPITAL_FILE), max_answers=2)
+    first, second, third = (patients(('Medium', f"Unspecified presentation {i}")) for i in range(3))
+
+    def escalated():
+        # The batch answer is not JSON, so every escalated description is also asked singly.
+        return [prompt for prompt in gemini.prompts if '**Patient Injury Description:**' in prompt]
+
+    for rows in (first, second, first, third):
+        assert run(scheduler, rows).loc[0, 'Determined_Speciality'] == 'Genetics'
+    assert len(escalated()) == 3
+
+    # `first` was used after `second`, so `second` was dropped to make room for `third`.
+    run(scheduler, first)
+    assert len(escalated()) == 3
+    run(scheduler, second)
+    assert len(escalated()) == 4